@@ -0,0 +1,133 @@
+"""Benchmark: bytes on the wire and CPU per request with response compression.
+
+Serves the API's larger responses through the full app (STORAGE_BACKEND=memory,
+seeded with status checks), in-process over ASGI, once per Accept-Encoding:
+
+* identity: no compression, as before CompressionMiddleware
+* gzip / br: negotiated compression; /api/courses is already served from
+  pre-compressed bodies (http_cache.py) and passes through untouched
+
+CPU is process time per request, so the figures do not depend on how busy the
+event loop is. A second table times CORS preflights through starlette's
+CORSMiddleware and through the caching one in cors.py.
+
+    python benchmarks/bench_compression.py [--requests 300] [--status-checks 1000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from starlette.middleware.cors import CORSMiddleware as StarletteCORSMiddleware
+from starlette.responses import PlainTextResponse
+
+from cors import CORSMiddleware, parse_origins
+
+ENCODINGS = ("identity", "gzip", "br")
+ROUTES = ("/api/courses", "/api/courses/search?q=automation&limit=50", "/api/status?limit=1000",
+          "/api/status?limit=1000&format=ndjson")
+ORIGINS = "https://sdet.example, https://www.sdet.example, https://staging.sdet.example, http://localhost:3000"
+
+
+def scope_for(target, method="GET", headers=()):
+    path, _, query = target.partition("?")
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [(b"host", b"bench"), *headers],
+        "server": ("bench", 80), "client": ("127.0.0.1", 1),
+    }
+
+
+async def serve(app, scope, requests):
+    """Send ``requests`` identical requests; returns (wire bytes of the last one, CPU seconds per request)"""
+    sent = []
+    disconnected = asyncio.Event()  # never set: streamed responses wait on it until they finish
+
+    async def receive():
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent.clear()
+            sent.extend(len(name) + len(value) + 4 for name, value in message["headers"])
+        elif message["type"] == "http.response.body":
+            sent.append(len(message.get("body", b"")))
+
+    start = time.process_time()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return sum(sent), (time.process_time() - start) / requests
+
+
+async def seed(server, status_checks):
+    start = datetime(2024, 1, 1)
+    await server.storage.status_checks.insert_many([
+        {"id": str(uuid.uuid4()), "client_name": f"client-{i % 50}", "timestamp": start + timedelta(seconds=i)}
+        for i in range(status_checks)
+    ])
+
+
+async def bench_routes(requests, status_checks):
+    import server
+
+    results = {}
+    async with server.app.router.lifespan_context(server.app):
+        await seed(server, status_checks)
+        for route in ROUTES:
+            for encoding in ENCODINGS:
+                scope = scope_for(route, headers=[(b"accept-encoding", encoding.encode())])
+                await serve(server.app, scope, 20)  # warm up, and fill the compressed body cache
+                results[route, encoding] = await serve(server.app, scope, requests)
+    return results
+
+
+async def bench_preflight(requests):
+    async def endpoint(scope, receive, send):
+        await PlainTextResponse("unreachable")(scope, receive, send)
+
+    options = dict(allow_origins=sorted(parse_origins(ORIGINS)), allow_methods=["*"], allow_headers=["*"],
+                   allow_credentials=True)
+    apps = {"starlette": StarletteCORSMiddleware(endpoint, **options), "cached": CORSMiddleware(endpoint, **options)}
+    scope = scope_for("/api/enroll", "OPTIONS", [
+        (b"origin", b"http://localhost:3000"), (b"access-control-request-method", b"POST"),
+        (b"access-control-request-headers", b"content-type, idempotency-key"),
+    ])
+    results = {}
+    for name, app in apps.items():
+        await serve(app, scope, 200)
+        results[name] = min([(await serve(app, scope, requests))[1] for _ in range(5)])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300, help="requests per route and encoding")
+    parser.add_argument("--status-checks", type=int, default=1000, help="status checks to seed")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(bench_routes(args.requests, args.status_checks))
+    print(f"{'route':42} {'encoding':8} {'bytes':>9} {'ratio':>6} {'cpu':>10}")
+    for route in ROUTES:
+        identity = results[route, "identity"][0]
+        for encoding in ENCODINGS:
+            size, cpu = results[route, encoding]
+            print(f"{route:42} {encoding:8} {size:9,} {size / identity:6.1%} {cpu * 1e6:7.0f} us")
+
+    preflight = asyncio.run(bench_preflight(args.requests * 10))
+    print()
+    for name, cpu in preflight.items():
+        print(f"preflight {name:10} {cpu * 1e6:7.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
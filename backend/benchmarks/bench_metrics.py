@@ -0,0 +1,93 @@
+"""Micro-benchmark: per-request cost of the /metrics instrumentation.
+
+Serves the same small JSON route through a bare app and through one with
+MetricsMiddleware and InstrumentedJSONResponse, in-process over ASGI, and
+reports the difference per request.
+
+    python benchmarks/bench_metrics.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI
+
+from metrics import HTTP_REQUEST_DURATION, MetricsMiddleware
+from serialization import FastJSONResponse, InstrumentedJSONResponse
+
+PAYLOAD = {"message": "SDET Course API is running", "items": list(range(20))}
+
+
+def build_app(instrumented):
+    app = FastAPI(default_response_class=InstrumentedJSONResponse if instrumented else FastJSONResponse)
+
+    @app.get("/api/items/{item_id}")
+    async def item(item_id: int):
+        return PAYLOAD
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def serve(app, requests):
+    """Drive the ASGI app directly, so only the app's own work is timed"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/items/7", "raw_path": b"/api/items/7", "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"bench")], "server": ("bench", 80), "client": ("127.0.0.1", 1),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def run(requests, repeat):
+    apps = {"bare": build_app(False), "instrumented": build_app(True)}
+    best = dict.fromkeys(apps, float("inf"))
+    for app in apps.values():
+        asyncio.run(serve(app, 200))  # warm up routing and the app's middleware stack
+    # Alternate between the apps so drift in machine load affects both alike
+    for _ in range(repeat):
+        for name, app in apps.items():
+            best[name] = min(best[name], asyncio.run(serve(app, requests)))
+    results = {name: seconds / requests for name, seconds in best.items()}
+    observe = min(_time_observe(requests) for _ in range(repeat))
+    return results, observe
+
+
+def _time_observe(number):
+    start = time.perf_counter()
+    for _ in range(number):
+        HTTP_REQUEST_DURATION.observe(0.003, "GET", "/bench", "200")
+    return (time.perf_counter() - start) / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000, help="requests per timing run")
+    parser.add_argument("--repeat", type=int, default=7, help="timing runs (best is reported)")
+    args = parser.parse_args(argv)
+
+    results, observe = run(args.requests, args.repeat)
+    for name, seconds in results.items():
+        print(f"{name:13} {seconds * 1e6:8.1f} us/request")
+    overhead = results["instrumented"] - results["bare"]
+    print(f"overhead      {overhead * 1e6:8.1f} us/request ({overhead / results['bare']:.1%})")
+    print(f"observe()     {observe * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
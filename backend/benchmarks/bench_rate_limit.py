@@ -0,0 +1,59 @@
+"""Micro-benchmark: cost of a rate limit check per request.
+
+Times RateLimiter.check (IP and email bucket) against the in-process
+MemoryBackend for a hot client hitting its own bucket repeatedly and for
+a stream of distinct clients that keeps the LRU evicting.
+
+    python benchmarks/bench_rate_limit.py [--number 200000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rate_limit import MemoryBackend, RateLimited, RateLimiter
+
+# Generous limits, so the timed path is the common "allowed" one
+RATE = (1e9, 1e9)
+
+
+async def time_checks(limiter, number, distinct):
+    emails = [f"user{i}@example.com" for i in range(min(number, distinct))]
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(len(emails))]
+    count = len(emails)
+    start = time.perf_counter()
+    for i in range(number):
+        try:
+            await limiter.check(ips[i % count], emails[i % count])
+        except RateLimited:
+            pass
+    return (time.perf_counter() - start) / number
+
+
+def run(number, repeat, max_keys):
+    results = {}
+    for label, distinct in (("hot client", 1), ("distinct clients", number)):
+        best = float("inf")
+        for _ in range(repeat):
+            limiter = RateLimiter("bench", MemoryBackend(max_keys=max_keys), ip_rate=RATE, email_rate=RATE)
+            best = min(best, asyncio.run(time_checks(limiter, number, distinct)))
+        results[label] = best
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000, help="checks per timing run")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs (best is reported)")
+    parser.add_argument("--max-keys", type=int, default=100000, help="MemoryBackend capacity")
+    args = parser.parse_args(argv)
+
+    for label, seconds in run(args.number, args.repeat, args.max_keys).items():
+        print(f"{label:17} {seconds * 1e6:6.2f} us/check")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark: /api/courses/search index at catalog scale.
+
+Builds a synthetic catalog (default 10,000 modules) from the vocabulary of
+courses.json plus generated words, then reports per-query latency for
+exact, multi-word, prefix and misspelled queries, the full build time and
+the time to rebuild incrementally after changing 1% of the catalog.
+
+    python benchmarks/bench_search.py [--courses 10000]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from course_search import SearchIndex, tokenize
+
+QUERIES = {
+    "single word": "selenium",
+    "multi word": "api rest postman",
+    "prefix": "autom",
+    "misspelled": "perfomance testng",
+    "no match": "xylophone",
+}
+
+
+def synthetic_catalog(size, seed=42):
+    rng = random.Random(seed)
+    seed_courses = json.loads((BACKEND_DIR / "courses.json").read_text())
+    words = sorted({t for c in seed_courses for f in ("title", "description") for t in tokenize(c[f])})
+    words += ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10))) for _ in range(5000)]
+    features = sorted({f for c in seed_courses for f in c["features"]})
+    return [
+        {
+            "id": str(i),
+            "title": " ".join(rng.choices(words, k=rng.randint(2, 5))).title(),
+            "description": " ".join(rng.choices(words, k=rng.randint(10, 25))),
+            "duration": f"{rng.randint(2, 12)} weeks",
+            "level": rng.choice(["Beginner", "Intermediate", "Advanced"]),
+            "features": rng.sample(features, 4),
+        }
+        for i in range(size)
+    ]
+
+
+def latency(index, query, number):
+    samples = []
+    for _ in range(number):
+        start = time.perf_counter()
+        index.search(query, 10)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=10000, help="synthetic catalog size")
+    parser.add_argument("--number", type=int, default=500, help="searches per query")
+    args = parser.parse_args(argv)
+
+    courses = synthetic_catalog(args.courses)
+    start = time.perf_counter()
+    index = SearchIndex.build(courses)
+    print(f"full build       {(time.perf_counter() - start) * 1000:8.1f} ms "
+          f"({len(index)} courses, {len(index.vocabulary)} terms)")
+
+    changed = list(courses)
+    rng = random.Random(7)
+    for position in rng.sample(range(len(changed)), max(1, len(changed) // 100)):
+        changed[position] = dict(changed[position], title=changed[position]["title"] + " Revised")
+    start = time.perf_counter()
+    SearchIndex.build(changed, previous=index)
+    print(f"1% incremental   {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    print(f"{'query':13} {'p50 us':>8} {'p99 us':>8}")
+    for label, query in QUERIES.items():
+        p50, p99 = latency(index, query, args.number)
+        print(f"{label:13} {p50 * 1e6:8.1f} {p99 * 1e6:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark: GET /api/status response cost at 1,000 and 10,000 documents.
+
+Serves the same page of status check documents, as MongoDB returns them,
+through three versions of the list route, in-process over ASGI:
+
+* before:  ``response_model=List[StatusCheck]`` with the standard library
+  JSONResponse (validation, jsonable_encoder and json.dumps)
+* orjson:  the same route with FastJSONResponse
+* trusted: FastJSONResponse returned directly via ``trusted_response``,
+  as the API now does
+
+The database is left out so only the framework's share of the request is
+timed; benchmarks/load_test.py measures the route end to end.
+
+    python benchmarks/bench_serialization.py [--sizes 1000 10000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from models import StatusCheck
+from serialization import FastJSONResponse, trusted_response
+
+
+def status_documents(count):
+    start = datetime(2024, 1, 1)
+    return [
+        {"id": str(uuid.uuid4()), "client_name": f"client-{i % 50}",
+         "timestamp": start + timedelta(seconds=i, milliseconds=i % 1000)}
+        for i in range(count)
+    ]
+
+
+def build_app(variant, documents):
+    app = FastAPI(default_response_class=JSONResponse if variant == "before" else FastJSONResponse)
+
+    if variant == "trusted":
+        @app.get("/api/status", response_model=List[StatusCheck])
+        async def get_status_checks():
+            return trusted_response(documents)
+    else:
+        @app.get("/api/status", response_model=List[StatusCheck])
+        async def get_status_checks():
+            return documents
+
+    return app
+
+
+async def serve(app, requests):
+    """Drive the ASGI app directly; returns (seconds, response body)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/status", "raw_path": b"/api/status", "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"bench")], "server": ("bench", 80), "client": ("127.0.0.1", 1),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        body.clear()
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start, b"".join(body)
+
+
+def run(size, requests, repeat):
+    documents = status_documents(size)
+    apps = {variant: build_app(variant, documents) for variant in ("before", "orjson", "trusted")}
+    bodies = {}
+    for name, app in apps.items():
+        bodies[name] = asyncio.run(serve(app, 1))[1]
+    if len(set(bodies.values())) != 1:
+        raise SystemExit(f"{size} documents: the variants returned different bodies")
+    best = dict.fromkeys(apps, float("inf"))
+    # Alternate between the apps so drift in machine load affects both alike
+    for _ in range(repeat):
+        for name, app in apps.items():
+            best[name] = min(best[name], asyncio.run(serve(app, requests))[0])
+    return {name: seconds / requests for name, seconds in best.items()}, len(bodies["before"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="documents per response")
+    parser.add_argument("--requests", type=int, default=20, help="requests per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per variant (best is reported)")
+    args = parser.parse_args(argv)
+
+    print(f"{'documents':>9} {'variant':8} {'ms/request':>11} {'speedup':>8}")
+    for size in args.sizes:
+        results, body_size = run(size, max(1, args.requests * 1000 // size), args.repeat)
+        for name, seconds in results.items():
+            print(f"{size:9} {name:8} {seconds * 1000:11.2f} {results['before'] / seconds:7.1f}x")
+        print(f"{'':9} body {body_size / 1024:.0f} KiB, identical across variants")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark: batch insert and keyset scan throughput of each storage backend.
+
+Inserts ``--documents`` status checks in batches of ``--batch-size`` and
+streams them back with ``iterate``. MongoDB is included when ``--mongo-url``
+is given (a throwaway database is created and dropped). ``--min-inserts``
+and ``--min-reads`` turn the run into a check that exits non-zero when a
+backend falls below them.
+
+    python benchmarks/bench_storage.py [--documents 5000] [--min-inserts 2000 --min-reads 5000]
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from storage import MemoryStorage, MongoStorage, SQLiteStorage
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def status_check(i):
+    return {"id": f"status-{i:07d}", "client_name": f"client {i}",
+            "timestamp": START + timedelta(seconds=i, milliseconds=i % 1000)}
+
+
+async def measure(storage, documents, batch_size):
+    start = time.perf_counter()
+    for offset in range(0, len(documents), batch_size):
+        failed = await storage.status_checks.insert_many(documents[offset:offset + batch_size])
+        if failed:
+            raise RuntimeError(f"{len(failed)} documents were not inserted")
+    inserted = time.perf_counter() - start
+    start = time.perf_counter()
+    count = 0
+    async for _ in storage.status_checks.iterate(batch_size=batch_size):
+        count += 1
+    scanned = time.perf_counter() - start
+    if count != len(documents):
+        raise RuntimeError(f"Scanned {count} of {len(documents)} documents")
+    return len(documents) / inserted, count / scanned
+
+
+async def run_backend(backend, documents, batch_size, directory, mongo_url=None):
+    if backend == "mongo":
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        from indexes import ensure_indexes
+
+        client = AsyncIOMotorClient(mongo_url)
+        name = f"storage_bench_{uuid.uuid4().hex[:12]}"
+        await ensure_indexes(client[name])
+        try:
+            return await measure(MongoStorage(None, client[name]), documents, batch_size)
+        finally:
+            await client.drop_database(name)
+            client.close()
+    storage = SQLiteStorage(Path(directory) / f"{uuid.uuid4().hex}.sqlite3") if backend == "sqlite" else MemoryStorage()
+    await storage.open()
+    try:
+        return await measure(storage, documents, batch_size)
+    finally:
+        await storage.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=5000, help="documents inserted and scanned per backend")
+    parser.add_argument("--batch-size", type=int, default=500, help="insert_many and iterate batch size")
+    parser.add_argument("--mongo-url", help="also measure MongoDB at this URL")
+    parser.add_argument("--min-inserts", type=float, help="fail below this many inserts per second")
+    parser.add_argument("--min-reads", type=float, help="fail below this many reads per second")
+    args = parser.parse_args(argv)
+
+    documents = [status_check(i) for i in range(args.documents)]
+    backends = ["memory", "sqlite"] + (["mongo"] if args.mongo_url else [])
+    too_slow = []
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in backends:
+            inserts, reads = asyncio.run(run_backend(backend, documents, args.batch_size, directory, args.mongo_url))
+            print(f"{backend:7} {inserts:12,.0f} inserts/s {reads:12,.0f} reads/s")
+            if (args.min_inserts and inserts < args.min_inserts) or (args.min_reads and reads < args.min_reads):
+                too_slow.append(backend)
+    if too_slow:
+        print(f"Below the required throughput: {', '.join(too_slow)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Micro-benchmark: CourseEnrollmentForm validation, legacy vs current.
+
+The legacy model is a copy of the pre-v2 definition (``@validator`` methods
+calling ``re`` with string patterns and rebuilding the allowed level list).
+
+    python benchmarks/bench_validation.py [--number 20000]
+"""
+import argparse
+import re
+import sys
+import timeit
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydantic import BaseModel, EmailStr, Field, ValidationError
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from pydantic import validator
+
+    class LegacyCourseEnrollmentForm(BaseModel):
+        name: str
+        email: EmailStr
+        country: str
+        phone_number: str
+        experience_level: str = Field(..., description="Beginner, Intermediate, or Advanced")
+        course_interest: str = Field(..., description="Which SDET course tracks interest them")
+
+        @validator('name')
+        def validate_name(cls, v):
+            if not v or len(v.strip()) < 2:
+                raise ValueError('Name must be at least 2 characters')
+            if len(v) > 100:
+                raise ValueError('Name must be less than 100 characters')
+            if re.search(r'[<>"\']', v):
+                raise ValueError('Name contains invalid characters')
+            return v.strip()
+
+        @validator('country')
+        def validate_country(cls, v):
+            if not v or len(v.strip()) < 2:
+                raise ValueError('Country must be at least 2 characters')
+            if len(v) > 50:
+                raise ValueError('Country must be less than 50 characters')
+            return v.strip()
+
+        @validator('phone_number')
+        def validate_phone(cls, v):
+            cleaned = re.sub(r'[\s\-\(\)]', '', v)
+            if not re.match(r'^\+?[1-9]\d{6,14}$', cleaned):
+                raise ValueError('Invalid phone number format')
+            return cleaned
+
+        @validator('experience_level')
+        def validate_experience(cls, v):
+            allowed_levels = ['Beginner', 'Intermediate', 'Advanced']
+            if v not in allowed_levels:
+                raise ValueError(f'Experience level must be one of: {", ".join(allowed_levels)}')
+            return v
+
+        class Config:
+            str_strip_whitespace = True
+            validate_assignment = True
+
+from models import CourseEnrollmentForm
+
+VALID = {
+    "name": "  John Doe ",
+    "email": "john.doe@example.com",
+    "country": "United States",
+    "phone_number": "+1 (234) 567-890",
+    "experience_level": "Intermediate",
+    "course_interest": "Selenium WebDriver Fundamentals",
+}
+INVALID = {
+    "name": "J<",
+    "email": "john.doe@example.com",
+    "country": "U",
+    "phone_number": "123",
+    "experience_level": "Expert",
+    "course_interest": "Selenium WebDriver Fundamentals",
+}
+
+
+def validate(model, payload):
+    try:
+        model.model_validate(payload)
+    except ValidationError:
+        pass
+
+
+def run(number, repeat):
+    results = []
+    for label, payload in (("valid", VALID), ("invalid", INVALID)):
+        for name, model in (("legacy", LegacyCourseEnrollmentForm), ("current", CourseEnrollmentForm)):
+            best = min(timeit.repeat(lambda: validate(model, payload), number=number, repeat=repeat))
+            results.append((label, name, number / best))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="validations per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs (best is reported)")
+    args = parser.parse_args(argv)
+
+    results = run(args.number, args.repeat)
+    print(f"{'payload':8} {'model':8} {'validations/s':>14}")
+    for label, name, rate in results:
+        print(f"{label:8} {name:8} {rate:14,.0f}")
+    for label in ("valid", "invalid"):
+        legacy, current = [rate for l, _, rate in results if l == label]
+        print(f"{label}: {current / legacy:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
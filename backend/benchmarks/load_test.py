@@ -0,0 +1,224 @@
+"""Load test: throughput and latency percentiles for every public API route.
+
+Boots the app in-process (startup hooks, background workers and all) and
+drives it over ASGI with a configurable number of concurrent async
+clients. By default MongoDB is replaced by mongomock-motor so runs are
+reproducible on any machine; pass --mongo-url to measure a real server, or
+--storage sqlite/memory to run on the embedded storage engines.
+
+    python benchmarks/load_test.py --requests 2000 --concurrency 32 -o results.json
+    python benchmarks/load_test.py --compare baseline.json
+
+Results are written as JSON (with the git commit they were taken at) so
+runs from different commits can be compared with --compare.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+ENROLLMENT = {
+    "name": "Load Tester",
+    "country": "India",
+    "phone_number": "+91 98765 43210",
+    "experience_level": "Intermediate",
+    "course_interest": "Selenium WebDriver Fundamentals",
+}
+CONTACT = {"name": "Load Tester", "message": "Load test message, please ignore."}
+FILTERS = [
+    {"level": "Beginner"},
+    {"level": "advanced"},
+    {"min_weeks": "4", "max_weeks": "6"},
+    {"feature": "REST API testing"},
+]
+
+
+def scenarios():
+    """Route name -> factory returning (method, path, params, json) for request n"""
+    return {
+        "courses": lambda n: ("GET", "/api/courses", None, None),
+        "courses_filter": lambda n: ("GET", "/api/courses/filter", FILTERS[n % len(FILTERS)], None),
+        # Unique addresses, otherwise the dedup window answers from cache
+        "enroll": lambda n: ("POST", "/api/enroll", None, dict(ENROLLMENT, email=f"load{n}@example.com")),
+        "contact": lambda n: ("POST", "/api/contact", None, dict(CONTACT, email=f"load{n}@example.com")),
+        "status_create": lambda n: ("POST", "/api/status", None, {"client_name": f"load-{n}"}),
+        "status_list": lambda n: ("GET", "/api/status", {"limit": "50"}, None),
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(fraction * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, statuses, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 0.50)),
+            "p95": ms(percentile(latencies, 0.95)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "max": ms(latencies[-1] if latencies else None),
+        },
+    }
+
+
+async def run_scenario(http, make_request, total, concurrency):
+    counter = itertools.count()
+    latencies = []
+    statuses = Counter()
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (n := next(counter)) < total:
+            method, path, params, body = make_request(n)
+            start = time.perf_counter()
+            try:
+                response = await http.request(method, path, params=params, json=body)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - start)
+
+
+def load_app(mongo_url, storage="mongo"):
+    """Import the server with MongoDB pointed at mongomock or a real URL"""
+    os.environ["STORAGE_BACKEND"] = storage
+    if storage == "sqlite":
+        os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(prefix="load_test_"), "load_test.sqlite3"))
+    os.environ["MONGO_URL"] = mongo_url or "mongodb://mongomock"
+    os.environ.setdefault("DB_NAME", f"load_test_{os.getpid()}")
+    # Every simulated client shares one address; measure the app, not the limiter
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    if not mongo_url:
+        import motor.motor_asyncio
+        from mongomock_motor import AsyncMongoMockClient
+
+        # database.py imports AsyncIOMotorClient by name, so patch it before server.py loads database.py
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+    import server
+    return server
+
+
+async def run(args):
+    import httpx
+
+    server = load_app(args.mongo_url, args.storage)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    selected = scenarios()
+    if args.routes:
+        unknown = set(args.routes) - set(selected)
+        if unknown:
+            raise SystemExit(f"Unknown routes: {', '.join(sorted(unknown))}; expected: {', '.join(selected)}")
+        selected = {name: selected[name] for name in args.routes}
+
+    results = {}
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as http:
+            for name, make_request in selected.items():
+                if args.warmup:
+                    await run_scenario(http, lambda n: make_request(-1 - n), args.warmup, args.concurrency)
+                results[name] = await run_scenario(http, make_request, args.requests, args.concurrency)
+        if args.mongo_url and args.drop and server.mongo is not None:
+            await server.mongo.client.drop_database(os.environ["DB_NAME"])
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'route':15} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, result in results.items():
+        latency = result["latency_ms"]
+        line = (f"{name:15} {result['throughput_rps'] or 0:9.1f} {latency['p50'] or 0:8.2f} "
+                f"{latency['p95'] or 0:8.2f} {latency['p99'] or 0:8.2f} {result['errors']:7}")
+        previous = (baseline or {}).get(name)
+        if previous and previous["throughput_rps"] and previous["latency_ms"]["p95"]:
+            rps = result["throughput_rps"] / previous["throughput_rps"] - 1
+            p95 = latency["p95"] / previous["latency_ms"]["p95"] - 1
+            line += f"   req/s {rps:+.1%}  p95 {p95:+.1%}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients per route")
+    parser.add_argument("--warmup", type=int, default=50, help="untimed requests per route before measuring")
+    parser.add_argument("--routes", nargs="+", help=f"subset of: {', '.join(scenarios())}")
+    parser.add_argument("--mongo-url", help="benchmark against this MongoDB instead of mongomock-motor")
+    parser.add_argument("--storage", choices=("mongo", "sqlite", "memory"), default="mongo",
+                        help="storage backend for submissions and status checks (see storage.py)")
+    parser.add_argument("--drop", action="store_true", help="drop the benchmark database afterwards (--mongo-url only)")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "backend": args.storage if args.storage != "mongo" else "mongodb" if args.mongo_url else "mongomock-motor",
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"Comparing against {previous.get('commit') or args.compare}")
+        baseline = previous["results"]
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
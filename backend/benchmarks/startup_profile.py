@@ -0,0 +1,150 @@
+"""Cold-start report: import time per module and time to the first ready request.
+
+Each measurement runs in a fresh interpreter, like a newly spawned worker:
+
+* import time of ``server`` broken down by the modules it imports directly
+  (from ``python -X importtime``)
+* time from process spawn until ``/api/ready`` first answers 200, with the
+  app served by uvicorn and MongoDB replaced by mongomock-motor unless
+  --mongo-url is given
+
+Exits with status 1 when either number is over its budget, so it can run
+as a CI check:
+
+    python benchmarks/startup_profile.py --import-budget-ms 1500 --ready-budget-ms 3000 -o startup.json
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_BUDGET_MS = 1500
+READY_BUDGET_MS = 3000
+
+SERVE = """
+import sys
+if not sys.argv[2]:
+    import motor.motor_asyncio
+    from mongomock_motor import AsyncMongoMockClient
+    motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+import uvicorn
+import server
+uvicorn.run(server.app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+
+def child_env(mongo_url=None):
+    env = dict(os.environ)
+    env["MONGO_URL"] = mongo_url or env.get("MONGO_URL") or "mongodb://127.0.0.1:27017"
+    env.setdefault("DB_NAME", "startup_profile")
+    return env
+
+
+def parse_importtime(stderr):
+    """-X importtime output -> [(depth, name, self_us, cumulative_us)] in import order"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        self_us, cumulative_us, name = fields
+        # One space after the bar, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def import_profile(module="server", mongo_url=None):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=BACKEND_DIR,
+                            env=child_env(mongo_url), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    entries = parse_importtime(result.stderr)
+    total = next(cumulative for depth, name, _, cumulative in reversed(entries) if name == module and depth == 0)
+    # Entries are printed when an import finishes, so the direct imports of
+    # ``module`` are the depth-1 entries after the last top-level one before it
+    start = max((i for i, (depth, name, _, _) in enumerate(entries) if depth == 0 and name != module), default=-1)
+    direct = {name: cumulative for depth, name, _, cumulative in entries[start + 1:] if depth == 1}
+    return total, dict(sorted(direct.items(), key=lambda item: -item[1]))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_ready(mongo_url=None, timeout=30.0):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api/ready"
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", SERVE, str(port), mongo_url or ""], cwd=BACKEND_DIR,
+                               env=child_env(mongo_url), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited during startup:\n{process.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(0.01)
+        raise RuntimeError(f"/api/ready did not answer 200 within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--ready-budget-ms", type=float, default=READY_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="measurements per number (best is reported)")
+    parser.add_argument("--top", type=int, default=15, help="direct imports to list")
+    parser.add_argument("--mongo-url", help="start against this MongoDB instead of mongomock-motor")
+    parser.add_argument("-o", "--output", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    profiles = [import_profile(mongo_url=args.mongo_url) for _ in range(args.runs)]
+    import_us, modules = min(profiles, key=lambda profile: profile[0])
+    ready_s = min(time_to_ready(args.mongo_url) for _ in range(args.runs))
+
+    print(f"{'module':30} {'cumulative ms':>14}")
+    for name, cumulative in list(modules.items())[:args.top]:
+        print(f"{name:30} {cumulative / 1000:14.1f}")
+    import_ms, ready_ms = import_us / 1000, ready_s * 1000
+    print(f"\nimport server    {import_ms:8.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+    print(f"first ready      {ready_ms:8.1f} ms (budget {args.ready_budget_ms:.0f} ms)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "import_ms": round(import_ms, 1),
+                "ready_ms": round(ready_ms, 1),
+                "budgets_ms": {"import": args.import_budget_ms, "ready": args.ready_budget_ms},
+                "modules_ms": {name: round(cumulative / 1000, 1) for name, cumulative in modules.items()},
+            }, f, indent=2)
+            f.write("\n")
+
+    over = [label for label, value, budget in (("import", import_ms, args.import_budget_ms),
+                                               ("ready", ready_ms, args.ready_budget_ms)) if value > budget]
+    if over:
+        print(f"Over budget: {', '.join(over)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Streaming bulk enrollment import from CSV or NDJSON uploads."""
+import codecs
+import csv
+import io
+import json
+
+from pydantic import ValidationError
+from pymongo.errors import DuplicateKeyError
+
+from models import CourseEnrollmentForm
+
+FORMATS = ("csv", "ndjson")
+
+
+class BulkImportError(Exception):
+    """Raised when the upload itself (not a single row) cannot be processed"""
+
+
+def normalize_header(name):
+    return "_".join(name.strip().lower().split())
+
+
+def split_records(text, quoted):
+    """Split off the complete lines at the start of ``text``.
+
+    Returns (complete, remainder). For CSV (``quoted``) a newline only ends
+    a record when it is outside double quotes, so quoted fields may span
+    lines and chunk boundaries.
+    """
+    if not quoted:
+        cut = text.rfind("\n") + 1
+        return text[:cut], text[cut:]
+    cut = 0
+    position = 0
+    quotes = 0
+    for line in text.split("\n")[:-1]:
+        position += len(line) + 1
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            cut = position
+    return text[:cut], text[cut:]
+
+
+class BulkImportReport:
+    """Row counts plus the first ``max_errors`` per-row errors"""
+
+    def __init__(self, max_errors=1000):
+        self.max_errors = max_errors
+        self.total_rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        """Record a failed row; ``line`` is the upload line it starts on"""
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "errors": errors})
+
+    def to_dict(self):
+        return {
+            "status": "success" if not self.failed else "partial",
+            "total_rows": self.total_rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+class EnrollmentImporter:
+    """Parses, validates and writes an upload one chunk at a time.
+
+    Only the current partial record, the pending insert chunk and the
+    capped error list are held in memory, whatever the upload size.
+    ``make_document`` turns a validated form into the stored document (id,
+    submission_time, dedup key) so bulk rows look like single submissions.
+    ``on_chunk_written`` is called with the documents of each written chunk.
+    Chunks are inserted through the ``enrollments`` repository (storage.py).
+    """
+
+    def __init__(self, enrollments, fmt, make_document, chunk_size=500, max_errors=1000, max_record_chars=1_000_000,
+                 on_chunk_written=None):
+        if fmt not in FORMATS:
+            raise BulkImportError(f"Unsupported format '{fmt}', expected one of: {', '.join(FORMATS)}")
+        self.enrollments = enrollments
+        self.fmt = fmt
+        self.make_document = make_document
+        self.chunk_size = chunk_size
+        self.max_record_chars = max_record_chars
+        self.on_chunk_written = on_chunk_written
+        self.report = BulkImportReport(max_errors)
+        self._header = None
+        self._pending = []
+        self._line = 0
+
+    async def run(self, byte_chunks):
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="strict")
+        remainder = ""
+        try:
+            async for chunk in byte_chunks:
+                text = remainder + decoder.decode(chunk)
+                complete, remainder = split_records(text, quoted=self.fmt == "csv")
+                if complete:
+                    await self._parse(complete)
+                if len(remainder) > self.max_record_chars:
+                    raise BulkImportError(f"Record starting after line {self._line} exceeds {self.max_record_chars} characters")
+            remainder += decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise BulkImportError("Upload is not valid UTF-8")
+        if remainder.strip():
+            await self._parse(remainder if remainder.endswith("\n") else remainder + "\n")
+        await self._flush()
+        return self.report
+
+    async def _parse(self, text):
+        if self.fmt == "csv":
+            # line_num counts physical lines, so a quoted field spanning lines
+            # does not throw off the numbers of the records after it
+            lines_before = self._line
+            reader = csv.reader(io.StringIO(text, newline=""))
+            for values in reader:
+                record_line = self._line + 1
+                self._line = lines_before + reader.line_num
+                if not values or not any(v.strip() for v in values):
+                    continue
+                if self._header is None:
+                    self._header = [normalize_header(v) for v in values]
+                    continue
+                await self._add_row(dict(zip(self._header, values)), record_line)
+        else:
+            # Split on "\n" only, like split_records: str.splitlines() would also
+            # break at separators such as U+2028 inside JSON strings
+            for line in text.split("\n")[:-1]:
+                self._line += 1
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    self.report.total_rows += 1
+                    self.report.add_error(self._line, [{"field": None, "message": f"Invalid JSON: {e}"}])
+                    continue
+                if not isinstance(row, dict):
+                    self.report.total_rows += 1
+                    self.report.add_error(self._line, [{"field": None, "message": "Each line must be a JSON object"}])
+                    continue
+                await self._add_row(row, self._line)
+
+    async def _add_row(self, row, line):
+        self.report.total_rows += 1
+        try:
+            form = CourseEnrollmentForm.model_validate(row)
+        except ValidationError as e:
+            self.report.add_error(line, [
+                {"field": ".".join(str(p) for p in err["loc"]) or None, "message": err["msg"]}
+                for err in e.errors(include_url=False, include_input=False)
+            ])
+            return
+        self._pending.append((line, self.make_document(form)))
+        if len(self._pending) >= self.chunk_size:
+            await self._flush()
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        errors = await self.enrollments.insert_many([doc for _, doc in pending])
+        failed = {
+            index: "Duplicate enrollment" if isinstance(error, DuplicateKeyError) else str(error) or "Write failed"
+            for index, error in errors.items()
+        }
+        written = []
+        for index, (line, doc) in enumerate(pending):
+            if index in failed:
+                self.report.add_error(line, [{"field": None, "message": failed[index]}])
+            else:
+                written.append(doc)
+        self.report.inserted += len(written)
+        if self.on_chunk_written is not None and written:
+            self.on_chunk_written(written)
+
@@ -0,0 +1,142 @@
+"""Course catalog loaded from a JSON or YAML file and reloaded while running.
+
+The catalog is served from an immutable ``CourseIndex`` snapshot. A
+background task polls the file and, when it changes, builds a complete new
+snapshot off the request path and publishes it with a single attribute
+assignment. Request handlers read ``catalog.index`` once and use that
+object for the whole request, so they never see a half-built catalog and
+never take a lock. A file that fails to parse or validate is logged and
+the previous snapshot stays in service.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from course_index import CourseIndex
+
+REQUIRED_FIELDS = ("id", "title", "description", "duration", "level")
+
+
+class CatalogError(Exception):
+    """Raised when a catalog file cannot be read or is not a valid catalog"""
+
+
+def parse_catalog(text, suffix):
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise CatalogError("YAML catalogs require the PyYAML package")
+        try:
+            courses = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise CatalogError(f"Invalid YAML: {e}")
+    else:
+        try:
+            courses = json.loads(text)
+        except ValueError as e:
+            raise CatalogError(f"Invalid JSON: {e}")
+    validate_catalog(courses)
+    return courses
+
+
+def validate_catalog(courses):
+    if not isinstance(courses, list):
+        raise CatalogError("Catalog must be a list of course modules")
+    seen = set()
+    for position, course in enumerate(courses):
+        if not isinstance(course, dict):
+            raise CatalogError(f"Course #{position + 1} is not an object")
+        missing = [field for field in REQUIRED_FIELDS if not isinstance(course.get(field), str)]
+        if missing:
+            raise CatalogError(f"Course #{position + 1} is missing {', '.join(missing)}")
+        features = course.get("features", [])
+        if not isinstance(features, list) or not all(isinstance(f, str) for f in features):
+            raise CatalogError(f"Course {course['id']}: features must be a list of strings")
+        if course["id"] in seen:
+            raise CatalogError(f"Duplicate course id {course['id']}")
+        seen.add(course["id"])
+
+
+def load_catalog(path):
+    path = Path(path)
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError as e:
+        raise CatalogError(f"Cannot read {path}: {e.strerror}")
+    return parse_catalog(text, path.suffix.lower())
+
+
+class CatalogReloader:
+    """Holds the current catalog snapshot and swaps in new ones as the file changes"""
+
+    def __init__(self, path, poll_interval=10.0):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self.index = None
+        self.version = None
+        self.loaded_at = None
+        self.last_error = None
+        self._task = None
+
+    def _file_version(self):
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        """Load the file unconditionally; raises CatalogError if it is invalid"""
+        try:
+            version = self._file_version()
+        except OSError as e:
+            raise CatalogError(f"Cannot read {self.path}: {e.strerror}")
+        index = CourseIndex(load_catalog(self.path), previous=self.index)
+        # Publish the finished snapshot in one assignment
+        self.index = index
+        self.version = version
+        self.loaded_at = datetime.utcnow()
+        self.last_error = None
+        return index
+
+    async def reload_if_changed(self):
+        """Rebuild the snapshot if the file changed; returns True when swapped"""
+        try:
+            if self._file_version() == self.version:
+                return False
+            # Parsing and pre-encoding the bodies happen in a worker thread
+            await asyncio.to_thread(self.load)
+            logging.info(f"Course catalog reloaded from {self.path} ({len(self.index.courses)} courses)")
+            return True
+        except (OSError, CatalogError) as e:
+            message = str(e)
+            if message != self.last_error:
+                logging.error(f"Course catalog reload failed, keeping the previous catalog: {message}")
+            self.last_error = message
+            return False
+
+    def status(self):
+        return {
+            "path": str(self.path),
+            "courses": len(self.index.courses) if self.index else 0,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "last_error": self.last_error,
+        }
+
+    def start(self):
+        if self.poll_interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run(), name="catalog-reloader")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.reload_if_changed()
@@ -0,0 +1,172 @@
+"""Response compression negotiated from Accept-Encoding.
+
+``CompressionMiddleware`` compresses JSON, NDJSON and text responses with
+brotli when the client accepts it and gzip otherwise:
+
+* bodies under ``minimum_size`` go out as they are, since the headers would
+  eat the saving
+* responses that already carry a Content-Encoding (the pre-compressed
+  catalog bodies from http_cache.py) and HEAD, 204 and 304 responses pass
+  through untouched
+* streamed responses (NDJSON pages, exports) are compressed chunk by chunk
+* responses marked cacheable (an ETag, or Cache-Control public/max-age)
+  are compressed once at a higher level and the result is reused for every
+  identical body, keyed by a hash of the body, in a byte-bounded LRU
+
+Strong ETags get a ``-gzip``/``-br`` suffix on compressed variants, the same
+convention as ``PreparedBody``.
+"""
+import hashlib
+import zlib
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from http_cache import brotli, parse_accept_encoding
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "application/xml",
+                      "image/svg+xml", "text/")
+
+
+def _compressible(content_type):
+    return content_type.split(";", 1)[0].strip().lower().startswith(COMPRESSIBLE_TYPES)
+
+
+def _cacheable(headers):
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control or "private" in cache_control:
+        return False
+    return "etag" in headers or "public" in cache_control or "max-age" in cache_control
+
+
+class _Compressor:
+    def __init__(self, coding, level):
+        if coding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+            self.compress, self.finish = self._compressor.process, self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+            self.compress, self.finish = self._compressor.compress, self._compressor.flush
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (body hash, coding), bounded in bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=1024, gzip_level=6, brotli_quality=4, cached_gzip_level=9,
+                 cached_brotli_quality=9, cache_bytes=16 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+        self.cached_levels = {"gzip": cached_gzip_level, "br": cached_brotli_quality}
+        self.cache = CompressedBodyCache(cache_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accepted = parse_accept_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        coding = "br" if brotli is not None and "br" in accepted else "gzip" if "gzip" in accepted else None
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(self, coding, send))
+
+    def compress(self, body, coding, cacheable):
+        if not cacheable:
+            compressor = _Compressor(coding, self.levels[coding])
+            return compressor.compress(body) + compressor.finish()
+        key = (hashlib.blake2b(body, digest_size=16).digest(), coding)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressor = _Compressor(coding, self.cached_levels[coding])
+            compressed = compressor.compress(body) + compressor.finish()
+            self.cache.put(key, compressed)
+        return compressed
+
+
+class _CompressingSend:
+    """The ``send`` callable handed to the app for one response"""
+
+    def __init__(self, middleware, coding, send):
+        self.middleware = middleware
+        self.coding = coding
+        self.send = send
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _set_encoding(self, headers):
+        headers["Content-Encoding"] = self.coding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/") and etag.endswith('"'):
+            headers["ETag"] = f'{etag[:-1]}-{self.coding}"'
+
+    async def __call__(self, message):
+        if self.passthrough:
+            await self.send(message)
+            return
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message.get("headers", []))
+            if message["status"] in (204, 304) or "content-encoding" in headers \
+                    or not _compressible(headers.get("content-type", "")) \
+                    or "no-transform" in headers.get("cache-control", ""):
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None and self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(scope=start)
+            if not more_body:
+                # The whole body is here; compress it in one go, or not at all
+                if len(body) >= self.middleware.minimum_size:
+                    body = self.middleware.compress(body, self.coding, _cacheable(headers))
+                    self._set_encoding(headers)
+                    headers["Content-Length"] = str(len(body))
+                self.passthrough = True
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            # Streamed: the final length is unknown, so drop Content-Length
+            self.compressor = _Compressor(self.coding, self.middleware.levels[self.coding])
+            self._set_encoding(headers)
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self.send(start)
+
+        compressed = self.compressor.compress(body)
+        if not more_body:
+            compressed += self.compressor.finish()
+            await self.send({"type": "http.response.body", "body": compressed})
+        elif compressed:
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": True})
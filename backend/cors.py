@@ -0,0 +1,48 @@
+"""CORS handling with a precomputed allowlist and memoized preflight answers.
+
+starlette's ``CORSMiddleware`` checks the request origin against a list and
+rebuilds the preflight response (header parsing, allowlist checks, header
+dict) on every OPTIONS request. This subclass keeps the allowlists as
+frozensets and remembers the status, body and headers of each distinct
+preflight (origin, method, requested headers) in a bounded LRU, building
+only a fresh Response object per request. ``max_age`` sets
+Access-Control-Max-Age so browsers skip repeated preflights altogether.
+"""
+from collections import OrderedDict
+
+from starlette.middleware.cors import CORSMiddleware as StarletteCORSMiddleware
+from starlette.responses import Response
+
+
+def parse_origins(value):
+    """CORS_ORIGINS ("https://a.example, https://b.example" or "*") -> frozenset"""
+    return frozenset(origin.strip() for origin in value.split(",") if origin.strip())
+
+
+class CORSMiddleware(StarletteCORSMiddleware):
+    def __init__(self, app, max_age=7200, preflight_cache_size=1024, **options):
+        super().__init__(app, max_age=max_age, **options)
+        self.allow_origins = frozenset(self.allow_origins)
+        self.allow_methods = frozenset(self.allow_methods)
+        self.allow_headers = frozenset(self.allow_headers)
+        self.preflight_cache_size = preflight_cache_size
+        self._preflights = OrderedDict()
+
+    def preflight_response(self, request_headers):
+        key = (request_headers["origin"], request_headers["access-control-request-method"],
+               request_headers.get("access-control-request-headers"))
+        cached = self._preflights.get(key)
+        if cached is None:
+            response = super().preflight_response(request_headers)
+            cached = (response.status_code, response.body, tuple(response.raw_headers))
+            self._preflights[key] = cached
+            if len(self._preflights) > self.preflight_cache_size:
+                self._preflights.popitem(last=False)
+        else:
+            self._preflights.move_to_end(key)
+        status_code, body, raw_headers = cached
+        # A new Response each time: outer middleware may edit the header list in place
+        response = Response(status_code=status_code)
+        response.body = body
+        response.raw_headers = list(raw_headers)
+        return response
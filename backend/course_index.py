@@ -0,0 +1,155 @@
+"""Precomputed lookup structures for the course catalog endpoints."""
+import json
+import re
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from course_search import SearchIndex
+from http_cache import PreparedBody
+
+DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(day|week|month)', re.IGNORECASE)
+WEEKS_PER_UNIT = {"day": 1 / 7, "week": 1.0, "month": 52 / 12}
+
+# Cap on cached bodies for ad-hoc filter combinations (query strings are user input)
+MAX_CACHED_FILTER_BODIES = 256
+# Ad-hoc filter bodies are compressed on the event loop when first requested,
+# so they get fast levels; the bodies built with the index get the maximum
+FILTER_GZIP_LEVEL = 5
+FILTER_BROTLI_QUALITY = 4
+
+
+def parse_duration_weeks(duration):
+    """Parse a duration such as "6 weeks" or "2 months" into weeks"""
+    match = DURATION_PATTERN.search(duration or "")
+    if not match:
+        return None
+    return float(match.group(1)) * WEEKS_PER_UNIT[match.group(2).lower()]
+
+
+def encode_json(payload):
+    """Encode a payload the same way FastAPI's JSONResponse does"""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class CourseIndex:
+    """Read-only index over a list of course modules.
+
+    Courses are referred to by their position in the catalog so every
+    result keeps catalog order. Built once per catalog load:
+
+    * ``level_positions``: lowercased level -> positions
+    * ``duration_positions``: lowercased duration text -> positions, so the
+      substring ``duration`` filter only scans distinct duration strings
+    * ``weeks`` / ``weeks_positions``: durations in weeks sorted for
+      ``min_weeks``/``max_weeks`` range queries
+    * ``feature_positions``: lowercased feature tag -> positions
+    * ``search``: ranked full-text index (see course_search.py), built
+      incrementally from ``previous`` when the catalog is reloaded
+
+    Response bodies are held as ``PreparedBody`` objects, so the JSON,
+    its compressed variants and the ETag are only computed once.
+    """
+
+    def __init__(self, courses, previous=None):
+        self.courses = tuple(courses)
+        self.level_positions = {}
+        self.duration_positions = {}
+        self.feature_positions = {}
+        by_weeks = []
+
+        for position, course in enumerate(self.courses):
+            self.level_positions.setdefault(course["level"].lower(), []).append(position)
+            self.duration_positions.setdefault(course["duration"].lower(), []).append(position)
+            for feature in course.get("features", []):
+                self.feature_positions.setdefault(feature.lower(), []).append(position)
+            weeks = parse_duration_weeks(course["duration"])
+            if weeks is not None:
+                by_weeks.append((weeks, position))
+
+        self.search = SearchIndex.build(self.courses, previous.search if previous else None)
+
+        by_weeks.sort()
+        self.weeks = [weeks for weeks, _ in by_weeks]
+        self.weeks_positions = [position for _, position in by_weeks]
+
+        self.courses_body = PreparedBody(encode_json({
+            "status": "success",
+            "data": list(self.courses),
+            "total_courses": len(self.courses)
+        }))
+        # Unfiltered and per-level views are the common requests; they are
+        # kept for the lifetime of the index, other combinations in an LRU.
+        self._common_bodies = {}
+        self._filter_bodies = OrderedDict()
+        common_levels = {None}
+        for course in self.courses:
+            common_levels.update((course["level"], course["level"].lower()))
+        for level in common_levels:
+            key = (level, None, None, None, None)
+            self._common_bodies[key] = PreparedBody(self._encode_filter(*key))
+
+    def _range_positions(self, min_weeks, max_weeks):
+        lo = 0 if min_weeks is None else bisect_left(self.weeks, min_weeks)
+        hi = len(self.weeks) if max_weeks is None else bisect_right(self.weeks, max_weeks)
+        return set(self.weeks_positions[lo:hi])
+
+    def filter(self, level=None, duration=None, min_weeks=None, max_weeks=None, features=None):
+        """Return matching courses in catalog order"""
+        candidates = []
+        if level:
+            candidates.append(self.level_positions.get(level.lower(), ()))
+        if duration:
+            needle = duration.lower()
+            matched = []
+            for text, positions in self.duration_positions.items():
+                if needle in text:
+                    matched.extend(positions)
+            candidates.append(matched)
+        if min_weeks is not None or max_weeks is not None:
+            candidates.append(self._range_positions(min_weeks, max_weeks))
+        for feature in features or ():
+            candidates.append(self.feature_positions.get(feature.lower(), ()))
+
+        if not candidates:
+            return list(self.courses)
+
+        # Intersect starting from the shortest posting list
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for positions in candidates[1:]:
+            if not result:
+                break
+            result.intersection_update(positions)
+        return [self.courses[position] for position in sorted(result)]
+
+    def filter_body(self, level=None, duration=None, min_weeks=None, max_weeks=None, features=None):
+        """Return the serialized /api/courses/filter response for these filters"""
+        key = (level, duration, min_weeks, max_weeks, tuple(features) if features else None)
+        body = self._common_bodies.get(key)
+        if body is not None:
+            return body
+        body = self._filter_bodies.get(key)
+        if body is not None:
+            self._filter_bodies.move_to_end(key)
+            return body
+
+        body = PreparedBody(self._encode_filter(*key), FILTER_GZIP_LEVEL, FILTER_BROTLI_QUALITY)
+        self._filter_bodies[key] = body
+        if len(self._filter_bodies) > MAX_CACHED_FILTER_BODIES:
+            self._filter_bodies.popitem(last=False)
+        return body
+
+    def _encode_filter(self, level, duration, min_weeks, max_weeks, features):
+        courses = self.filter(level, duration, min_weeks, max_weeks, features)
+        return encode_json({
+            "status": "success",
+            "data": courses,
+            "total_courses": len(courses),
+            "filters_applied": {
+                "level": level,
+                "duration": duration,
+                "min_weeks": min_weeks,
+                "max_weeks": max_weeks,
+                "features": list(features) if features else None
+            }
+        })
@@ -0,0 +1,224 @@
+"""Ranked full-text search over the course catalog.
+
+An in-memory inverted index over each course's title, features and
+description (weighted in that order), ranked with BM25. The last query
+word also matches as a prefix for typeahead, and words that match nothing
+are corrected through a trigram index of the vocabulary, so "selenim" still
+finds Selenium courses.
+
+A ``SearchIndex`` is never modified once built. ``SearchIndex.build`` with
+the previous index re-analyzes only the courses whose content changed and
+copies only the posting lists and trigram sets those courses touch, so a
+catalog reload does work proportional to the change. Scoring runs over
+numpy arrays of precomputed BM25 impacts per term, which each index fills
+in lazily the first time a term is queried. numpy itself is only imported
+by the first search, to keep it out of worker start-up.
+"""
+import heapq
+import math
+import re
+from bisect import bisect_left
+
+TOKEN_PATTERN = re.compile(r'\w+')
+FIELD_WEIGHTS = (("title", 3.0), ("features", 2.0), ("description", 1.0))
+K1 = 1.2
+B = 0.75
+MAX_QUERY_TERMS = 10
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_SCAN = 200
+MAX_PREFIX_EXPANSIONS = 20
+PREFIX_WEIGHT = 0.8
+MIN_FUZZY_LENGTH = 3
+MIN_FUZZY_SIMILARITY = 0.4
+MAX_FUZZY_EXPANSIONS = 3
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def trigrams(term):
+    padded = f"^{term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def analyze(course):
+    """Field-weighted term frequencies and length of one course"""
+    frequencies = {}
+    length = 0.0
+    for field, weight in FIELD_WEIGHTS:
+        value = course.get(field) or ""
+        text = " ".join(value) if isinstance(value, list) else value
+        for term in tokenize(text):
+            frequencies[term] = frequencies.get(term, 0.0) + weight
+            length += weight
+    return frequencies, length
+
+
+class SearchIndex:
+    def __init__(self):
+        self.courses = []       # catalog order
+        self.positions = {}     # id -> catalog position
+        self.documents = {}     # id -> (course, frequencies, length)
+        self.postings = {}      # term -> {id: weighted tf}
+        self.trigram_terms = {}  # trigram -> frozenset of terms
+        self.vocabulary = []    # sorted terms, for prefix lookups
+        self.total_length = 0.0
+        self._impacts = {}      # term -> (positions, BM25 scores), filled on first use
+
+    @classmethod
+    def build(cls, courses, previous=None):
+        """Index ``courses``, reusing whatever ``previous`` already holds"""
+        index = cls()
+        base = previous or cls()
+        index.documents = dict(base.documents)
+        index.postings = dict(base.postings)
+        index.trigram_terms = dict(base.trigram_terms)
+        index.total_length = base.total_length
+        copied = set()  # posting lists already copied away from ``base``
+
+        def postings_for(term):
+            if term not in copied:
+                copied.add(term)
+                index.postings[term] = dict(index.postings.get(term, ()))
+            return index.postings[term]
+
+        index.courses = list(courses)
+        index.positions = {course["id"]: position for position, course in enumerate(index.courses)}
+
+        removed_terms = set()
+        for course_id, (course, frequencies, length) in base.documents.items():
+            position = index.positions.get(course_id)
+            if position is not None and index.courses[position] == course:
+                continue
+            for term in frequencies:
+                postings = postings_for(term)
+                del postings[course_id]
+                if not postings:
+                    removed_terms.add(term)
+            index.total_length -= length
+            del index.documents[course_id]
+
+        added_terms = set()
+        for course in index.courses:
+            course_id = course["id"]
+            if course_id in index.documents:
+                continue
+            frequencies, length = analyze(course)
+            for term, frequency in frequencies.items():
+                if term not in base.postings:
+                    added_terms.add(term)
+                postings_for(term)[course_id] = frequency
+            index.documents[course_id] = (course, frequencies, length)
+            index.total_length += length
+
+        removed_terms = {term for term in removed_terms if not index.postings[term]}
+        for term in removed_terms:
+            del index.postings[term]
+        if removed_terms or added_terms or not base.vocabulary:
+            index.vocabulary = sorted(index.postings)
+            index._update_trigrams(added_terms, removed_terms)
+        else:
+            index.vocabulary = base.vocabulary
+        return index
+
+    def _update_trigrams(self, added, removed):
+        changes = {}
+        for term in removed:
+            for gram in trigrams(term):
+                changes.setdefault(gram, [set(), set()])[1].add(term)
+        for term in added:
+            for gram in trigrams(term):
+                changes.setdefault(gram, [set(), set()])[0].add(term)
+        for gram, (plus, minus) in changes.items():
+            terms = (self.trigram_terms.get(gram, frozenset()) | plus) - minus
+            if terms:
+                self.trigram_terms[gram] = frozenset(terms)
+            else:
+                self.trigram_terms.pop(gram, None)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _prefix_terms(self, prefix):
+        start = bisect_left(self.vocabulary, prefix)
+        matches = []
+        for term in self.vocabulary[start:start + MAX_PREFIX_SCAN]:
+            if not term.startswith(prefix):
+                break
+            if term != prefix:
+                matches.append(term)
+        if len(matches) > MAX_PREFIX_EXPANSIONS:
+            matches = heapq.nlargest(MAX_PREFIX_EXPANSIONS, matches, key=lambda t: len(self.postings[t]))
+        return matches
+
+    def _fuzzy_terms(self, token):
+        grams = trigrams(token)
+        shared = {}
+        for gram in grams:
+            for term in self.trigram_terms.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+        scored = []
+        for term, count in shared.items():
+            similarity = count / (len(grams) + len(term) - count)
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                scored.append((similarity, term))
+        return [(term, similarity) for similarity, term in heapq.nlargest(MAX_FUZZY_EXPANSIONS, scored)]
+
+    def expand(self, query, prefix=True):
+        """Query words -> list of [(index term, weight), ...], one list per word"""
+        tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        expanded = []
+        for i, token in enumerate(tokens):
+            terms = [(token, 1.0)] if token in self.postings else []
+            if prefix and i == len(tokens) - 1 and len(token) >= MIN_PREFIX_LENGTH:
+                terms.extend((term, PREFIX_WEIGHT) for term in self._prefix_terms(token))
+            if not terms and len(token) >= MIN_FUZZY_LENGTH:
+                terms = self._fuzzy_terms(token)
+            expanded.append(terms)
+        return expanded
+
+    def _term_impacts(self, term):
+        """Catalog positions containing ``term`` and their BM25 score for it"""
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            import numpy as np
+
+            postings = self.postings[term]
+            documents = len(self.documents)
+            average_length = self.total_length / documents
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            positions = np.fromiter((self.positions[course_id] for course_id in postings), np.int32, len(postings))
+            frequencies = np.fromiter(postings.values(), np.float64, len(postings))
+            lengths = np.fromiter((self.documents[course_id][2] for course_id in postings), np.float64, len(postings))
+            scores = idf * frequencies * (K1 + 1) / (frequencies + K1 * (1 - B + B * lengths / average_length))
+            impacts = self._impacts[term] = (positions, scores)
+        return impacts
+
+    def search(self, query, limit=10, prefix=True):
+        """Return (total matches, [(score, course), ...] best first)"""
+        if not self.documents:
+            return 0, []
+        import numpy as np
+
+        scores = None
+        for terms in self.expand(query, prefix):
+            if not terms:
+                continue
+            # A word scores each course once, through its best-matching expansion
+            best = np.zeros(len(self.courses))
+            for term, weight in terms:
+                positions, impacts = self._term_impacts(term)
+                best[positions] = np.maximum(best[positions], impacts * weight)
+            scores = best if scores is None else scores + best
+        if scores is None:
+            return 0, []
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            # Ties at the cut-off are resolved by catalog order below
+            threshold = np.partition(scores[matched], len(matched) - limit)[len(matched) - limit]
+            top = matched[scores[matched] >= threshold]
+        else:
+            top = matched
+        top = top[np.lexsort((top, -scores[top]))][:limit]
+        return len(matched), [(float(scores[position]), self.courses[position]) for position in top]
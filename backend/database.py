@@ -0,0 +1,169 @@
+"""MongoDB client lifecycle, pool configuration and health checks.
+
+The client is created by the application's lifespan handler, not at import
+time, so it belongs to the serving event loop and each worker process
+opens its own pool. Modules that were handed the database at import time
+hold a ``DatabaseProxy``, which resolves to the connected database on
+every attribute access.
+
+Pool settings come from the environment:
+
+    MONGO_MAX_POOL_SIZE                 connections per worker (default 100)
+    MONGO_MIN_POOL_SIZE                 connections kept open (default 0)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS         max wait for a free connection (default 2000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS   (default 5000)
+    MONGO_CONNECT_TIMEOUT_MS            (default 5000)
+    MONGO_SOCKET_TIMEOUT_MS             per operation, 0 for none (default 0)
+    MONGO_MAX_IDLE_TIME_MS              close idle connections, 0 for never (default 0)
+    MONGO_WARMUP_CONNECTIONS            connections opened at startup (default 1)
+    MONGO_PING_CACHE_SECONDS            how long a health ping is reused (default 5)
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from metrics import MongoCommandListener, MongoPoolListener
+
+POOL_OPTIONS = (
+    ("maxPoolSize", "MONGO_MAX_POOL_SIZE", "100"),
+    ("minPoolSize", "MONGO_MIN_POOL_SIZE", "0"),
+    ("waitQueueTimeoutMS", "MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"),
+    ("serverSelectionTimeoutMS", "MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"),
+    ("connectTimeoutMS", "MONGO_CONNECT_TIMEOUT_MS", "5000"),
+    ("socketTimeoutMS", "MONGO_SOCKET_TIMEOUT_MS", "0"),
+    ("maxIdleTimeMS", "MONGO_MAX_IDLE_TIME_MS", "0"),
+)
+# Options where 0 means "no limit", which pymongo expresses as leaving them unset
+UNLIMITED_WHEN_ZERO = frozenset(("waitQueueTimeoutMS", "socketTimeoutMS", "maxIdleTimeMS"))
+
+
+def client_options_from_env():
+    options = {}
+    for option, variable, default in POOL_OPTIONS:
+        value = int(os.environ.get(variable, default))
+        if value or option not in UNLIMITED_WHEN_ZERO:
+            options[option] = value
+    return options
+
+
+class MongoConnection:
+    def __init__(self, url, name, warmup_connections=1, ping_cache_seconds=5.0, **client_options):
+        self.url = url
+        self.name = name
+        self.warmup_connections = warmup_connections
+        self.ping_cache_seconds = ping_cache_seconds
+        self.client_options = client_options
+        self.client = None
+        self._database = None
+        self._ping = None
+        self._ping_checked = 0.0
+        self._ping_task = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.environ['MONGO_URL'],
+            os.environ['DB_NAME'],
+            warmup_connections=int(os.environ.get('MONGO_WARMUP_CONNECTIONS', '1')),
+            ping_cache_seconds=float(os.environ.get('MONGO_PING_CACHE_SECONDS', '5')),
+            **client_options_from_env()
+        )
+
+    @property
+    def database(self):
+        if self._database is None:
+            raise RuntimeError("MongoDB is not connected; the app's lifespan handler has not run")
+        return self._database
+
+    async def connect(self):
+        self.client = AsyncIOMotorClient(
+            self.url,
+            event_listeners=[MongoCommandListener(), MongoPoolListener()],
+            **self.client_options
+        )
+        self._database = self.client[self.name]
+        await self.warm_up()
+
+    async def warm_up(self):
+        """Open connections up front so the first requests do not pay for the handshakes.
+
+        Concurrent pings each need their own connection, so N of them leave
+        N connections in the pool. Failures are logged, not raised: the
+        app starts without the database and reconnects when it comes back.
+        """
+        count = max(1, self.warmup_connections)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self.client.admin.command("ping") for _ in range(count)),
+                                       return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            logging.error(f"MongoDB warm-up failed: {str(errors[0])}")
+        else:
+            logging.info(f"MongoDB connected, {count} connection(s) warmed up in "
+                         f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def detach(self):
+        """Forget the client without closing it, in a process forked after it was created.
+
+        Closing would shut sockets the parent process still uses.
+        """
+        self.client = None
+        self._database = None
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self._database = None
+
+    async def ping(self):
+        """Health of the database, from a ping at most ``ping_cache_seconds`` old.
+
+        Concurrent health checks share one in-flight ping.
+        """
+        if self._ping is not None and time.monotonic() - self._ping_checked < self.ping_cache_seconds:
+            return self._ping
+        if self._ping_task is None:
+            self._ping_task = asyncio.ensure_future(self._run_ping())
+        return await asyncio.shield(self._ping_task)
+
+    async def _run_ping(self):
+        started = time.perf_counter()
+        try:
+            await self.database.command("ping")
+            result = {"status": "connected"}
+        except Exception as e:
+            result = {"status": "unreachable", "error": str(e)}
+        finally:
+            self._ping_task = None
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["checked_at"] = datetime.utcnow().isoformat()
+        self._ping = result
+        self._ping_checked = time.monotonic()
+        return result
+
+
+class DatabaseProxy:
+    """Stands in for the AsyncIOMotorDatabase of a MongoConnection
+
+    ``connection`` is None when the app runs on another storage backend.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    @property
+    def _database(self):
+        if self._connection is None:
+            raise RuntimeError("MongoDB is not used with this storage backend")
+        return self._connection.database
+
+    def __getattr__(self, name):
+        return getattr(self._database, name)
+
+    def __getitem__(self, name):
+        return self._database[name]
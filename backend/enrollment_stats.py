@@ -0,0 +1,237 @@
+"""Incrementally maintained enrollment counters behind /api/stats.
+
+Counters live in the ``enrollment_stats`` collection, one document per
+(dimension, value) pair. Each worker accumulates increments in memory and
+flushes them as ``$inc`` upserts, so concurrent workers add up correctly.
+Reads are served from an in-memory summary that is reloaded after every
+flush. Increments that were not flushed before a crash are recovered by
+the rebuild command, which recomputes every counter from the raw
+enrollments:
+
+    python enrollment_stats.py --rebuild
+
+``country`` and ``course_interest`` are free text, so each keeps at most
+``max_values`` counters (STATS_MAX_VALUES). Values are trimmed and their
+whitespace collapsed; once a dimension is full, values it has not seen yet
+are counted under "other". The rebuild keeps the most frequent values and
+folds the rest into "other", which also cleans up counters stored before
+the cap existed.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+STATS_COLLECTION = "enrollment_stats"
+DIMENSIONS = ("course_interest", "experience_level", "country", "day")
+# Free-text dimensions whose number of counters is capped
+CAPPED_DIMENSIONS = ("course_interest", "country")
+MAX_VALUE_LENGTH = 100
+OTHER = "other"
+
+
+def normalize_value(value):
+    return " ".join(str(value or "").split())[:MAX_VALUE_LENGTH] or "unknown"
+
+
+def counter_keys(doc):
+    """The (dimension, value) counters an enrollment contributes to, before capping"""
+    submitted = doc.get("submission_time") or datetime.utcnow()
+    yield "total", "all"
+    for dimension in ("course_interest", "experience_level", "country"):
+        yield dimension, normalize_value(doc.get(dimension))
+    yield "day", submitted.strftime("%Y-%m-%d")
+
+
+class EnrollmentStats:
+    def __init__(self, db, flush_interval=5.0, max_values=50):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_values = max_values
+        self.pending = Counter()
+        self.counts = {}
+        self.updated_at = None
+        self._summary = None
+        self._task = None
+
+    def record(self, doc):
+        for dimension, value in counter_keys(doc):
+            values = self.counts.setdefault(dimension, {})
+            if (dimension in CAPPED_DIMENSIONS and value not in values
+                    and len(values) - (OTHER in values) >= self.max_values):
+                value = OTHER
+            self.pending[dimension, value] += 1
+            values[value] = values.get(value, 0) + 1
+        self._summary = None
+
+    def record_many(self, docs):
+        for doc in docs:
+            self.record(doc)
+
+    def summary(self):
+        """The /api/stats payload; rebuilt only after counters change"""
+        if self._summary is None:
+            self._summary = {
+                "total": self.counts.get("total", {}).get("all", 0),
+                **{f"by_{dimension}": dict(self.counts.get(dimension, {})) for dimension in DIMENSIONS},
+                "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            }
+        return self._summary
+
+    async def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, Counter()
+        operations = [
+            UpdateOne(
+                {"_id": f"{dimension}:{value}"},
+                {"$inc": {"count": count}, "$setOnInsert": {"dimension": dimension, "value": value}},
+                upsert=True
+            )
+            for (dimension, value), count in pending.items()
+        ]
+        try:
+            await self.db[STATS_COLLECTION].bulk_write(operations, ordered=False)
+        except Exception:
+            # Keep the increments for the next attempt
+            self.pending.update(pending)
+            raise
+
+    async def load(self):
+        counts = {}
+        async for doc in self.db[STATS_COLLECTION].find({}, {"_id": 0, "dimension": 1, "value": 1, "count": 1}):
+            counts.setdefault(doc["dimension"], {})[doc["value"]] = doc["count"]
+        # Increments recorded while the reload was running are not in the
+        # collection yet; keep them visible.
+        for (dimension, value), count in self.pending.items():
+            values = counts.setdefault(dimension, {})
+            values[value] = values.get(value, 0) + count
+        self.counts = counts
+        self.updated_at = datetime.utcnow()
+        self._summary = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="enrollment-stats")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logging.error(f"Failed to flush enrollment stats on shutdown: {str(e)}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.flush()
+                await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Enrollment stats refresh failed: {str(e)}")
+            await asyncio.sleep(self.flush_interval)
+
+
+def cap_values(counts, max_values):
+    """Keep the ``max_values`` most frequent values and count the rest as "other\""""
+    ranked = sorted(((count, value) for value, count in counts.items() if value != OTHER), reverse=True)
+    capped = {value: count for count, value in ranked[:max_values]}
+    other = counts.get(OTHER, 0) + sum(count for count, _ in ranked[max_values:])
+    if other:
+        capped[OTHER] = other
+    return capped
+
+
+async def compute_counts(db, max_values=50):
+    """Recompute every counter from the raw enrollments collection"""
+    group_by = {
+        "course_interest": "$course_interest",
+        "experience_level": "$experience_level",
+        "country": "$country",
+        "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$submission_time"}},
+    }
+    pipeline = [{"$facet": {
+        "total": [{"$count": "count"}],
+        **{dimension: [{"$group": {"_id": expr, "count": {"$sum": 1}}}] for dimension, expr in group_by.items()}
+    }}]
+    result = (await db.enrollments.aggregate(pipeline).to_list(1))[0]
+    counts = {("total", "all"): result["total"][0]["count"] if result["total"] else 0}
+    for dimension in group_by:
+        values = Counter()
+        for row in result[dimension]:
+            # Same normalization as counter_keys()
+            values[normalize_value(row["_id"])] += row["count"]
+        if dimension in CAPPED_DIMENSIONS:
+            values = cap_values(values, max_values)
+        counts.update(((dimension, value), count) for value, count in values.items())
+    return counts
+
+
+async def rebuild(db, max_values=50):
+    """Reconcile stored counters with the raw data; returns the drifted keys.
+
+    Counters are overwritten with absolute values, so run it while writes
+    are quiet: an increment flushed between the aggregation and the write
+    would be overwritten.
+    """
+    actual = await compute_counts(db, max_values)
+    stored = {}
+    async for doc in db[STATS_COLLECTION].find({}):
+        stored[(doc["dimension"], doc["value"])] = doc["count"]
+
+    drift = {key: (stored.get(key, 0), actual.get(key, 0))
+             for key in set(actual) | set(stored) if stored.get(key, 0) != actual.get(key, 0)}
+    operations = [
+        UpdateOne({"_id": f"{dimension}:{value}"},
+                  {"$set": {"dimension": dimension, "value": value, "count": count}}, upsert=True)
+        for (dimension, value), count in actual.items()
+    ]
+    if operations:
+        await db[STATS_COLLECTION].bulk_write(operations, ordered=False)
+    stale = [f"{dimension}:{value}" for dimension, value in stored if (dimension, value) not in actual]
+    if stale:
+        await db[STATS_COLLECTION].delete_many({"_id": {"$in": stale}})
+    return drift
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the enrollment stats summary")
+    parser.add_argument("--rebuild", action="store_true", help="recompute all counters from the enrollments collection")
+    parser.add_argument("--max-values", type=int, help="counters kept per free-text dimension (default: STATS_MAX_VALUES or 50)")
+    args = parser.parse_args(argv)
+    if not args.rebuild:
+        parser.error("nothing to do, pass --rebuild")
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    max_values = args.max_values or int(os.environ.get('STATS_MAX_VALUES', '50'))
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        drift = await rebuild(client[os.environ['DB_NAME']], max_values)
+    finally:
+        client.close()
+    for (dimension, value), (stored, actual) in sorted(drift.items()):
+        print(f"{dimension}={value}: {stored} -> {actual}")
+    print(f"Rebuilt enrollment stats, {len(drift)} counters corrected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
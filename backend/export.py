@@ -0,0 +1,229 @@
+"""Streaming export of enrollments and contacts as CSV, NDJSON or Parquet.
+
+Used by the /api/export endpoint and runnable on its own:
+
+    python export.py enrollments --format csv --since 2025-01-01 --country India -o enrollments.csv
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+FORMATS = ("csv", "ndjson", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+COLUMNS = {
+    "enrollments": ["id", "name", "email", "country", "phone_number", "experience_level", "course_interest", "submission_time"],
+    "contacts": ["id", "name", "email", "message", "submission_time"],
+}
+# Filters other than the submission_time range that each collection supports
+FIELD_FILTERS = {
+    "enrollments": ("country", "experience_level"),
+    "contacts": (),
+}
+
+
+class ExportError(Exception):
+    """Raised for an export request that cannot be served"""
+
+
+def build_query(collection, since=None, until=None, **fields):
+    if collection not in COLUMNS:
+        raise ExportError(f"Unknown collection '{collection}', expected one of: {', '.join(COLUMNS)}")
+    query = {}
+    if since or until:
+        query["submission_time"] = {}
+        if since:
+            query["submission_time"]["$gte"] = since
+        if until:
+            query["submission_time"]["$lt"] = until
+    for name, value in fields.items():
+        if value is None:
+            continue
+        if name not in FIELD_FILTERS[collection]:
+            raise ExportError(f"Filter '{name}' is not supported for {collection}")
+        query[name] = value
+    return query
+
+
+# Spreadsheet apps evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _cell(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_cell(value):
+    value = _cell(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class CsvEncoder:
+    """CSV with user-entered text that looks like a formula prefixed with ``'``"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.header_written = False
+
+    def encode(self, docs):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        if not self.header_written:
+            writer.writerow(self.columns)
+            self.header_written = True
+        for doc in docs:
+            writer.writerow([_csv_cell(doc.get(c, "")) for c in self.columns])
+        return out.getvalue().encode("utf-8")
+
+    def finish(self):
+        if not self.header_written:
+            return self.encode([])
+        return b""
+
+
+class NdjsonEncoder:
+    def __init__(self, columns):
+        self.columns = columns
+
+    def encode(self, docs):
+        return "".join(
+            json.dumps({c: _cell(doc.get(c)) for c in self.columns}) + "\n" for doc in docs
+        ).encode("utf-8")
+
+    def finish(self):
+        return b""
+
+
+class _Sink(io.RawIOBase):
+    """Write-only buffer the Parquet writer flushes into between row groups"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ParquetEncoder:
+    """Writes one Parquet row group per batch; the footer comes out in finish()"""
+
+    def __init__(self, columns):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ExportError("Parquet export requires the pyarrow package")
+        self.pa = pyarrow
+        self.columns = columns
+        self.schema = pyarrow.schema([
+            (c, pyarrow.timestamp("ms") if c == "submission_time" else pyarrow.string()) for c in columns
+        ])
+        self.sink = _Sink()
+        self.writer = pyarrow.parquet.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def encode(self, docs):
+        arrays = {c: [doc.get(c) for doc in docs] for c in self.columns}
+        self.writer.write_table(self.pa.Table.from_pydict(arrays, schema=self.schema))
+        return self.sink.drain()
+
+    def finish(self):
+        self.writer.close()
+        return self.sink.drain()
+
+
+ENCODERS = {"csv": CsvEncoder, "ndjson": NdjsonEncoder, "parquet": ParquetEncoder}
+
+
+def make_encoder(collection, fmt):
+    if fmt not in ENCODERS:
+        raise ExportError(f"Unsupported format '{fmt}', expected one of: {', '.join(FORMATS)}")
+    return ENCODERS[fmt](COLUMNS[collection])
+
+
+async def export_documents(db, collection, query, encoder, batch_size=2000):
+    """Yield encoded bytes one cursor batch at a time.
+
+    Encoding runs in a worker thread so a large export does not hold the
+    event loop while other requests are waiting.
+    """
+    projection = {"_id": 0, **{c: 1 for c in COLUMNS[collection]}}
+    cursor = db[collection].find(query, projection).sort("submission_time", 1).batch_size(batch_size)
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield await asyncio.to_thread(encoder.encode, batch)
+            batch = []
+    if batch:
+        yield await asyncio.to_thread(encoder.encode, batch)
+    tail = await asyncio.to_thread(encoder.finish)
+    if tail:
+        yield tail
+
+
+def parse_date(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export enrollments or contacts from MongoDB")
+    parser.add_argument("collection", choices=sorted(COLUMNS))
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--since", type=parse_date, help="submission_time lower bound (ISO date, inclusive)")
+    parser.add_argument("--until", type=parse_date, help="submission_time upper bound (ISO date, exclusive)")
+    parser.add_argument("--country")
+    parser.add_argument("--experience-level")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        query = build_query(args.collection, args.since, args.until,
+                            country=args.country, experience_level=args.experience_level)
+        encoder = make_encoder(args.collection, args.format)
+        async for chunk in export_documents(db, args.collection, query, encoder, args.batch_size):
+            out.write(chunk)
+    except ExportError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    finally:
+        if args.output:
+            out.close()
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,47 @@
+"""Gunicorn settings for running the API in production.
+
+    cd backend && gunicorn -c gunicorn.conf.py server:app
+
+The app is imported once in the master (``preload_app``), so the catalog,
+search index and compiled models are shared copy-on-write by every worker.
+Nothing that owns sockets or threads is created at import time: each
+worker opens its own MongoDB pool and starts its background tasks in the
+app's lifespan handler after the fork.
+
+On SIGTERM a worker stops accepting connections, lets in-flight requests
+finish, then runs the lifespan shutdown, which flushes pending writes (see
+uvicorn_worker.py). Load balancers should probe /api/ready, which only
+answers 200 once a worker has started up and can reach MongoDB.
+
+Environment: HOST, PORT, WEB_CONCURRENCY (workers, default one per CPU),
+GRACEFUL_TIMEOUT, SHUTDOWN_FLUSH_SECONDS, WORKER_TIMEOUT, KEEPALIVE, MAX_REQUESTS.
+"""
+import logging
+import multiprocessing
+import os
+import random
+import sys
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '8001')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.DrainingUvicornWorker"
+preload_app = True
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.environ.get('WORKER_TIMEOUT', '60'))
+keepalive = int(os.environ.get('KEEPALIVE', '5'))
+# Recycle workers after this many requests (0 = never), jittered so they do not restart together
+max_requests = int(os.environ.get('MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    random.seed()
+    app_module = sys.modules.get("server")
+    mongo = getattr(app_module, "mongo", None)
+    if mongo is not None and mongo.client is not None:
+        # A MongoClient must not cross a fork; the worker's lifespan reconnects
+        logging.warning("MongoDB client was created before fork; discarding it in worker %s", worker.pid)
+        mongo.detach()
+    server.log.info("Worker %s forked", worker.pid)
@@ -0,0 +1,89 @@
+"""Pre-encoded response bodies with ETags and conditional GET handling."""
+import gzip
+import hashlib
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+
+def parse_accept_encoding(header):
+    """Return the set of codings the client accepts (q=0 entries excluded)"""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        params = params.replace(" ", "")
+        if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(coding)
+    return accepted
+
+
+class PreparedBody:
+    """A JSON body encoded once, with its compressed variants and ETag.
+
+    Each representation gets its own strong ETag (``"<hash>"``,
+    ``"<hash>-gzip"``, ``"<hash>-br"``) and any of them satisfies
+    ``If-None-Match`` because they share the same content hash.
+
+    The default levels suit bodies built once, off the request path. Bodies
+    built while serving a request should pass cheaper levels.
+    """
+
+    __slots__ = ("body", "digest", "etag", "gzip_body", "br_body")
+
+    def __init__(self, body, gzip_level=9, brotli_quality=11):
+        self.body = body
+        self.digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.etag = f'"{self.digest}"'
+        self.gzip_body = None
+        self.br_body = None
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.gzip_body = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+            if brotli is not None:
+                self.br_body = brotli.compress(body, quality=brotli_quality)
+
+    def matches(self, if_none_match):
+        """Whether an If-None-Match header value matches this body"""
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag.split("-", 1)[0] == self.digest:
+                return True
+        return False
+
+    def response(self, request: Request, cache_control, media_type="application/json"):
+        """Build a 304 or a 200 carrying the best encoding the client accepts"""
+        headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self.matches(if_none_match):
+            headers["ETag"] = self.etag
+            return Response(status_code=304, headers=headers)
+
+        body = self.body
+        etag = self.etag
+        if self.gzip_body is not None:
+            accepted = parse_accept_encoding(request.headers.get("accept-encoding", ""))
+            if self.br_body is not None and "br" in accepted:
+                body = self.br_body
+                etag = f'"{self.digest}-br"'
+                headers["Content-Encoding"] = "br"
+            elif "gzip" in accepted:
+                body = self.gzip_body
+                etag = f'"{self.digest}-gzip"'
+                headers["Content-Encoding"] = "gzip"
+        headers["ETag"] = etag
+        return Response(content=body, media_type=media_type, headers=headers)
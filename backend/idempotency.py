@@ -0,0 +1,114 @@
+"""Duplicate-submission detection for enrollments."""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Size-bounded LRU whose entries also expire after ``ttl`` seconds"""
+
+    def __init__(self, maxsize=10000, ttl=600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def normalize_text(value):
+    return " ".join(value.split()).casefold()
+
+
+class EnrollmentDeduplicator:
+    """Maps repeated enrollments onto the enrollment id of the first one.
+
+    Two keys identify a repeat:
+
+    * ``idempotency_key``: the client's ``Idempotency-Key`` header,
+      remembered for ``key_ttl`` seconds.
+    * ``dedup_key``: normalized email + course_interest within a
+      ``window``-second bucket, so double clicks and blind retries collapse.
+      A window of 0 turns content-based dedup off.
+
+    The in-memory cache answers repeats seen by this process. Both keys are
+    also stored on the enrollment document behind unique indexes, which
+    catches repeats that land on another worker or after a restart.
+    """
+
+    def __init__(self, window=600, key_ttl=86400, cache_size=10000):
+        self.window = window
+        self.key_ttl = key_ttl
+        self.cache = TTLCache(maxsize=cache_size, ttl=window)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            window=int(os.environ.get('ENROLLMENT_DEDUP_WINDOW_SECONDS', '600')),
+            key_ttl=int(os.environ.get('IDEMPOTENCY_KEY_TTL_SECONDS', '86400')),
+            cache_size=int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', '10000')),
+        )
+
+    def content_hash(self, email, course_interest):
+        raw = f"{normalize_email(email)}\x00{normalize_text(course_interest)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def keys(self, email, course_interest, idempotency_key=None, now=None):
+        """Return (idempotency_key, dedup_key) to store on the document"""
+        dedup_key = None
+        if self.window:
+            now = time.time() if now is None else now
+            dedup_key = f"{self.content_hash(email, course_interest)}:{int(now // self.window)}"
+        if idempotency_key:
+            idempotency_key = idempotency_key.strip()[:255] or None
+        return idempotency_key, dedup_key
+
+    def _cache_keys(self, idempotency_key, dedup_key):
+        if idempotency_key:
+            yield "idem:" + idempotency_key, self.key_ttl
+        # The content key is cached without its bucket so the in-memory window
+        # slides with each submission instead of resetting at bucket edges.
+        if dedup_key:
+            yield "content:" + dedup_key.split(":", 1)[0], None
+
+    def lookup(self, idempotency_key, dedup_key):
+        """Return the enrollment id of a previous submission, if any"""
+        for cache_key, _ in self._cache_keys(idempotency_key, dedup_key):
+            enrollment_id = self.cache.get(cache_key)
+            if enrollment_id is not None:
+                return enrollment_id
+        return None
+
+    def remember(self, idempotency_key, dedup_key, enrollment_id):
+        for cache_key, ttl in self._cache_keys(idempotency_key, dedup_key):
+            self.cache.set(cache_key, enrollment_id, ttl)
+
+    def forget(self, idempotency_key, dedup_key):
+        for cache_key, _ in self._cache_keys(idempotency_key, dedup_key):
+            self.cache.pop(cache_key)
@@ -0,0 +1,166 @@
+"""Index declarations for the app's collections and a query-plan check.
+
+Run from the backend directory:
+
+    python indexes.py --ensure    # create any missing indexes
+    python indexes.py --check     # explain() every app query, exit 1 on COLLSCAN
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+logger = logging.getLogger(__name__)
+
+
+# Due notifications (see outbox.py); partial, so delivered records drop out of it
+OUTBOX_DUE_INDEX = IndexModel([("outbox.next_attempt_at", ASCENDING)], name="outbox_due",
+                              partialFilterExpression={"outbox.state": "pending"})
+
+
+def index_specs():
+    """Indexes per collection.
+
+    STATUS_CHECKS_TTL_SECONDS adds a TTL index that expires status checks
+    that many seconds after their timestamp.
+    """
+    specs = {
+        "enrollments": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel([("email", ASCENDING), ("submission_time", DESCENDING)], name="email_submission_time"),
+            # Time-ordered exports
+            IndexModel([("submission_time", ASCENDING), ("id", ASCENDING)], name="submission_time_id"),
+            # Enrollments not yet in Google Sheets (see sheets_sync.py); partial, so synced ones drop out
+            IndexModel([("submission_time", ASCENDING), ("id", ASCENDING)], name="sheets_pending",
+                       partialFilterExpression={"sheets_pending": True}),
+            # Duplicate-submission backstops (see idempotency.py)
+            IndexModel([("idempotency_key", ASCENDING)], name="idempotency_key_unique", unique=True, sparse=True),
+            IndexModel([("dedup_key", ASCENDING)], name="dedup_key_unique", unique=True, sparse=True),
+            OUTBOX_DUE_INDEX,
+        ],
+        "contacts": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            IndexModel([("email", ASCENDING), ("submission_time", DESCENDING)], name="email_submission_time"),
+            # Time-ordered exports
+            IndexModel([("submission_time", ASCENDING), ("id", ASCENDING)], name="submission_time_id"),
+            OUTBOX_DUE_INDEX,
+        ],
+        "status_checks": [
+            IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+            # Keyset pagination of /api/status
+            IndexModel([("timestamp", ASCENDING), ("id", ASCENDING)], name="timestamp_id"),
+        ],
+    }
+    ttl = os.environ.get('STATUS_CHECKS_TTL_SECONDS')
+    if ttl:
+        specs["status_checks"].append(
+            IndexModel([("timestamp", ASCENDING)], name="timestamp_ttl", expireAfterSeconds=int(ttl))
+        )
+    return specs
+
+
+async def ensure_indexes(db):
+    """Create every declared index; existing ones are left untouched"""
+    for collection, models in index_specs().items():
+        await db[collection].create_indexes(models)
+
+
+def app_queries():
+    """Representative shapes of every query the app sends to MongoDB.
+
+    Keep this list in step with the handlers and workers: a query added
+    without a matching index shows up as a COLLSCAN in ``check_query_plans``.
+    """
+    now = datetime.utcnow()
+    after_status = {"$or": [{"timestamp": {"$gt": now}}, {"timestamp": now, "id": {"$gt": "x"}}]}
+    return [
+        ("status_checks first page", "status_checks", "find",
+         {"filter": {}, "sort": {"timestamp": 1, "id": 1}}),
+        ("status_checks after cursor", "status_checks", "find",
+         {"filter": after_status, "sort": {"timestamp": 1, "id": 1}}),
+        ("sheets sync pending batch", "enrollments", "find",
+         {"filter": {"sheets_pending": True}, "sort": {"submission_time": 1, "id": 1}}),
+        ("sheets sync backlog count", "enrollments", "aggregate",
+         {"pipeline": [{"$match": {"sheets_pending": True}}, {"$group": {"_id": 1, "n": {"$sum": 1}}}], "cursor": {}}),
+        ("enrollment by id", "enrollments", "find", {"filter": {"id": "x"}}),
+        ("enrollment by idempotency key", "enrollments", "find", {"filter": {"idempotency_key": "x"}}),
+        ("enrollment by dedup key", "enrollments", "find", {"filter": {"dedup_key": "x"}}),
+        ("enrollments by email", "enrollments", "find",
+         {"filter": {"email": "x@example.com"}, "sort": {"submission_time": -1}}),
+        ("enrollments export", "enrollments", "find",
+         {"filter": {"submission_time": {"$gte": now}, "country": "x", "experience_level": "x"},
+          "sort": {"submission_time": 1}}),
+        ("contact by id", "contacts", "find", {"filter": {"id": "x"}}),
+        ("due enrollment notifications", "enrollments", "find",
+         {"filter": {"outbox.state": "pending", "outbox.next_attempt_at": {"$lte": now}},
+          "sort": {"outbox.next_attempt_at": 1}}),
+        ("due contact notifications", "contacts", "find",
+         {"filter": {"outbox.state": "pending", "outbox.next_attempt_at": {"$lte": now}},
+          "sort": {"outbox.next_attempt_at": 1}}),
+        ("contacts export", "contacts", "find",
+         {"filter": {"submission_time": {"$gte": now}}, "sort": {"submission_time": 1}}),
+        ("contacts by email", "contacts", "find",
+         {"filter": {"email": "x@example.com"}, "sort": {"submission_time": -1}}),
+    ]
+
+
+def plan_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+async def check_query_plans(db):
+    """Explain every app query; return the names of those that scan a collection"""
+    failures = []
+    for name, collection, command, spec in app_queries():
+        explain = await db.command({"explain": {command: collection, **spec}, "verbosity": "queryPlanner"})
+        stages = set(plan_stages(explain.get("queryPlanner", explain)))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        print(f"{status:8} {name}: {', '.join(sorted(stages))}")
+        if status == "COLLSCAN":
+            failures.append(name)
+    return failures
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes for the SDET Course API")
+    parser.add_argument("--ensure", action="store_true", help="create missing indexes")
+    parser.add_argument("--check", action="store_true", help="fail if any app query falls back to COLLSCAN")
+    args = parser.parse_args(argv)
+    if not (args.ensure or args.check):
+        parser.error("nothing to do, pass --ensure and/or --check")
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if args.ensure:
+            await ensure_indexes(db)
+            print("Indexes ensured")
+        if args.check:
+            failures = await check_query_plans(db)
+            if failures:
+                print(f"{len(failures)} queries fall back to COLLSCAN", file=sys.stderr)
+                return 1
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,278 @@
+"""Low-overhead Prometheus metrics for the API.
+
+A small in-process registry (counters, gauges, histograms with labels)
+rendered in the Prometheus text exposition format, plus:
+
+* ``MetricsMiddleware``: per-route latency histogram and in-flight gauge
+* ``MongoCommandListener``: timing of every MongoDB command the client runs
+* ``MongoPoolListener``: connection pool size, checkouts and checkout wait time
+* ``observe_validation``: time spent validating request models (response
+  rendering is timed by ``serialization.InstrumentedJSONResponse``)
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for labels, value in snapshot:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, *labels):
+        # Bucket counts are stored per bucket and accumulated at render time
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _labels(self.labelnames, labels, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"))
+MONGO_COMMAND_DURATION = REGISTRY.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("command", "collection", "outcome")))
+VALIDATION_DURATION = REGISTRY.register(Histogram(
+    "pydantic_validation_duration_seconds", "Request model validation time", ("model", "outcome"), FAST_BUCKETS))
+SERIALIZATION_DURATION = REGISTRY.register(Histogram(
+    "response_serialization_duration_seconds", "JSON response rendering time", (), FAST_BUCKETS))
+MONGO_POOL_CHECKOUT_WAIT = REGISTRY.register(Histogram(
+    "mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled MongoDB connection", (), FAST_BUCKETS + DEFAULT_BUCKETS[-7:]))
+MONGO_POOL_CHECKOUTS = REGISTRY.register(Counter(
+    "mongo_pool_checkouts_total", "MongoDB connection checkouts by outcome", ("outcome",)))
+MONGO_POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    "mongo_pool_connections", "Open MongoDB connections"))
+MONGO_POOL_CHECKED_OUT = REGISTRY.register(Gauge(
+    "mongo_pool_checked_out_connections", "MongoDB connections currently in use"))
+RATE_LIMITED_REQUESTS = REGISTRY.register(Counter(
+    "rate_limited_requests_total", "Requests rejected with 429 by the rate limiter", ("endpoint", "scope")))
+OUTBOX_DELIVERIES = REGISTRY.register(Counter(
+    "outbox_deliveries_total", "Notification deliveries by sink and outcome", ("sink", "outcome")))
+OUTBOX_DELIVERY_DURATION = REGISTRY.register(Histogram(
+    "outbox_delivery_duration_seconds", "Notification delivery latency by sink", ("sink",)))
+OUTBOX_DEAD_LETTERS = REGISTRY.register(Counter(
+    "outbox_dead_letters_total", "Notifications given up on after the last retry", ("collection",)))
+LOG_RECORDS_DROPPED = REGISTRY.register(Counter(
+    "log_records_dropped_total", "Log records not written, by reason (queue_full, sampled)", ("reason",)))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency per route template.
+
+    Requests that match no route are labelled ``unmatched`` so scanners
+    cannot blow up the label cardinality.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(elapsed, scope["method"], path, str(status))
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every command sent by the MongoDB client it is registered on.
+
+    Finished events do not carry the command document, so the collection
+    name is remembered from the started event until the command completes.
+    """
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else "-"
+
+    def succeeded(self, event):
+        self._observe(event, "success")
+
+    def failed(self, event):
+        self._observe(event, "failure")
+
+    def _observe(self, event, outcome):
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, event.command_name, collection, outcome)
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Connection pool gauges and checkout wait time.
+
+    pymongo checks connections out on the thread that runs the operation
+    and the events carry no duration, so the wait is measured from a
+    per-thread start time.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.dec()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        MONGO_POOL_CHECKOUTS.inc(str(event.reason))
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            MONGO_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+            self._local.started = None
+        MONGO_POOL_CHECKOUTS.inc("success")
+        MONGO_POOL_CHECKED_OUT.inc()
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.dec()
+
+
+def observe_validation(model, seconds, outcome):
+    VALIDATION_DURATION.observe(seconds, model, outcome)
+
+
+def render_latest():
+    return REGISTRY.render()
@@ -0,0 +1,139 @@
+"""Request and response models for the SDET Course API.
+
+Validation runs on every form submission and bulk import row, so whitespace
+stripping is left to pydantic-core, the length checks are small Annotated
+validators that keep the messages the frontend shows, and the remaining
+Python validators use module-level compiled patterns and frozensets instead
+of rebuilding them per call. Plain ASCII
+email addresses are accepted by a compiled pattern; anything else goes
+through email-validator exactly like ``EmailStr``.
+
+Form models record their validation time in the ``/metrics`` histograms.
+"""
+import re
+import time
+import uuid
+from datetime import datetime
+from typing import Annotated
+
+from email_validator import SPECIAL_USE_DOMAIN_NAMES
+from pydantic import (AfterValidator, BaseModel, ConfigDict, Field, StringConstraints, ValidationError, WithJsonSchema,
+                      field_validator, model_validator)
+from pydantic.networks import validate_email
+
+from metrics import observe_validation
+
+NAME_INVALID_CHARS = re.compile(r'[<>"\']')
+PHONE_SEPARATORS = re.compile(r'[\s\-\(\)]')
+PHONE_PATTERN = re.compile(r'\+?[1-9]\d{6,14}')
+EXPERIENCE_LEVELS = ('Beginner', 'Intermediate', 'Advanced')
+ALLOWED_EXPERIENCE_LEVELS = frozenset(EXPERIENCE_LEVELS)
+EXPERIENCE_LEVEL_ERROR = f'Experience level must be one of: {", ".join(EXPERIENCE_LEVELS)}'
+
+# local@domain.tld with a dot-atom local part and LDH domain labels
+SIMPLE_EMAIL = re.compile(
+    r'([A-Za-z0-9_%+-]+(?:\.[A-Za-z0-9_%+-]+)*)@'
+    r'((?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63})'
+)
+SPECIAL_USE_TLDS = frozenset(SPECIAL_USE_DOMAIN_NAMES)
+
+
+def validate_email_address(value):
+    """Return the normalized address (domain lowercased) or raise like EmailStr"""
+    candidate = value.strip()
+    match = SIMPLE_EMAIL.fullmatch(candidate)
+    if match and len(candidate) <= 254 and len(match.group(1)) <= 64:
+        domain = match.group(2).lower()
+        if '--' not in domain and domain.rsplit('.', 1)[1] not in SPECIAL_USE_TLDS:
+            return f"{match.group(1)}@{domain}"
+    return validate_email(value)[1]
+
+
+Email = Annotated[str, AfterValidator(validate_email_address), WithJsonSchema({"type": "string", "format": "email"})]
+
+
+def length_check(label, min_length, max_length=None):
+    """AfterValidator with the API's own messages instead of pydantic's string_too_short/long"""
+    too_short = f'{label} must be at least {min_length} characters'
+    too_long = f'{label} must be less than {max_length} characters'
+
+    def check(v):
+        if len(v) < min_length:
+            raise ValueError(too_short)
+        if max_length is not None and len(v) > max_length:
+            raise ValueError(too_long)
+        return v
+
+    return AfterValidator(check)
+
+
+Stripped = StringConstraints(strip_whitespace=True)
+PersonName = Annotated[str, Stripped, length_check('Name', 2, 100)]
+Country = Annotated[str, Stripped, length_check('Country', 2, 50)]
+ContactName = Annotated[str, Stripped, length_check('Name', 2)]
+Message = Annotated[str, Stripped, length_check('Message', 10)]
+
+
+class TimedModel(BaseModel):
+    """Base for request models whose validation time is exported as a metric"""
+
+    @model_validator(mode='wrap')
+    @classmethod
+    def _timed_validation(cls, data, handler):
+        start = time.perf_counter()
+        try:
+            result = handler(data)
+        except ValidationError:
+            observe_validation(cls.__name__, time.perf_counter() - start, "invalid")
+            raise
+        observe_validation(cls.__name__, time.perf_counter() - start, "valid")
+        return result
+
+
+class StatusCheck(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    client_name: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class StatusCheckCreate(TimedModel):
+    client_name: str
+
+
+class CourseEnrollmentForm(TimedModel):
+    model_config = ConfigDict(str_strip_whitespace=True, validate_assignment=True)
+
+    name: PersonName
+    email: Email
+    country: Country
+    phone_number: str
+    experience_level: str = Field(..., description="Beginner, Intermediate, or Advanced")
+    course_interest: str = Field(..., description="Which SDET course tracks interest them")
+
+    @field_validator('name')
+    @classmethod
+    def validate_name(cls, v):
+        if NAME_INVALID_CHARS.search(v):
+            raise ValueError('Name contains invalid characters')
+        return v
+
+    @field_validator('phone_number')
+    @classmethod
+    def validate_phone(cls, v):
+        cleaned = PHONE_SEPARATORS.sub('', v)
+        if not PHONE_PATTERN.fullmatch(cleaned):
+            raise ValueError('Invalid phone number format')
+        return cleaned
+
+    @field_validator('experience_level')
+    @classmethod
+    def validate_experience(cls, v):
+        if v not in ALLOWED_EXPERIENCE_LEVELS:
+            raise ValueError(EXPERIENCE_LEVEL_ERROR)
+        return v
+
+
+class ContactForm(TimedModel):
+    name: ContactName
+    email: Email
+    message: Message
@@ -0,0 +1,242 @@
+"""Destinations for outbox notifications (see outbox.py).
+
+A sink has a unique ``name``, the event types it wants (``events``, None
+for all) and an async ``send(event)`` that raises when delivery failed, in
+which case the dispatcher retries it later. Sinks are configured from the
+environment:
+
+    NOTIFY_WEBHOOK_URL          POST each event as JSON to this URL
+    NOTIFY_WEBHOOK_SECRET       sign the body: X-Signature-256: sha256=<hmac>
+    NOTIFY_WEBHOOK_EVENTS       comma-separated event types (default: all)
+    NOTIFY_SMTP_HOST            send an email per event through this server
+    NOTIFY_SMTP_PORT            (default 587)
+    NOTIFY_SMTP_USERNAME / NOTIFY_SMTP_PASSWORD
+    NOTIFY_SMTP_STARTTLS        (default true)
+    NOTIFY_EMAIL_FROM / NOTIFY_EMAIL_TO (comma-separated)
+    NOTIFY_EMAIL_EVENTS         comma-separated event types (default: all)
+    NOTIFY_SHEETS_CONTACTS_WORKSHEET
+                                append contact messages to this worksheet of
+                                the enrollment spreadsheet (enrollments are
+                                already mirrored by sheets_sync.py)
+
+httpx and smtplib are imported on first delivery, not at start-up.
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+from datetime import datetime
+
+from serialization import dumps
+
+EVENT_SUBJECTS = {
+    "enrollment.created": "New enrollment: {name} ({course_interest})",
+    "contact.created": "New contact message from {name}",
+}
+CONTACT_COLUMNS = ["name", "email", "message", "submission_time"]
+
+
+class SinkError(Exception):
+    """Raised by a sink when the destination rejected or did not take the event"""
+
+
+def _event_list(value):
+    events = [event.strip() for event in (value or "").split(",") if event.strip()]
+    return frozenset(events) or None
+
+
+class Sink:
+    name = "sink"
+
+    def __init__(self, events=None):
+        self.events = frozenset(events) if events else None
+
+    def accepts(self, event_type):
+        return self.events is None or event_type in self.events
+
+    async def send(self, event):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class WebhookSink(Sink):
+    name = "webhook"
+
+    def __init__(self, url, secret=None, timeout=10.0, events=None):
+        super().__init__(events)
+        self.url = url
+        self.secret = secret.encode() if secret else None
+        self.timeout = timeout
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    async def send(self, event):
+        body = dumps(event)
+        headers = {
+            "Content-Type": "application/json",
+            "X-Event-Type": event["type"],
+            # Deliveries are at-least-once; receivers dedupe on this id
+            "X-Event-Id": event["id"],
+        }
+        if self.secret:
+            headers["X-Signature-256"] = "sha256=" + hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+        response = await self._get_client().post(self.url, content=body, headers=headers)
+        if response.status_code >= 300:
+            raise SinkError(f"Webhook answered {response.status_code}: {response.text[:200]}")
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def format_email(event, sender, recipients):
+    from email.message import EmailMessage
+
+    data = event["data"]
+    message = EmailMessage()
+    message["Subject"] = EVENT_SUBJECTS.get(event["type"], event["type"]).format_map(
+        {key: data.get(key, "") for key in ("name", "course_interest")})
+    message["From"] = sender
+    message["To"] = ", ".join(recipients)
+    if data.get("email"):
+        message["Reply-To"] = data["email"]
+    lines = []
+    for key, value in data.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        lines.append(f"{key.replace('_', ' ').capitalize()}: {value}")
+    message.set_content("\n".join(lines))
+    return message
+
+
+class SmtpSink(Sink):
+    name = "email"
+
+    def __init__(self, host, sender, recipients, port=587, username=None, password=None, starttls=True,
+                 timeout=10.0, events=None):
+        super().__init__(events)
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = list(recipients)
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def _send_message(self, message):
+        import smtplib
+
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            smtp.send_message(message)
+
+    async def send(self, event):
+        # smtplib blocks, so each delivery runs in a worker thread
+        await asyncio.to_thread(self._send_message, format_email(event, self.sender, self.recipients))
+
+
+class SheetsSink(Sink):
+    """Appends one row per event to a worksheet
+
+    ``worksheet_factory`` is called from a worker thread and returns the
+    worksheet, or None while Google Sheets is not configured.
+    """
+    name = "sheets"
+
+    def __init__(self, worksheet_factory, columns, events=None):
+        super().__init__(events)
+        self.worksheet_factory = worksheet_factory
+        self.columns = list(columns)
+
+    def _append(self, row):
+        worksheet = self.worksheet_factory()
+        if worksheet is None:
+            raise SinkError("Google Sheets is not configured")
+        worksheet.append_rows([row], value_input_option="RAW")
+
+    async def send(self, event):
+        row = []
+        for column in self.columns:
+            value = event["data"].get(column, "")
+            row.append(value.isoformat() if isinstance(value, datetime) else value)
+        await asyncio.to_thread(self._append, row)
+
+
+class MemorySink(Sink):
+    """Local stand-in sink that keeps delivered events in ``events_received``
+
+    ``fail_times`` makes the next N sends raise and ``delay`` makes each send
+    take that many seconds, for exercising retries and concurrency limits.
+    """
+
+    def __init__(self, name="memory", events=None, fail_times=0, delay=0.0):
+        super().__init__(events)
+        self.name = name
+        self.fail_times = fail_times
+        self.delay = delay
+        self.events_received = []
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send(self, event):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise SinkError(f"{self.name} is unavailable")
+            self.events_received.append(event)
+        finally:
+            self.in_flight -= 1
+
+
+def sinks_from_env(contacts_worksheet_factory=None):
+    """Sinks configured by NOTIFY_* environment variables
+
+    ``contacts_worksheet_factory(title)`` returns a worksheet handle; without
+    it the Sheets sink is not available.
+    """
+    sinks = []
+    webhook_url = os.environ.get('NOTIFY_WEBHOOK_URL')
+    if webhook_url:
+        sinks.append(WebhookSink(
+            webhook_url,
+            secret=os.environ.get('NOTIFY_WEBHOOK_SECRET'),
+            timeout=float(os.environ.get('NOTIFY_WEBHOOK_TIMEOUT_SECONDS', '10')),
+            events=_event_list(os.environ.get('NOTIFY_WEBHOOK_EVENTS'))
+        ))
+    smtp_host = os.environ.get('NOTIFY_SMTP_HOST')
+    recipients = [address.strip() for address in os.environ.get('NOTIFY_EMAIL_TO', '').split(',') if address.strip()]
+    if smtp_host and recipients:
+        sinks.append(SmtpSink(
+            smtp_host,
+            os.environ.get('NOTIFY_EMAIL_FROM', recipients[0]),
+            recipients,
+            port=int(os.environ.get('NOTIFY_SMTP_PORT', '587')),
+            username=os.environ.get('NOTIFY_SMTP_USERNAME'),
+            password=os.environ.get('NOTIFY_SMTP_PASSWORD'),
+            starttls=os.environ.get('NOTIFY_SMTP_STARTTLS', 'true').lower() in ('1', 'true', 'yes'),
+            events=_event_list(os.environ.get('NOTIFY_EMAIL_EVENTS'))
+        ))
+    worksheet = os.environ.get('NOTIFY_SHEETS_CONTACTS_WORKSHEET')
+    if worksheet and contacts_worksheet_factory is not None:
+        sinks.append(SheetsSink(lambda: contacts_worksheet_factory(worksheet), CONTACT_COLUMNS,
+                                events=("contact.created",)))
+    return sinks
@@ -0,0 +1,267 @@
+"""Transactional outbox for notifications about new enrollments and contacts.
+
+A submission carries its outbox record in an ``outbox`` field of the
+document itself, so the form data and the promise to notify someone are
+written by the same single-document insert: neither can exist without the
+other, no multi-document transaction (which needs a replica set and would
+abort whole write-buffer batches on expected duplicate keys) is involved,
+and a rejected duplicate submission never notifies twice.
+
+    "outbox": {
+        "event": "enrollment.created",
+        "state": "pending" | "delivered" | "dead",
+        "pending": ["webhook", "email"],   # sinks still to deliver to
+        "attempts": 0,
+        "next_attempt_at": <datetime>,
+        "claim": <token of the dispatcher working on it, or None>,
+        "errors": {sink: last error},
+    }
+
+``OutboxDispatcher`` claims due records in batches by stamping them with a
+claim token and pushing ``next_attempt_at`` out by the lease, so any number
+of dispatchers (one per worker process) can run side by side. It sends the
+events to the sinks with at most ``concurrency`` deliveries in flight, then
+marks the record delivered, or schedules the sinks that failed for a retry
+with exponential backoff. After ``max_attempts`` the record is marked dead
+and copied into the ``outbox_dead_letters`` collection. A dispatcher that
+stops mid-batch leaves its claims to expire, so delivery is at-least-once.
+
+Configured with OUTBOX_BATCH_SIZE, OUTBOX_CONCURRENCY, OUTBOX_POLL_SECONDS,
+OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BACKOFF_SECONDS, OUTBOX_LEASE_SECONDS and
+OUTBOX_SEND_TIMEOUT_SECONDS; sinks are listed in notification_sinks.py.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from metrics import OUTBOX_DEAD_LETTERS, OUTBOX_DELIVERIES, OUTBOX_DELIVERY_DURATION
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DELIVERED = "delivered"
+DEAD = "dead"
+
+OUTBOX_COLLECTIONS = ("enrollments", "contacts")
+DEAD_LETTER_COLLECTION = "outbox_dead_letters"
+# Stored alongside the submission but not part of the event payload
+INTERNAL_FIELDS = frozenset(("_id", "outbox", "dedup_key", "idempotency_key", "sheets_pending", "sheets_synced_at"))
+
+
+def make_event(collection, document):
+    return {
+        "id": document["id"],
+        "type": document["outbox"]["event"],
+        "collection": collection,
+        "data": {key: value for key, value in document.items() if key not in INTERNAL_FIELDS},
+    }
+
+
+class OutboxDispatcher:
+    def __init__(self, db, sinks, collections=OUTBOX_COLLECTIONS, batch_size=50, concurrency=8, poll_interval=5.0,
+                 max_attempts=8, retry_backoff=30.0, max_backoff=3600.0, lease_seconds=120.0, send_timeout=15.0):
+        self.db = db
+        self.sinks = {sink.name: sink for sink in sinks}
+        self.collections = collections
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.lease = timedelta(seconds=lease_seconds)
+        self.send_timeout = send_timeout
+        self.state = "stopped" if self.sinks else "disabled"
+        self.delivered = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.last_error = None
+        self._semaphore = None
+        self._wakeup = None
+        self._task = None
+
+    @classmethod
+    def from_env(cls, db, sinks):
+        return cls(
+            db,
+            sinks,
+            batch_size=int(os.environ.get('OUTBOX_BATCH_SIZE', '50')),
+            concurrency=int(os.environ.get('OUTBOX_CONCURRENCY', '8')),
+            poll_interval=float(os.environ.get('OUTBOX_POLL_SECONDS', '5')),
+            max_attempts=int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8')),
+            retry_backoff=float(os.environ.get('OUTBOX_RETRY_BACKOFF_SECONDS', '30')),
+            lease_seconds=float(os.environ.get('OUTBOX_LEASE_SECONDS', '120')),
+            send_timeout=float(os.environ.get('OUTBOX_SEND_TIMEOUT_SECONDS', '15'))
+        )
+
+    def attach(self, document, event_type):
+        """Add the outbox record for ``event_type`` to a document about to be inserted"""
+        pending = [name for name, sink in self.sinks.items() if sink.accepts(event_type)]
+        if pending:
+            document["outbox"] = {
+                "event": event_type,
+                "state": PENDING,
+                "pending": pending,
+                "attempts": 0,
+                "next_attempt_at": datetime.utcnow(),
+                "claim": None,
+                "errors": {},
+            }
+        return document
+
+    def start(self):
+        if not self.sinks or (self._task is not None and not self._task.done()):
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="outbox-dispatcher")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.state = "stopped"
+        for sink in self.sinks.values():
+            await sink.close()
+
+    def notify(self):
+        """Wake the dispatcher early after a submission was written"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def status(self):
+        return {
+            "state": self.state,
+            "sinks": sorted(self.sinks),
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "last_error": self.last_error,
+        }
+
+    async def claim(self, collection):
+        """Claim up to ``batch_size`` due records; returns the claimed documents"""
+        now = datetime.utcnow()
+        due = {"outbox.state": PENDING, "outbox.next_attempt_at": {"$lte": now}}
+        cursor = self.db[collection].find(due, {"_id": 0, "id": 1}) \
+            .sort("outbox.next_attempt_at", 1) \
+            .limit(self.batch_size)
+        ids = [doc["id"] async for doc in cursor]
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        # Re-checking ``due`` makes the claim atomic per document: a record
+        # another dispatcher claimed in the meantime is no longer due
+        await self.db[collection].update_many(
+            {"id": {"$in": ids}, **due},
+            {"$set": {"outbox.claim": token, "outbox.next_attempt_at": now + self.lease}}
+        )
+        return await self.db[collection].find({"id": {"$in": ids}, "outbox.claim": token}, {"_id": 0}) \
+            .to_list(len(ids))
+
+    async def dispatch_once(self):
+        """Deliver one batch per collection; returns the number of records handled"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        handled = 0
+        for collection in self.collections:
+            documents = await self.claim(collection)
+            if documents:
+                self.state = "dispatching"
+                await asyncio.gather(*(self._deliver(collection, document) for document in documents))
+                handled += len(documents)
+        return handled
+
+    async def _send(self, sink, event):
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(sink.send(event), self.send_timeout)
+            except Exception as e:
+                OUTBOX_DELIVERIES.inc(sink.name, "failed")
+                return f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            finally:
+                OUTBOX_DELIVERY_DURATION.observe(time.perf_counter() - start, sink.name)
+            OUTBOX_DELIVERIES.inc(sink.name, "delivered")
+            return None
+
+    async def _deliver(self, collection, document):
+        outbox = document["outbox"]
+        event = make_event(collection, document)
+        sinks = [self.sinks[name] for name in outbox["pending"] if name in self.sinks]
+        unknown = [name for name in outbox["pending"] if name not in self.sinks]
+        if unknown:
+            logging.warning(f"Outbox {collection}/{document['id']}: dropping unconfigured sinks {', '.join(unknown)}")
+        results = await asyncio.gather(*(self._send(sink, event) for sink in sinks))
+        errors = {sink.name: error for sink, error in zip(sinks, results) if error is not None}
+
+        now = datetime.utcnow()
+        claimed = {"id": document["id"], "outbox.claim": outbox["claim"]}
+        if not errors:
+            self.delivered += 1
+            await self.db[collection].update_one(claimed, {"$set": {
+                "outbox.state": DELIVERED, "outbox.pending": [], "outbox.claim": None, "outbox.delivered_at": now
+            }})
+            return
+
+        attempts = outbox["attempts"] + 1
+        self.last_error = next(iter(errors.values()))
+        if attempts >= self.max_attempts:
+            self.dead_lettered += 1
+            OUTBOX_DEAD_LETTERS.inc(collection)
+            logging.error(f"Outbox {collection}/{document['id']} dead-lettered after {attempts} attempts: {errors}")
+            await self.db[DEAD_LETTER_COLLECTION].insert_one({
+                "id": document["id"],
+                "collection": collection,
+                "event": event,
+                "sinks": sorted(errors),
+                "errors": errors,
+                "attempts": attempts,
+                "dead_at": now,
+            })
+            update = {"outbox.state": DEAD}
+        else:
+            self.retried += 1
+            delay = min(self.max_backoff, self.retry_backoff * (2 ** (attempts - 1))) * random.uniform(0.5, 1.0)
+            update = {"outbox.next_attempt_at": now + timedelta(seconds=delay)}
+        await self.db[collection].update_one(claimed, {"$set": {
+            **update,
+            "outbox.pending": sorted(errors),
+            "outbox.attempts": attempts,
+            "outbox.errors": {**outbox.get("errors", {}), **errors},
+            "outbox.claim": None,
+        }})
+
+    async def _run(self):
+        failures = 0
+        while True:
+            self._wakeup.clear()
+            try:
+                handled = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                self.last_error = str(e)
+                self.state = "backoff"
+                delay = min(self.max_backoff, self.poll_interval * (2 ** min(failures, 10))) * random.uniform(0.5, 1.0)
+                logging.error(f"Outbox dispatch failed (attempt {failures}), retrying in {delay:.1f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+
+            failures = 0
+            if handled >= self.batch_size:
+                # Probably more due records; keep going without waiting
+                continue
+            self.state = "idle"
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,161 @@
+"""Token-bucket rate limiting for the public form endpoints.
+
+Each client is limited by IP address and, for submissions that carry one,
+by normalized email address, so a bot rotating addresses from one host and
+a bot rotating hosts for one address are both throttled. Buckets live in a
+``RateLimitBackend``; the default ``MemoryBackend`` keeps them in this
+process, which means every worker enforces its own limit. A backend backed
+by a shared store (Redis, memcached) only has to implement ``acquire``.
+
+Per-IP limits need RATE_LIMIT_PROXY_HOPS, the number of reverse proxies
+in front of the app: 1 behind the Kubernetes ingress, 0 when clients
+connect directly. Without it, every client behind a proxy would share the
+proxy's address and one bucket, so IP limits stay off until it is set.
+"""
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+
+from idempotency import normalize_email
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(value):
+    """``"10/minute"`` -> (refill rate per second, burst size), or None for "off"/empty"""
+    value = (value or "").strip().lower()
+    if value in ("", "0", "off", "none"):
+        return None
+    try:
+        count, period = value.split("/")
+        count = int(count)
+        seconds = PERIODS[period.strip().rstrip("s")]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate '{value}', expected e.g. '10/minute'")
+    if count <= 0:
+        return None
+    return count / seconds, count
+
+
+class RateLimitBackend:
+    """Storage for token buckets"""
+
+    async def acquire(self, key, rate, burst, cost=1):
+        """Take ``cost`` tokens from the bucket ``key``.
+
+        Returns 0 when the tokens were taken, otherwise the number of seconds
+        until they will be available (nothing is taken in that case).
+        """
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """In-process buckets in a sharded dict with per-shard LRU eviction.
+
+    Sharding keeps every OrderedDict small, so eviction and the
+    move-to-end bookkeeping stay cheap when millions of addresses pass
+    through. An evicted client simply starts again with a full bucket.
+    """
+
+    def __init__(self, shards=16, max_keys=100_000, clock=time.monotonic):
+        self.shards = [OrderedDict() for _ in range(shards)]
+        self.max_keys_per_shard = max(1, max_keys // shards)
+        self.clock = clock
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def take(self, key, rate, burst, cost=1):
+        shard = self.shards[hash(key) % len(self.shards)]
+        now = self.clock()
+        bucket = shard.get(key)
+        if bucket is None:
+            tokens = burst
+            bucket = shard[key] = [tokens, now]
+            if len(shard) > self.max_keys_per_shard:
+                shard.popitem(last=False)
+        else:
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            shard.move_to_end(key)
+        if tokens >= cost:
+            bucket[0] = tokens - cost
+            bucket[1] = now
+            return 0.0
+        bucket[0] = tokens
+        bucket[1] = now
+        return (cost - tokens) / rate
+
+    async def acquire(self, key, rate, burst, cost=1):
+        return self.take(key, rate, burst, cost)
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after, scope):
+        super().__init__(f"Rate limit exceeded for {scope}, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.scope = scope
+
+    @property
+    def retry_after_header(self):
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class RateLimiter:
+    """Per-IP and per-email limits for one endpoint.
+
+    ``proxy_hops`` is the number of trusted reverse proxies in front of the
+    app; the client address is then taken from X-Forwarded-For at that
+    position from the right, since entries further left are client-supplied.
+    """
+
+    def __init__(self, name, backend, ip_rate=None, email_rate=None, proxy_hops=0):
+        self.name = name
+        self.backend = backend
+        self.ip_rate = ip_rate
+        self.email_rate = email_rate
+        self.proxy_hops = proxy_hops
+
+    @classmethod
+    def from_env(cls, name, backend):
+        """Limits from RATE_LIMIT_<NAME>_IP / _EMAIL, falling back to RATE_LIMIT_IP / _EMAIL"""
+        prefix = f"RATE_LIMIT_{name.upper()}_"
+        if os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('0', 'false', 'no'):
+            return cls(name, backend)
+        ip_rate = parse_rate(os.environ.get(prefix + 'IP', os.environ.get('RATE_LIMIT_IP', '20/minute')))
+        proxy_hops = os.environ.get('RATE_LIMIT_PROXY_HOPS', '').strip()
+        if ip_rate is not None and not proxy_hops:
+            logging.warning(f"Per-IP rate limit for {name} is off: set RATE_LIMIT_PROXY_HOPS "
+                            "(1 behind the ingress, 0 without a proxy) to enable it")
+            ip_rate = None
+        return cls(
+            name,
+            backend,
+            ip_rate=ip_rate,
+            email_rate=parse_rate(os.environ.get(prefix + 'EMAIL', os.environ.get('RATE_LIMIT_EMAIL', '5/minute'))),
+            proxy_hops=int(proxy_hops or '0'),
+        )
+
+    @property
+    def enabled(self):
+        return self.ip_rate is not None or self.email_rate is not None
+
+    def client_ip(self, headers, client):
+        if self.proxy_hops:
+            forwarded = headers.get("x-forwarded-for")
+            if forwarded:
+                hops = [hop.strip() for hop in forwarded.split(",")]
+                return hops[max(0, len(hops) - self.proxy_hops)]
+        return client.host if client else "unknown"
+
+    async def check(self, ip, email=None):
+        """Raise RateLimited if either the IP or the email bucket is empty"""
+        if self.ip_rate is not None:
+            retry_after = await self.backend.acquire(f"{self.name}:ip:{ip}", *self.ip_rate)
+            if retry_after:
+                raise RateLimited(retry_after, "ip")
+        if self.email_rate is not None and isinstance(email, str) and email:
+            retry_after = await self.backend.acquire(f"{self.name}:email:{normalize_email(email)}", *self.email_rate)
+            if retry_after:
+                raise RateLimited(retry_after, "email")
@@ -0,0 +1,63 @@
+"""JSON encoding of API responses.
+
+Responses are rendered with orjson, which encodes datetimes, UUIDs and
+dataclasses natively and is several times faster than the standard library
+encoder. Naive datetimes come out exactly as pydantic writes them
+(``2024-01-02T03:04:05.123000``), so switching encoders does not change any
+response body.
+
+FastAPI still runs ``jsonable_encoder`` and, with a ``response_model``,
+validates the returned data again before the response class sees it. A
+route whose data is already in the response shape (documents read with a
+projection, or a model it just built) can return ``trusted_response(...)``
+instead: FastAPI passes a returned Response through untouched, and
+``response_model`` remains in place for the OpenAPI schema.
+"""
+import time
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from metrics import SERIALIZATION_DURATION
+
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    """Types orjson does not encode itself"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    return orjson.dumps(content, default=_default, option=DUMPS_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content):
+        return dumps(content)
+
+
+class InstrumentedJSONResponse(FastJSONResponse):
+    """FastJSONResponse that records how long rendering the body takes"""
+
+    def render(self, content):
+        start = time.perf_counter()
+        body = dumps(content)
+        SERIALIZATION_DURATION.observe(time.perf_counter() - start)
+        return body
+
+
+def trusted_response(content, status_code=200, headers=None):
+    """Response for data that already matches the route's response_model
+
+    Skips FastAPI's re-validation and ``jsonable_encoder`` pass; only use it
+    for data the route built or projected itself.
+    """
+    return InstrumentedJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,184 @@
+"""Process-wide, lazily authorized Google Sheets client.
+
+gspread and google-auth take a large share of the app's import time and
+are not needed at all in demo mode, so they are imported on first use.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.file"
+]
+
+
+class SheetsUnavailable(Exception):
+    """Raised while the circuit breaker is open after repeated failures"""
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for ``reset_timeout`` seconds.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    every call fails fast. Once the timeout elapses a single trial call is
+    let through (half-open); success closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        return self.state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def service_account_configured():
+    """True when GOOGLE_SERVICE_ACCOUNT_FILE is set, i.e. outside demo mode"""
+    return bool(os.environ.get('GOOGLE_SERVICE_ACCOUNT_FILE'))
+
+
+def load_service_account_credentials():
+    """Load service account credentials from GOOGLE_SERVICE_ACCOUNT_FILE.
+
+    Returns None when no key file is configured, which keeps the Sheets
+    integration in demo mode.
+    """
+    if not service_account_configured():
+        return None
+    key_file = os.environ['GOOGLE_SERVICE_ACCOUNT_FILE']
+    from google.oauth2.service_account import Credentials
+
+    return Credentials.from_service_account_file(key_file, scopes=SCOPES)
+
+
+def gspread_authorize(credentials):
+    import gspread
+
+    return gspread.authorize(credentials)
+
+
+def refresh_credentials(credentials):
+    from google.auth.transport.requests import Request as GoogleAuthRequest
+
+    credentials.refresh(GoogleAuthRequest())
+
+
+class SheetsClientHolder:
+    """Holds one authorized gspread client and worksheet handle per process.
+
+    The client is built on first use, its access token is refreshed
+    ``refresh_margin`` seconds before it expires, and authorization failures
+    trip a circuit breaker so callers stop paying a network round trip per
+    attempt. ``status()`` only reads cached state.
+    """
+
+    def __init__(self, spreadsheet_id, credentials_loader=load_service_account_credentials,
+                 authorize=gspread_authorize, refresh_margin=300, breaker=None):
+        self.spreadsheet_id = spreadsheet_id
+        self.credentials_loader = credentials_loader
+        self.authorize = authorize
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.breaker = breaker or CircuitBreaker()
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._credentials = None
+        self._client = None
+        self._worksheets = {}
+        self._last_error = None
+
+    def _token_expiring(self):
+        expiry = getattr(self._credentials, "expiry", None)
+        if expiry is None:
+            return not getattr(self._credentials, "token", None)
+        return expiry - datetime.utcnow() <= self.refresh_margin
+
+    def _connect(self):
+        if not self._initialized:
+            self._credentials = self.credentials_loader()
+            self._initialized = True
+        if self._credentials is None:
+            return None
+        if self._client is None:
+            self._client = self.authorize(self._credentials)
+        if self._token_expiring():
+            refresh_credentials(self._credentials)
+        return self._client
+
+    def get_client(self):
+        """Return the authorized client, or None in demo mode"""
+        with self._lock:
+            if self._initialized and self._credentials is None:
+                return None
+            if not self.breaker.allow():
+                raise SheetsUnavailable(f"Google Sheets client unavailable after {self.breaker.failures} failures: {self._last_error}")
+            try:
+                client = self._connect()
+            except Exception as e:
+                self._client = None
+                self._worksheets = {}
+                self._last_error = str(e)
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            self._last_error = None
+            return client
+
+    def get_worksheet(self, title=None):
+        """Return the cached worksheet ``title`` (default: the first one) of the configured spreadsheet"""
+        client = self.get_client()
+        if client is None:
+            return None
+        with self._lock:
+            if title not in self._worksheets:
+                spreadsheet = client.open_by_key(self.spreadsheet_id)
+                self._worksheets[title] = spreadsheet.worksheet(title) if title else spreadsheet.sheet1
+            return self._worksheets[title]
+
+    def reset(self):
+        """Drop cached handles so the next call re-authorizes"""
+        with self._lock:
+            self._initialized = False
+            self._credentials = None
+            self._client = None
+            self._worksheets = {}
+
+    def status(self):
+        if self._initialized and self._credentials is None:
+            state = "demo_mode"
+        elif self.breaker.state != "closed":
+            state = "circuit_" + self.breaker.state
+        elif self._client is not None:
+            state = "connected"
+        else:
+            state = "not_initialized"
+        expiry = getattr(self._credentials, "expiry", None)
+        return {
+            "state": state,
+            "token_expires_at": expiry.isoformat() if expiry else None,
+            "consecutive_failures": self.breaker.failures,
+            "last_error": self._last_error,
+        }
@@ -0,0 +1,251 @@
+"""Background worker that mirrors new enrollments into Google Sheets."""
+import asyncio
+import logging
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+SYNC_STATE_ID = "google_sheets_enrollments"
+# Set on enrollments not yet in the sheet (see SheetsSyncWorker.attach)
+PENDING_FIELD = "sheets_pending"
+
+# Column order of the enrollment sheet
+ENROLLMENT_COLUMNS = [
+    "name",
+    "email",
+    "country",
+    "phone_number",
+    "experience_level",
+    "course_interest",
+    "submission_time",
+]
+
+
+def enrollment_to_row(doc):
+    """Convert an enrollment document into a sheet row"""
+    row = []
+    for column in ENROLLMENT_COLUMNS:
+        value = doc.get(column, "")
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        row.append(value)
+    return row
+
+
+class TokenBucket:
+    """Async token bucket used to stay under the Sheets write quota"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens=1):
+        while True:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class SheetsSyncWorker:
+    """Appends new enrollments to a sheet in batches.
+
+    ``attach`` flags each enrollment with ``sheets_pending`` before it is
+    inserted. The worker appends flagged documents oldest first and clears
+    the flag once the rows are in the sheet. The flag belongs to the
+    document, so a write that lands late (a write-buffer retry, a bulk-import
+    chunk) is still picked up, whatever its timestamp. ``worksheet_factory``
+    is called from a worker thread and returns the worksheet to append to,
+    or None while Sheets is not configured (demo mode). Pass
+    ``enabled=False`` in demo mode so ``attach`` does not flag documents
+    that would never be synced.
+
+    Every app process runs a worker, but only the one holding the lease in
+    ``sync_state`` appends; the others stand by and take over once the
+    lease has not been renewed for ``lease_seconds``. The lease must
+    outlast a slow append, or two workers may write the same batch.
+    """
+
+    def __init__(self, db, worksheet_factory, batch_size=200, poll_interval=5.0,
+                 requests_per_minute=60, max_backoff=300.0, lease_seconds=60.0, enabled=True):
+        self.db = db
+        self.worksheet_factory = worksheet_factory
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.lease = timedelta(seconds=lease_seconds)
+        self.owner = uuid.uuid4().hex
+        self.bucket = TokenBucket(rate=requests_per_minute / 60.0, capacity=max(1, requests_per_minute // 6))
+        self.state = "stopped"
+        self.queue_depth = 0
+        self.lag_seconds = 0.0
+        self.last_synced_at = None
+        self.last_error = None
+        self.failures = 0
+        self._executor = None
+        self._wakeup = None
+        self._task = None
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="sheets-sync")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.state = "stopped"
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        try:
+            await self.release_lease()
+        except Exception as e:
+            logging.error(f"Failed to release the Google Sheets sync lease: {str(e)}")
+
+    def notify(self):
+        """Wake the worker early after a new enrollment was written"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def status(self):
+        return {
+            "state": self.state,
+            "queue_depth": self.queue_depth,
+            "lag_seconds": round(self.lag_seconds, 3),
+            "last_synced_at": self.last_synced_at.isoformat() if self.last_synced_at else None,
+            "consecutive_failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+    async def acquire_lease(self):
+        """Take or renew the sync lease; False while another worker holds it"""
+        now = datetime.utcnow()
+        try:
+            await self.db.sync_state.update_one(
+                {"_id": SYNC_STATE_ID, "$or": [{"owner": self.owner}, {"lease_expires_at": {"$not": {"$gt": now}}}]},
+                {"$set": {"owner": self.owner, "lease_expires_at": now + self.lease}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The state document exists and the filter did not match: someone else's live lease
+            return False
+        return True
+
+    async def release_lease(self):
+        await self.db.sync_state.update_one(
+            {"_id": SYNC_STATE_ID, "owner": self.owner}, {"$set": {"lease_expires_at": datetime.utcnow()}}
+        )
+
+    def attach(self, document):
+        """Flag an enrollment about to be inserted for the next sync"""
+        if self.enabled:
+            document[PENDING_FIELD] = True
+        return document
+
+    async def fetch_pending(self):
+        cursor = self.db.enrollments.find({PENDING_FIELD: True}, {"_id": 0}) \
+            .sort([("submission_time", 1), ("id", 1)]) \
+            .limit(self.batch_size)
+        return await cursor.to_list(self.batch_size)
+
+    async def mark_synced(self, batch):
+        await self.db.enrollments.update_many(
+            {"id": {"$in": [doc["id"] for doc in batch]}},
+            {"$unset": {PENDING_FIELD: ""}, "$set": {"sheets_synced_at": datetime.utcnow()}}
+        )
+
+    async def refresh_backlog(self, oldest=None):
+        """Update the queue depth and lag figures reported by /api/health"""
+        self.queue_depth = await self.db.enrollments.count_documents({PENDING_FIELD: True})
+        if oldest is None and self.queue_depth:
+            oldest = await self.db.enrollments.find_one(
+                {PENDING_FIELD: True}, {"_id": 0, "submission_time": 1},
+                sort=[("submission_time", 1), ("id", 1)]
+            )
+        if self.queue_depth and oldest is not None:
+            self.lag_seconds = max(0.0, (datetime.utcnow() - oldest["submission_time"]).total_seconds())
+        else:
+            self.lag_seconds = 0.0
+
+    async def _in_thread(self, func):
+        # Created on demand so the worker can be started again after stop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets-sync")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func)
+
+    async def sync_once(self):
+        """Append at most one batch; returns the number of rows written"""
+        worksheet = await self._in_thread(self.worksheet_factory)
+        if worksheet is None:
+            self.state = "demo_mode"
+            return 0
+
+        if not await self.acquire_lease():
+            self.state = "standby"
+            await self.refresh_backlog()
+            return 0
+        batch = await self.fetch_pending()
+        await self.refresh_backlog(batch[0] if batch else None)
+        if not batch:
+            self.state = "idle"
+            return 0
+
+        rows = [enrollment_to_row(doc) for doc in batch]
+        await self.bucket.acquire()
+        self.state = "syncing"
+        await self._in_thread(lambda: worksheet.append_rows(rows, value_input_option="RAW"))
+
+        await self.mark_synced(batch)
+        self.last_synced_at = datetime.utcnow()
+        self.failures = 0
+        self.last_error = None
+        await self.refresh_backlog()
+        return len(rows)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                written = await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                self.state = "backoff"
+                delay = min(self.max_backoff, self.poll_interval * (2 ** min(self.failures, 10)))
+                delay *= random.uniform(0.5, 1.0)
+                logging.error(f"Google Sheets sync failed (attempt {self.failures}), retrying in {delay:.1f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                continue
+
+            if written == self.batch_size:
+                # Probably more backlog; keep going without waiting
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,451 @@
+"""Storage for enrollments, contacts and status checks behind one repository interface.
+
+Request handlers, the write buffer and the bulk importer use a
+``Repository`` per collection instead of Motor collections, so the API can
+run on one of three engines:
+
+    STORAGE_BACKEND=mongo    MongoDB through Motor (default)
+    STORAGE_BACKEND=sqlite   an embedded SQLite file (SQLITE_PATH), for
+                             small deployments without a MongoDB server
+    STORAGE_BACKEND=memory   process memory, for tests and benchmarks
+
+A repository stores plain dicts with a unique ``id`` and lists them in
+keyset order of (sort field, id): ``after`` is the (sort value, id) of the
+last document already seen. All engines enforce the same unique fields
+(missing or None values are not indexed, like MongoDB's sparse indexes)
+and report a violated one as pymongo's ``DuplicateKeyError``. Other
+failures are raised as ``StorageError``. Repositories never modify the
+documents handed to them.
+
+Sheets sync, notifications, persisted statistics and exports read MongoDB
+directly and are only available with the mongo backend.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from bisect import bisect_right, insort
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import NamedTuple
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError, WriteError
+
+from indexes import ensure_indexes
+
+BACKENDS = ("mongo", "sqlite", "memory")
+
+
+class CollectionSpec(NamedTuple):
+    sort_field: str
+    unique_fields: tuple
+
+
+COLLECTIONS = {
+    "enrollments": CollectionSpec("submission_time", ("id", "idempotency_key", "dedup_key")),
+    "contacts": CollectionSpec("submission_time", ("id",)),
+    "status_checks": CollectionSpec("timestamp", ("id",)),
+}
+
+
+class StorageError(Exception):
+    """Raised when the storage engine failed; the operation may succeed if retried"""
+
+
+def duplicate_key_error(collection, field, value):
+    return DuplicateKeyError(f"E11000 duplicate key error collection: {collection} index: {field} "
+                             f"dup key: {{ {field}: {value!r} }}", 11000)
+
+
+def _document_error(err):
+    """Turn one writeErrors entry into the error insert_one would have raised"""
+    error_class = DuplicateKeyError if err.get('code') == 11000 else WriteError
+    return error_class(err.get('errmsg'), err.get('code'), err)
+
+
+def _project(document, fields):
+    if fields is None:
+        return dict(document)
+    return {field: document[field] for field in fields if field in document}
+
+
+class Repository:
+    """Operations the API needs on one collection"""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+
+    def keyset(self, document):
+        return document[self.spec.sort_field], document["id"]
+
+    async def insert_many(self, documents):
+        """Insert what can be inserted; returns {index: error} for the documents that were not"""
+        raise NotImplementedError
+
+    async def insert_one(self, document):
+        failed = await self.insert_many([document])
+        if failed:
+            raise failed[0]
+
+    async def find_one(self, field, value, fields=None):
+        raise NotImplementedError
+
+    async def list(self, after=None, limit=100, fields=None):
+        """Up to ``limit`` documents following ``after`` in keyset order"""
+        raise NotImplementedError
+
+    async def iterate(self, after=None, limit=None, fields=None, batch_size=500):
+        """Yield the documents following ``after`` in keyset order, one page at a time"""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = batch_size if remaining is None else min(batch_size, remaining)
+            page = await self.list(after, page_size, fields=None)
+            for document in page:
+                yield _project(document, fields)
+            if len(page) < page_size:
+                return
+            after = self.keyset(page[-1])
+            if remaining is not None:
+                remaining -= len(page)
+
+    async def count(self, after=None):
+        raise NotImplementedError
+
+
+class MotorRepository(Repository):
+    def __init__(self, db, name, spec):
+        super().__init__(name, spec)
+        self.db = db
+        self.sort = [(spec.sort_field, 1), ("id", 1)]
+
+    def _query(self, after):
+        if after is None:
+            return {}
+        value, document_id = after
+        return {"$or": [
+            {self.spec.sort_field: {"$gt": value}},
+            {self.spec.sort_field: value, "id": {"$gt": document_id}}
+        ]}
+
+    @staticmethod
+    def _projection(fields):
+        return {"_id": 0, **{field: 1 for field in fields}} if fields is not None else {"_id": 0}
+
+    async def insert_many(self, documents):
+        try:
+            # Copies, because insert_many adds an _id to every document it is given
+            await self.db[self.name].insert_many([dict(document) for document in documents], ordered=False)
+        except BulkWriteError as e:
+            # Unordered inserts write every document they can; only the
+            # ones listed in writeErrors are missing.
+            return {err['index']: _document_error(err) for err in e.details.get('writeErrors', [])}
+        except PyMongoError as e:
+            raise StorageError(str(e)) from e
+        return {}
+
+    async def find_one(self, field, value, fields=None):
+        try:
+            return await self.db[self.name].find_one({field: value}, self._projection(fields))
+        except PyMongoError as e:
+            raise StorageError(str(e)) from e
+
+    async def list(self, after=None, limit=100, fields=None):
+        try:
+            return await self.db[self.name].find(self._query(after), self._projection(fields)) \
+                .sort(self.sort) \
+                .limit(limit) \
+                .to_list(limit)
+        except PyMongoError as e:
+            raise StorageError(str(e)) from e
+
+    async def iterate(self, after=None, limit=None, fields=None, batch_size=500):
+        # One cursor streamed in batches instead of a query per page
+        cursor = self.db[self.name].find(self._query(after), self._projection(fields)) \
+            .sort(self.sort) \
+            .batch_size(batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+        try:
+            async for document in cursor:
+                yield document
+        except PyMongoError as e:
+            raise StorageError(str(e)) from e
+
+    async def count(self, after=None):
+        try:
+            return await self.db[self.name].count_documents(self._query(after))
+        except PyMongoError as e:
+            raise StorageError(str(e)) from e
+
+
+class MemoryRepository(Repository):
+    def __init__(self, name, spec):
+        super().__init__(name, spec)
+        self.documents = {}  # id -> document
+        self.keys = []       # sorted (sort value, id)
+        self.unique = {field: {} for field in spec.unique_fields if field != "id"}
+
+    def _insert(self, document):
+        document_id = document["id"]
+        if document_id in self.documents:
+            raise duplicate_key_error(self.name, "id", document_id)
+        for field, values in self.unique.items():
+            value = document.get(field)
+            if value is not None and value in values:
+                raise duplicate_key_error(self.name, field, value)
+        stored = dict(document)
+        self.documents[document_id] = stored
+        insort(self.keys, self.keyset(stored))
+        for field, values in self.unique.items():
+            if stored.get(field) is not None:
+                values[stored[field]] = document_id
+
+    async def insert_many(self, documents):
+        failed = {}
+        for index, document in enumerate(documents):
+            try:
+                self._insert(document)
+            except DuplicateKeyError as e:
+                failed[index] = e
+        return failed
+
+    async def find_one(self, field, value, fields=None):
+        if field == "id":
+            document = self.documents.get(value)
+        elif field in self.unique:
+            document = self.documents.get(self.unique[field].get(value))
+        else:
+            document = next((d for d in self.documents.values() if d.get(field) == value), None)
+        return _project(document, fields) if document is not None else None
+
+    async def list(self, after=None, limit=100, fields=None):
+        start = bisect_right(self.keys, tuple(after)) if after is not None else 0
+        return [_project(self.documents[document_id], fields) for _, document_id in self.keys[start:start + limit]]
+
+    async def count(self, after=None):
+        return len(self.keys) - (bisect_right(self.keys, tuple(after)) if after is not None else 0)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_object(obj):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def _sort_key(value):
+    """Text that sorts like ``value``: fixed-width ISO for datetimes"""
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="microseconds")
+    return str(value)
+
+
+class SQLiteRepository(Repository):
+    """One table per collection: the unique fields and the sort key as columns, the document as JSON"""
+
+    def __init__(self, storage, name, spec):
+        super().__init__(name, spec)
+        self.storage = storage
+        self.extra_unique = [field for field in spec.unique_fields if field != "id"]
+        columns = ["id", "sort_key", *self.extra_unique, "document"]
+        self._insert_sql = f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+    def schema(self):
+        unique = "".join(f", {field} TEXT UNIQUE" for field in self.extra_unique)
+        return [
+            f"CREATE TABLE IF NOT EXISTS {self.name} (id TEXT PRIMARY KEY, sort_key TEXT NOT NULL{unique}, "
+            f"document TEXT NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS {self.name}_keyset ON {self.name} (sort_key, id)",
+        ]
+
+    def _row(self, document):
+        return (
+            document["id"],
+            _sort_key(document[self.spec.sort_field]),
+            *(document.get(field) for field in self.extra_unique),
+            json.dumps(document, default=_encode_value, separators=(",", ":")),
+        )
+
+    def _duplicate(self, error, document):
+        # "UNIQUE constraint failed: enrollments.dedup_key"
+        field = str(error).rsplit(".", 1)[-1]
+        field = field if field in self.spec.unique_fields else "id"
+        return duplicate_key_error(self.name, field, document.get(field))
+
+    def _insert_many(self, connection, rows, documents):
+        failed = {}
+        # One transaction per batch; a failed statement only undoes its own row
+        with connection:
+            for index, row in enumerate(rows):
+                try:
+                    connection.execute(self._insert_sql, row)
+                except sqlite3.IntegrityError as e:
+                    failed[index] = self._duplicate(e, documents[index])
+        return failed
+
+    async def insert_many(self, documents):
+        rows = [self._row(document) for document in documents]
+        return await self.storage.run(self._insert_many, rows, documents)
+
+    @staticmethod
+    def _decode(document, fields):
+        return _project(json.loads(document, object_hook=_decode_object), fields)
+
+    def _keyset_clause(self, after):
+        if after is None:
+            return "", ()
+        value, document_id = after
+        return " WHERE (sort_key, id) > (?, ?)", (_sort_key(value), document_id)
+
+    async def find_one(self, field, value, fields=None):
+        if field in self.spec.unique_fields:
+            sql, parameters = f"SELECT document FROM {self.name} WHERE {field} = ?", (value,)
+        else:
+            sql, parameters = f"SELECT document FROM {self.name} WHERE json_extract(document, ?) = ? LIMIT 1", \
+                (f"$.{field}", value)
+        rows = await self.storage.run(lambda connection: connection.execute(sql, parameters).fetchall())
+        return self._decode(rows[0][0], fields) if rows else None
+
+    async def list(self, after=None, limit=100, fields=None):
+        where, parameters = self._keyset_clause(after)
+        sql = f"SELECT document FROM {self.name}{where} ORDER BY sort_key, id LIMIT ?"
+        rows = await self.storage.run(lambda connection: connection.execute(sql, (*parameters, limit)).fetchall())
+        return [self._decode(document, fields) for document, in rows]
+
+    async def count(self, after=None):
+        where, parameters = self._keyset_clause(after)
+        sql = f"SELECT COUNT(*) FROM {self.name}{where}"
+        return (await self.storage.run(lambda connection: connection.execute(sql, parameters).fetchone()))[0]
+
+
+class Storage:
+    """The repositories of one engine, plus its lifecycle and health check"""
+    name = None
+
+    def __init__(self, repositories):
+        self.repositories = repositories
+        self.enrollments = repositories["enrollments"]
+        self.contacts = repositories["contacts"]
+        self.status_checks = repositories["status_checks"]
+
+    def __getitem__(self, collection):
+        return self.repositories[collection]
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def ping(self):
+        return {"status": "connected", "latency_ms": 0.0, "checked_at": datetime.utcnow().isoformat()}
+
+
+class MongoStorage(Storage):
+    name = "mongo"
+
+    def __init__(self, connection, db):
+        super().__init__({name: MotorRepository(db, name, spec) for name, spec in COLLECTIONS.items()})
+        self.connection = connection
+        self.db = db
+
+    async def open(self):
+        await self.connection.connect()
+        try:
+            await ensure_indexes(self.db)
+        except Exception as e:
+            logging.error(f"Failed to ensure MongoDB indexes: {str(e)}")
+
+    async def close(self):
+        self.connection.close()
+
+    async def ping(self):
+        return await self.connection.ping()
+
+
+class MemoryStorage(Storage):
+    name = "memory"
+
+    def __init__(self):
+        super().__init__({name: MemoryRepository(name, spec) for name, spec in COLLECTIONS.items()})
+
+
+class SQLiteStorage(Storage):
+    """SQLite file in WAL mode, used from one dedicated thread
+
+    WAL lets other processes (gunicorn workers) read while one writes, and
+    ``busy_timeout`` makes concurrent writers wait for each other instead
+    of failing. Batches from the write buffer are written in a single
+    transaction each.
+    """
+    name = "sqlite"
+
+    def __init__(self, path, busy_timeout_ms=5000):
+        super().__init__({name: SQLiteRepository(self, name, spec) for name, spec in COLLECTIONS.items()})
+        self.path = str(path)
+        self.busy_timeout_ms = busy_timeout_ms
+        self._connection = None
+        self._executor = None
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        with connection:
+            for repository in self.repositories.values():
+                for statement in repository.schema():
+                    connection.execute(statement)
+        return connection
+
+    async def open(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        if self._connection is None:
+            self._connection = await asyncio.get_running_loop().run_in_executor(self._executor, self._open)
+
+    async def run(self, function, *args):
+        if self._connection is None:
+            await self.open()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, self._connection, *args)
+        except sqlite3.IntegrityError:
+            raise
+        except sqlite3.Error as e:
+            raise StorageError(str(e)) from e
+
+    async def close(self):
+        if self._connection is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._connection.close)
+            self._connection = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def ping(self):
+        started = time.perf_counter()
+        try:
+            await self.run(lambda connection: connection.execute("SELECT 1").fetchone())
+            result = {"status": "connected"}
+        except StorageError as e:
+            result = {"status": "unreachable", "error": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["checked_at"] = datetime.utcnow().isoformat()
+        return result
+
+
+def make_storage(backend, mongo=None, db=None, sqlite_path=None):
+    if backend == "mongo":
+        return MongoStorage(mongo, db)
+    if backend == "sqlite":
+        return SQLiteStorage(sqlite_path)
+    if backend == "memory":
+        return MemoryStorage()
+    raise ValueError(f"STORAGE_BACKEND must be one of: {', '.join(BACKENDS)}")
@@ -0,0 +1,298 @@
+"""Structured logging that never blocks the event loop.
+
+``LogPipeline.install()`` replaces the root logger's handlers with a
+``DroppingQueueHandler``. The handler renders the message and attaches the
+request context, then puts the record on a bounded queue and returns. A
+``QueueListener`` thread formats records (one JSON object per line, or the
+old text format with LOG_FORMAT=text) and writes them to stderr. When stderr
+stalls and the queue fills up, new records are dropped and counted instead of
+blocking the request that logged them. The uvicorn and gunicorn loggers lose
+their own stream handlers and propagate to the queue as well, so access and
+server error logs cannot block the event loop either.
+
+The app's lifespan installs the pipeline and stops it on shutdown, which
+writes out what is queued and puts the previous handlers back. Under
+gunicorn that happens in each worker after the fork, so no writer thread is
+started in the preloaded master.
+
+``SamplingFilter`` stops a burst of errors from one call site (for example, a
+MongoDB outage failing every submission) from flooding the queue. Each call
+site may log ``burst`` warnings or errors per ``window`` seconds. The rest
+are dropped, and the next record that gets through carries a ``suppressed``
+count.
+
+``RequestContextMiddleware`` gives each request an id, taken from a valid
+X-Request-ID header or generated, and echoes it in the response. Records
+logged while the request is handled carry ``request_id``, ``method``,
+``route`` and ``latency_ms`` (time since the request started), plus any
+fields added with ``bind_log_context``, such as ``enrollment_id`` and
+``contact_id``.
+
+Environment: LOG_LEVEL, LOG_FORMAT (json|text), LOG_QUEUE_SIZE,
+LOG_SAMPLE_BURST, LOG_SAMPLE_WINDOW_SECONDS, LOG_REQUESTS (one record per
+request with status and latency, in addition to the server's access log).
+"""
+import atexit
+import contextvars
+import copy
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from metrics import LOG_RECORDS_DROPPED
+from serialization import dumps
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+MAX_REQUEST_ID_LENGTH = 128
+
+# Loggers uvicorn and gunicorn configure with handlers of their own
+SERVER_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access", "gunicorn.error", "gunicorn.access")
+
+# Attributes every LogRecord has; anything else was passed with extra= and is written out.
+# color_message is uvicorn's ANSI-coloured copy of the message.
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "color_message"}
+
+_log_context = contextvars.ContextVar("log_context", default=None)
+
+
+def bind_log_context(**fields):
+    """Add fields (enrollment_id=..., contact_id=...) to the current request's log records"""
+    context = _log_context.get()
+    if context is not None:
+        context["fields"].update(fields)
+
+
+def _request_id(headers):
+    for name, value in headers:
+        if name == b"x-request-id":
+            if 0 < len(value) <= MAX_REQUEST_ID_LENGTH and value.isascii() and value.decode().isprintable():
+                return value.decode()
+            break
+    return uuid.uuid4().hex
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware binding a request id and route to log records"""
+
+    def __init__(self, app, log_requests=False):
+        self.app = app
+        self.log_requests = log_requests
+        self.logger = logging.getLogger("api.requests")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _request_id(scope["headers"])
+        # A mutable dict, so fields bound inside the endpoint are visible to outer layers
+        context = {"request_id": request_id, "scope": scope, "start": time.perf_counter(), "fields": {}}
+        token = _log_context.set(context)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self.log_requests:
+                self.logger.info("request completed", extra={"status": status})
+            _log_context.reset(token)
+
+
+def _context_fields(context):
+    route = context["scope"].get("route")
+    return {
+        "request_id": context["request_id"],
+        "method": context["scope"]["method"],
+        "route": getattr(route, "path", None) or context["scope"]["path"],
+        "latency_ms": round((time.perf_counter() - context["start"]) * 1000, 2),
+        **context["fields"],
+    }
+
+
+class SamplingFilter(logging.Filter):
+    """Lets ``burst`` records per ``window`` seconds through from each call site
+
+    Only records at ``min_level`` and above are sampled.
+    """
+
+    def __init__(self, burst=20, window=10.0, min_level=logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.min_level = min_level
+        self.suppressed_total = 0
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.burst <= 0 or record.levelno < self.min_level:
+            return True
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site is not None else 0
+                self._sites[key] = [now, 1, 0]
+            elif site[1] < self.burst:
+                site[1] += 1
+                suppressed = 0
+            else:
+                site[2] += 1
+                self.suppressed_total += 1
+                LOG_RECORDS_DROPPED.inc("sampled")
+                return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking"""
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render the message now: its arguments may change after this call returns.
+        # exc_info stays as it is and is formatted by the listener thread.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        context = _log_context.get()
+        if context is not None:
+            for name, value in _context_fields(context).items():
+                if not hasattr(record, name):
+                    setattr(record, name, value)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc("queue_full")
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Shutdown only: wait for room rather than losing the stop signal
+        self.queue.put(self._sentinel)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: standard fields, request context and extra= fields"""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        try:
+            return dumps(entry).decode()
+        except TypeError:
+            return dumps({name: value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+                          for name, value in entry.items()}).decode()
+
+
+class LogPipeline:
+    def __init__(self, level=logging.INFO, log_format="json", queue_size=10000, sample_burst=20,
+                 sample_window=10.0, stream=None):
+        self.level = level
+        self.queue_size = queue_size
+        self.output = logging.StreamHandler(stream or sys.stderr)
+        self.output.setFormatter(JSONFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+        self.sampler = SamplingFilter(sample_burst, sample_window)
+        self.handler = DroppingQueueHandler(queue.Queue(queue_size))
+        self.handler.addFilter(self.sampler)
+        self.listener = None
+        self._saved = []
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+            log_format=os.environ.get('LOG_FORMAT', 'json').lower(),
+            queue_size=int(os.environ.get('LOG_QUEUE_SIZE', '10000')),
+            sample_burst=int(os.environ.get('LOG_SAMPLE_BURST', '20')),
+            sample_window=float(os.environ.get('LOG_SAMPLE_WINDOW_SECONDS', '10')),
+        )
+
+    def install(self):
+        """Route the root and server loggers through the queue and start the writer thread
+
+        Call it in the process that serves requests, after any fork.
+        """
+        if self.listener is not None:
+            return self
+        root = logging.getLogger()
+        server_loggers = [logging.getLogger(name) for name in SERVER_LOGGERS]
+        self._saved = [(logger, list(logger.handlers), logger.propagate, logger.level)
+                       for logger in (root, *server_loggers)]
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        for logger in server_loggers:
+            # A logger without handlers that does not propagate was switched
+            # off (uvicorn --no-access-log) and stays off
+            if logger.handlers:
+                for handler in list(logger.handlers):
+                    logger.removeHandler(handler)
+                logger.propagate = True
+        self.start()
+        atexit.register(self.stop)
+        return self
+
+    def start(self):
+        self.listener = _Listener(self.handler.queue, self.output, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        """Restore the previous handlers, write out what is queued and stop the writer thread"""
+        for logger, handlers, propagate, level in self._saved:
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+            for handler in handlers:
+                logger.addHandler(handler)
+            logger.propagate = propagate
+            logger.setLevel(level)
+        self._saved = []
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            atexit.unregister(self.stop)
+
+    def status(self):
+        return {
+            "queued": self.handler.queue.qsize(),
+            "queue_size": self.queue_size,
+            "dropped": self.handler.dropped,
+            "suppressed": self.sampler.suppressed_total,
+        }
@@ -0,0 +1,45 @@
+"""Gunicorn worker class for the API (see gunicorn.conf.py).
+
+Gunicorn kills a worker that is still running ``graceful_timeout`` seconds
+after SIGTERM, and the stock UvicornWorker waits for in-flight requests
+without a limit. The app's lifespan shutdown, which flushes the write
+buffer and the stats counters, would then never run. This worker gives
+in-flight requests all but ``SHUTDOWN_FLUSH_SECONDS`` of the grace period
+and cancels what is left, so the flush always gets its turn.
+
+It also sets ``app.state.draining`` as soon as the exit signal arrives, so
+/api/ready turns 503 for requests still arriving on open keep-alive
+connections while the worker drains.
+"""
+import os
+import sys
+
+from gunicorn.arbiter import Arbiter
+from uvicorn.server import Server
+from uvicorn.workers import UvicornWorker
+
+
+class DrainingServer(Server):
+    def handle_exit(self, sig, frame):
+        state = getattr(self.config.app, "state", None)
+        if state is not None:
+            state.draining = True
+        super().handle_exit(sig, frame)
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": "auto", "http": "auto", "lifespan": "on"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        reserve = float(os.environ.get('SHUTDOWN_FLUSH_SECONDS', '5'))
+        self.config.timeout_graceful_shutdown = max(1, int(self.cfg.graceful_timeout - reserve))
+
+    async def _serve(self):
+        # Same as UvicornWorker._serve, with DrainingServer
+        self.config.app = self.wsgi
+        server = DrainingServer(config=self.config)
+        self._install_sigquit_handler()
+        await server.serve(sockets=self.sockets)
+        if not server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
@@ -0,0 +1,174 @@
+"""In-process write buffer that batches form submissions into insert_many calls."""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+
+from pymongo.errors import DuplicateKeyError
+
+from storage import StorageError
+
+logger = logging.getLogger(__name__)
+
+# Ack modes: "durable" answers the request once the batch containing the
+# document has been written, "enqueue" answers as soon as it is queued.
+# Writes that can be rejected as duplicates must stay durable so the caller
+# sees the rejection (see ``submit``).
+ACK_DURABLE = "durable"
+ACK_ENQUEUE = "enqueue"
+ACK_MODES = (ACK_DURABLE, ACK_ENQUEUE)
+
+_STOP = object()
+
+
+class WriteBufferFull(Exception):
+    """Raised when the queue stays full for longer than the enqueue timeout."""
+
+
+class WriteBuffer:
+    """Coalesces single-document writes into unordered insert_many batches.
+
+    Batches go to the repositories of ``storage`` (see storage.py).
+
+    Group commit: the flusher writes whatever is queued (up to
+    ``max_batch_size``) as soon as it is idle, so a lone submission is
+    written at once. Submissions that arrive while a write is in flight
+    queue up and form the next batch. The queue is bounded so a slow
+    database pushes back on request handlers instead of growing memory
+    without limit.
+    """
+
+    def __init__(self, storage, max_batch_size=100, max_queue_size=5000,
+                 ack_mode=ACK_DURABLE, enqueue_timeout=1.0, max_retries=3, retry_backoff=0.1):
+        if ack_mode not in ACK_MODES:
+            raise ValueError(f"ack_mode must be one of: {', '.join(ACK_MODES)}")
+        self.storage = storage
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+        self.ack_mode = ack_mode
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue = None
+        self._task = None
+
+    @classmethod
+    def from_env(cls, storage):
+        """Build a buffer configured from WRITE_BUFFER_* environment variables"""
+        return cls(
+            storage,
+            max_batch_size=int(os.environ.get('WRITE_BUFFER_MAX_BATCH', '100')),
+            max_queue_size=int(os.environ.get('WRITE_BUFFER_QUEUE_SIZE', '5000')),
+            ack_mode=os.environ.get('WRITE_BUFFER_ACK_MODE', ACK_DURABLE).lower(),
+            enqueue_timeout=float(os.environ.get('WRITE_BUFFER_ENQUEUE_TIMEOUT_MS', '1000')) / 1000,
+        )
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        """Start the background flusher on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run(), name="write-buffer-flusher")
+
+    async def close(self):
+        """Flush everything still queued and stop the flusher"""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, collection, document, durable=False):
+        """Queue ``document`` for insertion into ``collection``.
+
+        In durable mode, or with ``durable=True`` whatever the mode, this
+        returns once the document is written and raises the write error if
+        it could not be. Outside of a running event loop lifecycle (scripts,
+        tests) the document is written directly.
+        """
+        if not self.running:
+            await self.storage[collection].insert_one(document)
+            return
+
+        future = None
+        if durable or self.ack_mode == ACK_DURABLE:
+            future = asyncio.get_running_loop().create_future()
+
+        try:
+            await asyncio.wait_for(self._queue.put((collection, document, future)), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            raise WriteBufferFull(f"Write buffer full ({self.max_queue_size} pending writes)")
+
+        if future is not None:
+            await future
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            # Take what queued up during the previous write; never wait for more
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is _STOP:
+                    # Drain whatever is still queued behind the stop marker
+                    stopping = True
+                    continue
+                batch.append(item)
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # Keep the flusher alive; callers waiting on this batch get the error
+                logging.error(f"Write buffer flush failed: {str(e)}")
+                for _, _, future in batch:
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+
+    async def _flush(self, batch):
+        by_collection = defaultdict(list)
+        for collection, document, future in batch:
+            by_collection[collection].append((document, future))
+        for collection, entries in by_collection.items():
+            await self._write(collection, entries)
+
+    async def _write(self, collection, entries):
+        documents = [document for document, _ in entries]
+        failed = {}
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Unordered: every document that can be written is written
+                failed = await self.storage[collection].insert_many(documents)
+                break
+            except StorageError as e:
+                failed = {index: e for index in range(len(entries))}
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+            except Exception as e:
+                # Not a transient storage error; retrying would not help
+                failed = {index: e for index in range(len(entries))}
+                break
+
+        if failed and not all(isinstance(err, DuplicateKeyError) for err in failed.values()):
+            # Duplicate keys are expected (idempotent resubmits) and handled by the caller
+            logging.error(f"Write buffer failed to insert {len(failed)} of {len(entries)} documents into {collection}: {next(iter(failed.values()))}")
+
+        for index, (_, future) in enumerate(entries):
+            if future is None or future.done():
+                continue
+            if index in failed:
+                future.set_exception(failed[index])
+            else:
+                future.set_result(None)
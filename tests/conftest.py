@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# The backend modules are imported as top-level modules, the same way
+# uvicorn loads server.py from the backend directory.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "sdet_course_test")
@@ -0,0 +1,103 @@
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+# server reads its configuration at import time
+with pytest.MonkeyPatch.context() as env:
+    env.setenv("STORAGE_BACKEND", "memory")
+    env.setenv("RATE_LIMIT_ENABLED", "false")
+    import server
+
+
+def run_requests(scenario):
+    """Run ``scenario(client)`` against the app with its lifespan started"""
+    async def main():
+        async with server.app.router.lifespan_context(server.app):
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client)
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("query", ["min_weeks=nan", "max_weeks=inf", "min_weeks=-Infinity&max_weeks=8"])
+def test_filter_rejects_non_finite_week_bounds(query):
+    async def scenario(client):
+        return await client.get(f"/api/courses/filter?{query}")
+
+    response = run_requests(scenario)
+    assert response.status_code == 422
+    assert "must be a finite number" in response.json()["detail"]
+
+
+def test_filter_accepts_finite_week_bounds():
+    async def scenario(client):
+        return await client.get("/api/courses/filter?min_weeks=0&max_weeks=1e3")
+
+    response = run_requests(scenario)
+    assert response.status_code == 200
+    assert response.json()["total_courses"] == len(server.catalog.index.courses)
+
+
+def add_status_checks(count, timestamps):
+    """Insert status checks straight into storage; several share each timestamp"""
+    async def insert():
+        docs = [{"id": f"check-{i:03d}", "client_name": f"client {i}", "timestamp": timestamps[i % len(timestamps)]}
+                for i in range(count)]
+        await server.storage.status_checks.insert_many(docs)
+        return sorted(docs, key=lambda doc: (doc["timestamp"], doc["id"]))
+
+    return insert()
+
+
+def test_status_cursor_round_trip():
+    doc = {"id": "check-001", "timestamp": datetime(2025, 1, 2, 3, 4, 5, 678)}
+    cursor = server.encode_status_cursor(doc)
+    assert "=" not in cursor
+    assert server.decode_status_cursor(cursor) == (doc["timestamp"], doc["id"])
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 7])
+def test_status_pages_follow_the_cursor_through_timestamp_ties(page_size):
+    async def scenario(client):
+        start = datetime(2025, 1, 1)
+        expected = await add_status_checks(7, [start, start + timedelta(seconds=1), start])
+        seen, pages, cursor = [], 0, None
+        while True:
+            params = {"limit": page_size}
+            if cursor:
+                params["after"] = cursor
+            response = await client.get("/api/status", params=params)
+            assert response.status_code == 200
+            seen.extend(doc["id"] for doc in response.json())
+            pages += 1
+            cursor = response.headers.get("x-next-cursor")
+            if cursor is None:
+                break
+        streamed = await client.get("/api/status", params={"format": "ndjson", "after": server.encode_status_cursor(expected[2])})
+        return expected, seen, pages, streamed
+
+    expected, seen, pages, streamed = run_requests(scenario)
+    ids = [doc["id"] for doc in expected]
+    assert seen == ids
+    assert pages == -(-len(ids) // page_size)
+    assert [json.loads(line)["id"] for line in streamed.text.splitlines()] == ids[3:]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"no separator").decode(),
+    base64.urlsafe_b64encode(b"yesterday|check-001").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe|x").decode(),
+])
+def test_malformed_status_cursor_is_rejected(cursor):
+    async def scenario(client):
+        return await client.get("/api/status", params={"after": cursor})
+
+    response = run_requests(scenario)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from bulk_import import BulkImportError, EnrollmentImporter, split_records
+from storage import MemoryStorage
+
+HEADER = "Name,Email,Country,Phone Number,Experience Level,Course Interest,Notes\n"
+
+
+def row(i, email=None, notes=""):
+    return f'Student {i},{email or f"s{i}@example.com"},India,+911234567890,Beginner,Selenium,{notes}\n'
+
+
+# Line 1 header, line 2 a plain row, lines 3-5 one row whose quoted notes
+# span three lines, line 6 an invalid row, lines 7-8 a quoted "" escape
+# across a newline, line 9 another invalid row
+CSV_UPLOAD = (
+    HEADER
+    + row(1)
+    + row(2, notes='"first line\nsecond, with a comma\nthird ""quoted"""')
+    + row(3, email="not-an-email")
+    + row(4, notes='"say ""hi""\nthere"')
+    + row(5, email="also-bad")
+)
+
+
+def chunked(data, size):
+    async def chunks():
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
+
+    return chunks()
+
+
+def run_import(data, fmt, chunk_bytes, **kwargs):
+    async def scenario():
+        storage = MemoryStorage()
+        await storage.open()
+
+        def make_document(form):
+            return dict(form.model_dump(), id=str(uuid.uuid4()), submission_time=None)
+
+        importer = EnrollmentImporter(storage.enrollments, fmt, make_document, **kwargs)
+        report = await importer.run(chunked(data, chunk_bytes))
+        return report.to_dict(), sorted(doc["name"] for doc in storage.enrollments.documents.values())
+
+    return asyncio.run(scenario())
+
+
+def test_split_records_keeps_quoted_newlines_in_the_remainder():
+    assert split_records('a,b\n"c\nd",e\nf', quoted=True) == ('a,b\n"c\nd",e\n', "f")
+    assert split_records('a,b\n"c\nd', quoted=True) == ("a,b\n", '"c\nd')
+    # An escaped quote ("") does not close the field
+    assert split_records('"say ""hi""\n', quoted=True) == ("", '"say ""hi""\n')
+    assert split_records('"say ""hi"""\n', quoted=True) == ('"say ""hi"""\n', "")
+
+
+def test_split_records_ndjson_ignores_quotes():
+    assert split_records('{"a": "\\""}\n{"b"', quoted=False) == ('{"a": "\\""}\n', '{"b"')
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 3, 16, 61, 4096])
+def test_csv_records_spanning_chunks_and_lines(chunk_bytes):
+    report, names = run_import(CSV_UPLOAD.encode(), "csv", chunk_bytes, chunk_size=2)
+    assert report["total_rows"] == 5
+    assert report["inserted"] == 3
+    assert names == ["Student 1", "Student 2", "Student 4"]
+    # Physical line numbers of the rows, counting the lines inside quoted fields
+    assert [error["line"] for error in report["errors"]] == [6, 9]
+    assert all(error["errors"][0]["field"] == "email" for error in report["errors"])
+
+
+def test_csv_without_trailing_newline_and_with_bom():
+    data = ("\ufeff" + HEADER + row(1) + row(2, email="bad")).rstrip("\n").encode()
+    report, names = run_import(data, "csv", 7)
+    assert names == ["Student 1"]
+    assert report["errors"][0]["line"] == 3
+
+
+def test_csv_blank_lines_are_counted_but_skipped():
+    report, _ = run_import((HEADER + "\n" + row(1) + "\n\n" + row(2, email="bad")).encode(), "csv", 5)
+    assert report["total_rows"] == 2
+    assert report["errors"][0]["line"] == 6
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 10, 4096])
+def test_ndjson_line_numbers(chunk_bytes):
+    records = [
+        {"name": "Student 1", "email": "s1@example.com", "country": "India", "phone_number": "+911234567890",
+         "experience_level": "Beginner", "course_interest": "Selenium", "notes": "line\u2028separator"},
+        "not an object",
+    ]
+    data = "\n".join(json.dumps(record) for record in records) + "\n\n{broken\n"
+    report, names = run_import(data.encode(), "ndjson", chunk_bytes)
+    assert names == ["Student 1"]
+    assert [error["line"] for error in report["errors"]] == [2, 4]
+    assert report["errors"][0]["errors"][0]["message"] == "Each line must be a JSON object"
+    assert report["errors"][1]["errors"][0]["message"].startswith("Invalid JSON")
+
+
+@pytest.mark.parametrize("chunk_bytes", [16, 4096])
+def test_oversized_record_is_rejected(chunk_bytes):
+    data = (HEADER + row(1) + '"' + "x" * 200).encode()
+    with pytest.raises(BulkImportError, match="Record starting after line 2 exceeds 100 characters"):
+        run_import(data, "csv", chunk_bytes, max_record_chars=100)
+
+
+def test_invalid_utf8_is_rejected():
+    with pytest.raises(BulkImportError, match="not valid UTF-8"):
+        run_import(HEADER.encode() + b"\xff\xfe\n", "csv", 4096)
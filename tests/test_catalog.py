@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from catalog import CatalogError, CatalogReloader, load_catalog
+
+COURSES = [
+    {"id": "selenium", "title": "Selenium WebDriver", "description": "Browser automation",
+     "duration": "4 weeks", "level": "Beginner", "features": ["Element locators"]},
+    {"id": "api", "title": "API Testing", "description": "REST services",
+     "duration": "5 weeks", "level": "Intermediate", "features": ["REST API testing"]},
+]
+
+YAML_CATALOG = """
+- id: selenium
+  title: Selenium WebDriver
+  description: Browser automation
+  duration: 4 weeks
+  level: Beginner
+  features: [Element locators]
+- id: api
+  title: API Testing
+  description: REST services
+  duration: 5 weeks
+  level: Intermediate
+  features:
+    - REST API testing
+"""
+
+
+def write(path, text, bump=0):
+    path.write_text(text, encoding="utf-8")
+    # Make sure the reloader sees a new version even within one mtime tick
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 1_000_000_000))
+
+
+def test_loads_json_catalog(tmp_path):
+    path = tmp_path / "courses.json"
+    write(path, json.dumps(COURSES))
+    assert load_catalog(path) == COURSES
+
+
+@pytest.mark.parametrize("suffix", [".yaml", ".yml"])
+def test_loads_yaml_catalog(tmp_path, suffix):
+    pytest.importorskip("yaml")
+    path = tmp_path / f"courses{suffix}"
+    write(path, YAML_CATALOG)
+    assert load_catalog(path) == COURSES
+
+
+@pytest.mark.parametrize("text,message", [
+    ("{not json", "Invalid JSON"),
+    (json.dumps({"id": "selenium"}), "must be a list"),
+    (json.dumps([{"id": "selenium", "title": "Selenium"}]), "missing description, duration, level"),
+    (json.dumps([dict(COURSES[0], features="Element locators")]), "features must be a list of strings"),
+    (json.dumps([COURSES[0], COURSES[0]]), "Duplicate course id selenium"),
+])
+def test_invalid_catalog_is_rejected(tmp_path, text, message):
+    path = tmp_path / "courses.json"
+    write(path, text)
+    with pytest.raises(CatalogError, match=message):
+        load_catalog(path)
+
+
+def test_missing_file_is_a_catalog_error(tmp_path):
+    with pytest.raises(CatalogError, match="Cannot read"):
+        CatalogReloader(tmp_path / "missing.json").load()
+
+
+def test_reload_swaps_in_a_new_index(tmp_path):
+    async def scenario():
+        path = tmp_path / "courses.json"
+        write(path, json.dumps(COURSES[:1]))
+        reloader = CatalogReloader(path)
+        old = reloader.load()
+        assert not await reloader.reload_if_changed()
+
+        write(path, json.dumps(COURSES), bump=1)
+        assert await reloader.reload_if_changed()
+        return old, reloader
+
+    old, reloader = asyncio.run(scenario())
+    assert reloader.index is not old
+    assert [c["id"] for c in reloader.index.courses] == ["selenium", "api"]
+    # A request still holding the old snapshot sees it unchanged
+    assert [c["id"] for c in old.courses] == ["selenium"]
+    assert json.loads(old.courses_body.body)["total_courses"] == 1
+    assert reloader.status()["courses"] == 2
+    assert reloader.status()["last_error"] is None
+
+
+def test_invalid_reload_keeps_the_previous_index(tmp_path):
+    async def scenario():
+        path = tmp_path / "courses.json"
+        write(path, json.dumps(COURSES))
+        reloader = CatalogReloader(path)
+        live = reloader.load()
+
+        write(path, json.dumps([COURSES[0], COURSES[0]]), bump=1)
+        assert not await reloader.reload_if_changed()
+        assert reloader.index is live
+        assert "Duplicate course id" in reloader.status()["last_error"]
+
+        # Once the file is fixed the next poll picks it up
+        write(path, json.dumps(COURSES[1:]), bump=2)
+        assert await reloader.reload_if_changed()
+        return live, reloader
+
+    live, reloader = asyncio.run(scenario())
+    assert reloader.index is not live
+    assert [c["id"] for c in reloader.index.courses] == ["api"]
+    assert reloader.status()["last_error"] is None
@@ -0,0 +1,139 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from compression import CompressedBodyCache, CompressionMiddleware
+from http_cache import PreparedBody
+
+LARGE = {"data": [{"id": i, "title": f"Course {i}"} for i in range(200)]}
+
+
+async def large(request):
+    return JSONResponse(LARGE)
+
+
+async def small(request):
+    return JSONResponse({"status": "ok"})
+
+
+async def cacheable(request):
+    return JSONResponse(LARGE, headers={"ETag": '"v1"', "Cache-Control": "public, max-age=60"})
+
+
+async def prepared(request):
+    return PreparedBody(json.dumps(LARGE).encode()).response(request, "no-cache")
+
+
+async def stream(request):
+    async def lines():
+        for item in LARGE["data"]:
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"Content-Length": "999"})
+
+
+async def not_modified(request):
+    return Response(status_code=304, headers={"ETag": '"v1"'})
+
+
+async def binary(request):
+    return Response(b"\x00" * 4096, media_type="application/octet-stream")
+
+
+def make_app(**kwargs):
+    routes = [Route(f"/{handler.__name__}", handler, methods=["GET", "HEAD"])
+              for handler in (large, small, cacheable, prepared, stream, not_modified, binary)]
+    return CompressionMiddleware(Starlette(routes=routes), **kwargs)
+
+
+def request(app, path, accept_encoding, method="GET"):
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, headers={"Accept-Encoding": accept_encoding})
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("accept_encoding,coding", [("gzip", "gzip"), ("gzip, br", "br"), ("br;q=0, gzip", "gzip")])
+def test_large_json_is_compressed_with_the_negotiated_coding(accept_encoding, coding):
+    if coding == "br":
+        pytest.importorskip("brotli")
+    response = request(make_app(), "/large", accept_encoding)
+    assert response.headers["content-encoding"] == coding
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(json.dumps(LARGE))
+    assert response.json() == LARGE
+
+
+def test_identity_small_and_binary_responses_pass_through():
+    app = make_app()
+    for path, accept_encoding in (("/large", "identity"), ("/small", "gzip"), ("/binary", "gzip")):
+        response = request(app, path, accept_encoding)
+        assert "content-encoding" not in response.headers, path
+    assert request(app, "/large", "gzip", method="HEAD").headers.get("content-encoding") is None
+
+
+def test_precompressed_and_304_responses_are_untouched():
+    app = make_app()
+    response = request(app, "/prepared", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert not response.headers["etag"].endswith('-gzip-gzip"')
+    assert response.json() == LARGE
+
+    response = request(app, "/not_modified", "gzip")
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"v1"'
+    assert "content-encoding" not in response.headers
+
+
+def test_streamed_responses_are_compressed_chunk_by_chunk():
+    response = request(make_app(), "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert [json.loads(line) for line in response.text.splitlines()] == LARGE["data"]
+
+
+def test_cacheable_bodies_are_compressed_once():
+    app = make_app()
+    first = request(app, "/cacheable", "gzip")
+    assert first.headers["etag"] == '"v1-gzip"'
+    assert len(app.cache._entries) == 1
+    size = app.cache.size
+
+    second = request(app, "/cacheable", "gzip")
+    assert second.json() == LARGE
+    assert (len(app.cache._entries), app.cache.size) == (1, size)
+    # Uncacheable responses never enter the cache
+    request(app, "/large", "gzip")
+    assert len(app.cache._entries) == 1
+
+
+def test_compressed_body_cache_is_bounded_in_bytes():
+    cache = CompressedBodyCache(max_bytes=10)
+    cache.put("a", b"1234")
+    cache.put("b", b"5678")
+    assert cache.get("a") == b"1234"  # now most recently used
+    cache.put("c", b"90ab")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    assert cache.size == 8
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None
+
+
+def test_gzip_output_is_a_plain_gzip_stream():
+    async def main():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as response:
+                return b"".join([chunk async for chunk in response.aiter_raw()])
+
+    assert json.loads(gzip.decompress(asyncio.run(main()))) == LARGE
@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from cors import CORSMiddleware, parse_origins
+
+ORIGIN = "https://app.example"
+
+
+async def courses(request):
+    return JSONResponse({"status": "success"})
+
+
+def make_app(**kwargs):
+    options = dict(allow_origins=parse_origins(f"{ORIGIN}, https://admin.example"),
+                   allow_methods=["GET", "POST"], allow_headers=["Content-Type"], allow_credentials=True)
+    options.update(kwargs)
+    return CORSMiddleware(Starlette(routes=[Route("/api/courses", courses)]), **options)
+
+
+def send(app, method, headers):
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, "/api/courses", headers=headers)
+
+    return asyncio.run(main())
+
+
+def preflight(app, origin=ORIGIN, method="POST", request_headers="content-type"):
+    headers = {"Origin": origin, "Access-Control-Request-Method": method}
+    if request_headers:
+        headers["Access-Control-Request-Headers"] = request_headers
+    return send(app, "OPTIONS", headers)
+
+
+def test_parse_origins():
+    assert parse_origins(" https://a.example, ,https://b.example ") == {"https://a.example", "https://b.example"}
+    assert parse_origins("*") == {"*"}
+
+
+def test_preflight_is_answered_with_max_age():
+    response = preflight(make_app())
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert response.headers["access-control-max-age"] == "7200"
+    assert "POST" in response.headers["access-control-allow-methods"]
+
+
+def test_disallowed_preflights_are_rejected():
+    app = make_app()
+    assert preflight(app, origin="https://evil.example").status_code == 400
+    assert preflight(app, method="DELETE").status_code == 400
+    assert preflight(app, request_headers="x-secret").status_code == 400
+
+
+def test_preflight_answers_are_cached_per_origin_method_and_headers():
+    app = make_app()
+    first = preflight(app)
+    second = preflight(app)
+    assert len(app._preflights) == 1
+    assert first.headers.raw == second.headers.raw
+    preflight(app, origin="https://admin.example")
+    preflight(app, origin="https://evil.example")
+    assert len(app._preflights) == 3
+    # Cached rejections are still rejections
+    assert preflight(app, origin="https://evil.example").status_code == 400
+
+
+def test_cached_headers_are_copied_for_each_response():
+    app = make_app()
+    headers = {"origin": ORIGIN, "access-control-request-method": "GET"}
+    app.preflight_response(headers).raw_headers.append((b"x-added", b"1"))
+    assert b"x-added" not in dict(app.preflight_response(headers).raw_headers)
+
+
+def test_preflight_cache_is_bounded():
+    app = make_app(preflight_cache_size=2)
+    preflight(app, request_headers=None)
+    preflight(app, method="GET")
+    preflight(app)
+    assert len(app._preflights) == 2
+    assert (ORIGIN, "POST", None) not in app._preflights
+
+
+def test_simple_requests_get_the_allowed_origin():
+    app = make_app()
+    assert send(app, "GET", {"Origin": ORIGIN}).headers["access-control-allow-origin"] == ORIGIN
+    assert "access-control-allow-origin" not in send(app, "GET", {"Origin": "https://evil.example"}).headers
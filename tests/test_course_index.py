@@ -0,0 +1,125 @@
+import itertools
+import json
+from pathlib import Path
+
+import pytest
+
+import course_index
+from course_index import CourseIndex, parse_duration_weeks
+
+CATALOG = json.loads((Path(__file__).parent.parent / "backend" / "courses.json").read_text())
+
+# Extra modules for units and casing the shipped catalog does not use
+EXTRA = [
+    {"id": "x1", "title": "Intro", "level": "beginner", "duration": "10 days", "features": ["rest api testing"]},
+    {"id": "x2", "title": "Deep dive", "level": "ADVANCED", "duration": "2 months", "features": ["CI/CD integration"]},
+    {"id": "x3", "title": "Self paced", "level": "Intermediate", "duration": "Self-paced", "features": []},
+]
+COURSES = CATALOG + EXTRA
+
+
+def linear_filter(courses, level=None, duration=None, min_weeks=None, max_weeks=None, features=None):
+    """The original list-comprehension filter, extended to week ranges and features"""
+    result = list(courses)
+    if level:
+        result = [c for c in result if c["level"].lower() == level.lower()]
+    if duration:
+        result = [c for c in result if duration.lower() in c["duration"].lower()]
+    if min_weeks is not None or max_weeks is not None:
+        def in_range(course):
+            weeks = parse_duration_weeks(course["duration"])
+            return weeks is not None and (min_weeks is None or weeks >= min_weeks) \
+                and (max_weeks is None or weeks <= max_weeks)
+        result = [c for c in result if in_range(c)]
+    for feature in features or ():
+        result = [c for c in result if feature.lower() in (f.lower() for f in c.get("features", []))]
+    return result
+
+
+def test_parse_duration_weeks():
+    assert parse_duration_weeks("6 weeks") == 6
+    assert parse_duration_weeks("14 days") == 2
+    assert parse_duration_weeks("3 Months") == 13
+    assert parse_duration_weeks("Self-paced") is None
+    assert parse_duration_weeks(None) is None
+
+
+@pytest.mark.parametrize("level", [None, "Beginner", "advanced", "INTERMEDIATE", "Expert"])
+@pytest.mark.parametrize("duration", [None, "4 weeks", "week", "DAYS", "month", "9 weeks"])
+def test_level_and_duration_match_the_linear_filter(level, duration):
+    index = CourseIndex(COURSES)
+    assert index.filter(level, duration) == linear_filter(COURSES, level, duration)
+
+
+# Boundaries sit exactly on catalog durations (4, 5, 6, 8 weeks, 10 days, 2 months)
+WEEK_BOUNDS = [None, 0, 10 / 7, 4, 4.5, 5, 6, 8, 104 / 12, 100]
+
+
+@pytest.mark.parametrize("min_weeks,max_weeks", list(itertools.product(WEEK_BOUNDS, WEEK_BOUNDS)))
+def test_week_ranges_match_the_linear_filter(min_weeks, max_weeks):
+    index = CourseIndex(COURSES)
+    assert index.filter(min_weeks=min_weeks, max_weeks=max_weeks) == \
+        linear_filter(COURSES, min_weeks=min_weeks, max_weeks=max_weeks)
+
+
+def test_week_range_bounds_are_inclusive():
+    index = CourseIndex(COURSES)
+    assert {c["duration"] for c in index.filter(min_weeks=5, max_weeks=5)} == {"5 weeks"}
+    assert index.filter(min_weeks=6.5, max_weeks=5) == []
+    # Durations that do not parse never match a range
+    assert all(c["duration"] != "Self-paced" for c in index.filter(min_weeks=0))
+
+
+@pytest.mark.parametrize("features", [
+    ["REST API testing"],
+    ["rest api TESTING"],
+    ["CI/CD integration", "Parallel execution"],
+    ["CI/CD integration", "JMeter mastery"],
+    ["No such feature"],
+])
+def test_features_match_the_linear_filter(features):
+    index = CourseIndex(COURSES)
+    assert index.filter(features=features) == linear_filter(COURSES, features=features)
+    assert index.filter("Advanced", "weeks", 4, 8, features) == \
+        linear_filter(COURSES, "Advanced", "weeks", 4, 8, features)
+
+
+def test_results_keep_catalog_order():
+    index = CourseIndex(COURSES)
+    assert index.filter() == COURSES
+    assert index.filter(min_weeks=0) == [c for c in COURSES if parse_duration_weeks(c["duration"]) is not None]
+
+
+def test_filter_body_encodes_the_filtered_courses():
+    index = CourseIndex(COURSES)
+    body = json.loads(index.filter_body("advanced", None, 5, None, ["CI/CD integration"]).body)
+    expected = linear_filter(COURSES, "advanced", None, 5, None, ["CI/CD integration"])
+    assert body["data"] == expected
+    assert body["total_courses"] == len(expected)
+    assert body["filters_applied"] == {"level": "advanced", "duration": None, "min_weeks": 5,
+                                       "max_weeks": None, "features": ["CI/CD integration"]}
+
+
+def test_common_bodies_are_kept_outside_the_lru():
+    index = CourseIndex(COURSES)
+    assert index.filter_body() is index.filter_body()
+    assert index.filter_body("Beginner") is index.filter_body("Beginner")
+    assert len(index._filter_bodies) == 0
+
+
+def test_filter_bodies_lru_evicts_the_least_recently_used(monkeypatch):
+    monkeypatch.setattr(course_index, "MAX_CACHED_FILTER_BODIES", 3)
+    index = CourseIndex(COURSES)
+    first = index.filter_body(min_weeks=1)
+    second = index.filter_body(min_weeks=2)
+    index.filter_body(min_weeks=3)
+    # A hit moves the entry to the most recently used end
+    assert index.filter_body(min_weeks=1) is first
+
+    index.filter_body(min_weeks=4)
+    keys = [key[2] for key in index._filter_bodies]
+    assert keys == [3, 1, 4]
+    assert index.filter_body(min_weeks=1) is first
+    # min_weeks=2 was evicted and is rebuilt as a new body
+    assert index.filter_body(min_weeks=2) is not second
+    assert len(index._filter_bodies) == 3
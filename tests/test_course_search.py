@@ -0,0 +1,147 @@
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from course_search import B, K1, SearchIndex, analyze, trigrams
+
+COURSES = [
+    {"id": "selenium", "title": "Selenium WebDriver", "description": "Automate browsers with Selenium",
+     "features": ["Element locators", "Browser automation"]},
+    {"id": "api", "title": "API Testing", "description": "Test REST services, with a nod to Selenium",
+     "features": ["REST API testing", "JSON validation"]},
+    {"id": "mobile", "title": "Mobile Testing", "description": "Appium on real devices",
+     "features": ["Appium setup", "Mobile gestures"]},
+    {"id": "perf", "title": "Performance Testing", "description": "Load tests with JMeter",
+     "features": ["JMeter mastery", "Performance metrics"]},
+]
+
+
+def reference_bm25(courses, terms):
+    """Plain BM25 over the same field-weighted frequencies, one course at a time"""
+    analyzed = {course["id"]: analyze(course) for course in courses}
+    average_length = sum(length for _, length in analyzed.values()) / len(courses)
+    scores = {}
+    for course_id, (frequencies, length) in analyzed.items():
+        score = 0.0
+        for term in terms:
+            containing = sum(1 for f, _ in analyzed.values() if term in f)
+            if term not in frequencies:
+                continue
+            idf = math.log(1 + (len(courses) - containing + 0.5) / (containing + 0.5))
+            tf = frequencies[term]
+            score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+        if score:
+            scores[course_id] = score
+    return scores
+
+
+def ids(results):
+    return [course["id"] for _, course in results]
+
+
+def test_bm25_scores_and_order():
+    index = SearchIndex.build(COURSES)
+    total, results = index.search("selenium testing", prefix=False)
+    expected = reference_bm25(COURSES, ["selenium", "testing"])
+    assert total == len(expected)
+    assert ids(results) == sorted(expected, key=lambda course_id: -expected[course_id])
+    for score, course in results:
+        assert score == pytest.approx(expected[course["id"]])
+
+
+def test_title_matches_outrank_description_matches():
+    index = SearchIndex.build(COURSES)
+    _, results = index.search("selenium", prefix=False)
+    assert ids(results) == ["selenium", "api"]
+
+
+def test_limit_keeps_the_best_and_breaks_ties_by_catalog_order():
+    index = SearchIndex.build(COURSES)
+    total, results = index.search("testing", limit=2, prefix=False)
+    assert total == 3
+    assert len(results) == 2
+    assert results[0][0] >= results[1][0]
+    _, everything = index.search("testing", prefix=False)
+    assert ids(results) == ids(everything)[:2]
+
+
+@pytest.mark.parametrize("query,expected", [
+    ("selenim", "selenium"),
+    ("apium", "mobile"),
+    ("perfomance", "perf"),
+])
+def test_typos_are_corrected_through_trigrams(query, expected):
+    index = SearchIndex.build(COURSES)
+    total, results = index.search(query, prefix=False)
+    assert total >= 1
+    assert ids(results)[0] == expected
+
+
+def test_unrelated_words_match_nothing():
+    index = SearchIndex.build(COURSES)
+    assert index.search("kubernetes") == (0, [])
+    assert SearchIndex.build([]).search("selenium") == (0, [])
+
+
+def test_last_word_matches_as_a_prefix():
+    index = SearchIndex.build(COURSES)
+    assert ids(index.search("sele")[1]) == ["selenium", "api"]
+    assert ids(index.search("rest valid")[1]) == ["api"]
+    # Only the last word is expanded
+    assert index.search("sele", prefix=False) == (0, [])
+    assert index.expand("sele testing")[0] == []
+
+
+def test_exact_terms_outweigh_their_prefix_expansions():
+    index = SearchIndex.build(COURSES)
+    weights = dict(index.expand("test")[0])
+    assert weights["test"] == 1.0
+    assert weights["testing"] < 1.0
+    assert "tests" in weights
+
+
+def assert_same_index(actual, expected):
+    assert actual.courses == expected.courses
+    assert actual.positions == expected.positions
+    assert actual.postings == expected.postings
+    assert actual.vocabulary == expected.vocabulary
+    assert actual.trigram_terms == expected.trigram_terms
+    assert actual.total_length == pytest.approx(expected.total_length)
+
+
+def test_incremental_build_matches_a_fresh_build():
+    previous = SearchIndex.build(COURSES)
+    previous.search("selenium")  # fills the impact cache of the old index
+    changed = dict(COURSES[2], description="Appium and Espresso on real devices")
+    added = {"id": "ci", "title": "CI Pipelines", "description": "Jenkins and GitHub Actions",
+             "features": ["Parallel execution"]}
+    courses = [COURSES[0], COURSES[1], changed, added]  # "perf" removed
+
+    index = SearchIndex.build(courses, previous)
+    assert_same_index(index, SearchIndex.build(courses))
+    assert ids(index.search("espresso")[1]) == ["mobile"]
+    assert index.search("jmeter", prefix=False) == (0, [])
+    assert "jmeter" not in index.vocabulary
+    assert not any("jmeter" in terms for terms in index.trigram_terms.values())
+
+    # The previous index is left exactly as it was
+    assert_same_index(previous, SearchIndex.build(COURSES))
+    assert ids(previous.search("jmeter")[1]) == ["perf"]
+
+
+def test_incremental_build_reuses_untouched_structures():
+    previous = SearchIndex.build(COURSES)
+    changed = dict(COURSES[3], title="Performance Testing with JMeter")
+    index = SearchIndex.build(COURSES[:3] + [changed], previous)
+    # Posting lists of terms the changed course does not contain are shared
+    assert index.postings["selenium"] is previous.postings["selenium"]
+    assert index.postings["jmeter"] is not previous.postings["jmeter"]
+    # No term was added or removed, so the vocabulary is reused as is
+    assert index.vocabulary is previous.vocabulary
+    assert index.documents["selenium"] is previous.documents["selenium"]
+
+
+def test_trigrams_are_anchored():
+    assert trigrams("api") == {"^ap", "api", "pi$"}
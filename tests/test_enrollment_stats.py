@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from enrollment_stats import OTHER, EnrollmentStats, rebuild
+
+
+def enrollment(country, course_interest="SDET Bootcamp"):
+    return {"country": country, "course_interest": course_interest, "experience_level": "Beginner",
+            "submission_time": datetime(2024, 5, 1, 12)}
+
+
+def new_db():
+    return mongomock_motor.AsyncMongoMockClient()["stats"]
+
+
+def test_free_text_values_are_capped_and_overflow_into_other():
+    stats = EnrollmentStats(None, max_values=3)
+    stats.record_many(enrollment(country) for country in ["India", " India  ", "Brazil", "Kenya", "Peru", "Chile"])
+    stats.record(enrollment("Brazil", course_interest="  SDET   Bootcamp"))
+
+    summary = stats.summary()
+    assert summary["by_country"] == {"India": 2, "Brazil": 2, "Kenya": 1, OTHER: 2}
+    assert summary["by_course_interest"] == {"SDET Bootcamp": 7}
+    assert summary["by_experience_level"] == {"Beginner": 7}
+
+
+def test_cap_holds_across_flush_and_reload():
+    async def scenario():
+        db = new_db()
+        first, second = EnrollmentStats(db, max_values=2), EnrollmentStats(db, max_values=2)
+        first.record_many(enrollment(country) for country in ["India", "Brazil"])
+        await first.flush()
+        await second.load()
+        second.record(enrollment("Kenya"))
+        return second.summary()["by_country"]
+
+    assert asyncio.run(scenario()) == {"India": 1, "Brazil": 1, OTHER: 1}
+
+
+def test_rebuild_keeps_the_most_frequent_values():
+    async def scenario():
+        db = new_db()
+        countries = ["India"] * 3 + ["Brazil"] * 2 + ["Kenya", "Peru", None]
+        await db.enrollments.insert_many([enrollment(country) for country in countries])
+        # A counter stored before the cap existed
+        await db.enrollment_stats.insert_one({"_id": "country:Peru", "dimension": "country", "value": "Peru", "count": 1})
+        await rebuild(db, max_values=2)
+        stats = EnrollmentStats(db)
+        await stats.load()
+        return stats.summary()
+
+    summary = asyncio.run(scenario())
+    assert summary["total"] == 8
+    assert summary["by_country"] == {"India": 3, "Brazil": 2, OTHER: 3}
@@ -0,0 +1,102 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from export import COLUMNS, CsvEncoder, ExportError, build_query, export_documents, make_encoder
+
+ENROLLMENT = {
+    "id": "e1", "name": "Student One", "email": "s1@example.com", "country": "India",
+    "phone_number": "+911234567890", "experience_level": "Beginner", "course_interest": "Selenium",
+    "submission_time": datetime(2025, 1, 2, 3, 4, 5),
+}
+
+
+def read_csv(data):
+    return list(csv.reader(io.StringIO(data.decode("utf-8"))))
+
+
+@pytest.mark.parametrize("value", ["=HYPERLINK(\"http://x\")", "+1+1", "-2+3", "@SUM(A1)", "\t=1", "\r=1"])
+def test_csv_cells_that_look_like_formulas_are_escaped(value):
+    encoder = CsvEncoder(COLUMNS["enrollments"])
+    rows = read_csv(encoder.encode([dict(ENROLLMENT, name=value)]))
+    assert rows[1][1] == "'" + value
+
+
+def test_csv_leaves_other_cells_alone():
+    encoder = CsvEncoder(COLUMNS["enrollments"])
+    rows = read_csv(encoder.encode([dict(ENROLLMENT, name="O'Brien = friend")]))
+    assert rows[1][1] == "O'Brien = friend"
+    assert rows[1][-1] == "2025-01-02T03:04:05"
+
+
+def enrollments(count):
+    return [dict(ENROLLMENT, id=f"e{i}", name=f"Student {i}", submission_time=datetime(2025, 1, 1, 0, 0, i))
+            for i in range(count)]
+
+
+def run_export(docs, fmt, batch_size):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["export"]
+        if docs:
+            await db.enrollments.insert_many([dict(doc) for doc in docs])
+        encoder = make_encoder("enrollments", fmt)
+        return [chunk async for chunk in export_documents(db, "enrollments", {}, encoder, batch_size)]
+
+    return asyncio.run(scenario())
+
+
+def test_csv_header_is_written_once_across_batches():
+    chunks = run_export(enrollments(5), "csv", 2)
+    assert len(chunks) == 3
+    rows = read_csv(b"".join(chunks))
+    assert rows[0] == COLUMNS["enrollments"]
+    assert [row[1] for row in rows[1:]] == [f"Student {i}" for i in range(5)]
+
+
+def test_empty_csv_export_still_has_a_header():
+    assert read_csv(b"".join(run_export([], "csv", 2))) == [COLUMNS["enrollments"]]
+
+
+def test_ndjson_export():
+    chunks = run_export(enrollments(3), "ndjson", 2)
+    records = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [record["id"] for record in records] == ["e0", "e1", "e2"]
+    assert list(records[0]) == COLUMNS["enrollments"]
+    # No formula escaping outside CSV
+    assert records[0]["phone_number"] == "+911234567890"
+    assert records[2]["submission_time"] == "2025-01-01T00:00:02"
+
+
+def test_parquet_export_streams_one_row_group_per_batch():
+    pq = pytest.importorskip("pyarrow.parquet")
+    chunks = run_export(enrollments(5), "parquet", 2)
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column_names == COLUMNS["enrollments"]
+    assert table.column("id").to_pylist() == [f"e{i}" for i in range(5)]
+    assert table.column("phone_number").to_pylist()[0] == "+911234567890"
+    assert table.column("submission_time").to_pylist()[4] == datetime(2025, 1, 1, 0, 0, 4)
+
+
+def test_empty_parquet_export_is_a_valid_file():
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(b"".join(run_export([], "parquet", 2))))
+    assert table.num_rows == 0
+    assert table.column_names == COLUMNS["enrollments"]
+
+
+def test_unknown_format_and_filters_are_rejected():
+    with pytest.raises(ExportError, match="Unsupported format"):
+        make_encoder("enrollments", "xlsx")
+    with pytest.raises(ExportError, match="not supported for contacts"):
+        build_query("contacts", country="India")
+    assert build_query("enrollments", since=datetime(2025, 1, 1), country="India") == {
+        "submission_time": {"$gte": datetime(2025, 1, 1)}, "country": "India"
+    }
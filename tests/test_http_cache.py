@@ -0,0 +1,100 @@
+import gzip
+import json
+
+import pytest
+from starlette.requests import Request
+
+from http_cache import MIN_COMPRESS_SIZE, PreparedBody, parse_accept_encoding
+
+BODY = json.dumps({"data": [{"id": i, "title": f"Course {i}"} for i in range(50)]}).encode()
+
+
+def make_request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/courses",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert parse_accept_encoding("GZIP;q=0.5, br; q=0") == {"gzip"}
+    assert parse_accept_encoding("identity;q=0.000, ,") == set()
+    assert parse_accept_encoding("") == set()
+
+
+def test_identical_bodies_share_a_strong_etag():
+    prepared = PreparedBody(BODY)
+    assert prepared.etag == PreparedBody(BODY).etag
+    assert prepared.etag != PreparedBody(BODY + b" ").etag
+    assert prepared.etag.startswith('"') and prepared.etag.endswith('"')
+
+
+def test_uncompressed_response():
+    prepared = PreparedBody(BODY)
+    response = prepared.response(make_request(), "public, max-age=300")
+    assert response.status_code == 200
+    assert response.body == BODY
+    assert response.headers["etag"] == prepared.etag
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["cache-control"] == "public, max-age=300"
+    assert "content-encoding" not in response.headers
+
+
+def test_gzip_is_negotiated():
+    prepared = PreparedBody(BODY)
+    response = prepared.response(make_request(accept_encoding="gzip"), "no-cache")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f'"{prepared.digest}-gzip"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.body) == BODY
+
+
+def test_brotli_is_preferred_when_accepted():
+    brotli = pytest.importorskip("brotli")
+    prepared = PreparedBody(BODY)
+    response = prepared.response(make_request(accept_encoding="gzip, br"), "no-cache")
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"] == f'"{prepared.digest}-br"'
+    assert brotli.decompress(response.body) == BODY
+
+    refused = prepared.response(make_request(accept_encoding="gzip, br;q=0"), "no-cache")
+    assert refused.headers["content-encoding"] == "gzip"
+
+
+def test_small_bodies_are_not_compressed():
+    body = b'{"status":"success"}'
+    assert len(body) < MIN_COMPRESS_SIZE
+    prepared = PreparedBody(body)
+    response = prepared.response(make_request(accept_encoding="gzip, br"), "no-cache")
+    assert response.body == body
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.parametrize("if_none_match", [
+    "{etag}",
+    'W/{etag}',
+    '"{digest}-gzip"',
+    '"{digest}-br"',
+    '"stale", {etag}',
+    "*",
+])
+def test_if_none_match_returns_304(if_none_match):
+    prepared = PreparedBody(BODY)
+    header = if_none_match.format(etag=prepared.etag, digest=prepared.digest)
+    response = prepared.response(make_request(if_none_match=header, accept_encoding="gzip"), "no-cache")
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == prepared.etag
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_stale_etag_gets_the_full_body():
+    prepared = PreparedBody(BODY)
+    stale = PreparedBody(BODY + b" ")
+    response = prepared.response(make_request(if_none_match=stale.etag), "no-cache")
+    assert response.status_code == 200
+    assert response.body == BODY
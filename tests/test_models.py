@@ -0,0 +1,45 @@
+import pytest
+from pydantic import ValidationError
+
+from models import ContactForm, CourseEnrollmentForm
+
+ENROLLMENT = {
+    "name": "Ada Lovelace",
+    "email": "ada@example.com",
+    "country": "United Kingdom",
+    "phone_number": "+44 20 7946 0958",
+    "experience_level": "Beginner",
+    "course_interest": "API testing",
+}
+CONTACT = {"name": "Ada Lovelace", "email": "ada@example.com", "message": "When does the next cohort start?"}
+
+
+def messages(model, data):
+    with pytest.raises(ValidationError) as caught:
+        model.model_validate(data)
+    return {error["loc"][0]: error["msg"] for error in caught.value.errors()}
+
+
+@pytest.mark.parametrize("field, value, expected", [
+    ("name", " A ", "Value error, Name must be at least 2 characters"),
+    ("name", "A" * 101, "Value error, Name must be less than 100 characters"),
+    ("country", "U", "Value error, Country must be at least 2 characters"),
+    ("country", "U" * 51, "Value error, Country must be less than 50 characters"),
+])
+def test_enrollment_length_messages(field, value, expected):
+    assert messages(CourseEnrollmentForm, {**ENROLLMENT, field: value}) == {field: expected}
+
+
+@pytest.mark.parametrize("field, value, expected", [
+    ("name", "A", "Value error, Name must be at least 2 characters"),
+    ("message", "   too short   ", "Value error, Message must be at least 10 characters"),
+])
+def test_contact_length_messages(field, value, expected):
+    assert messages(ContactForm, {**CONTACT, field: value}) == {field: expected}
+
+
+def test_valid_forms_are_stripped():
+    enrollment = CourseEnrollmentForm.model_validate({**ENROLLMENT, "name": "  Ada Lovelace ", "country": " UK "})
+    assert (enrollment.name, enrollment.country) == ("Ada Lovelace", "UK")
+    contact = ContactForm.model_validate({**CONTACT, "message": "  When does the next cohort start?  "})
+    assert contact.message == "When does the next cohort start?"
@@ -0,0 +1,181 @@
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from notification_sinks import MemorySink
+from outbox import DEAD_LETTER_COLLECTION, OutboxDispatcher
+
+
+def make_dispatcher(db, sinks, **kwargs):
+    kwargs.setdefault("retry_backoff", 0)
+    return OutboxDispatcher(db, sinks, **kwargs)
+
+
+async def submit(db, dispatcher, collection="enrollments", event="enrollment.created", **fields):
+    document = {"id": str(uuid.uuid4()), "name": "Student", "email": "student@example.com",
+                "submission_time": datetime.utcnow(), "dedup_key": "internal", **fields}
+    await db[collection].insert_one(dispatcher.attach(document, event))
+    return document["id"]
+
+
+def new_db():
+    return mongomock_motor.AsyncMongoMockClient()["outbox"]
+
+
+def test_fans_out_to_every_sink_once():
+    async def scenario():
+        db = new_db()
+        webhook, email = MemorySink("webhook"), MemorySink("email")
+        dispatcher = make_dispatcher(db, [webhook, email])
+        enrollment_id = await submit(db, dispatcher)
+        await submit(db, dispatcher, "contacts", "contact.created", message="Hello there")
+
+        assert await dispatcher.dispatch_once() == 2
+        assert await dispatcher.dispatch_once() == 0
+        stored = await db.enrollments.find_one({"id": enrollment_id})
+        return webhook, email, stored
+
+    webhook, email, stored = asyncio.run(scenario())
+    assert sorted(event["type"] for event in webhook.events_received) == ["contact.created", "enrollment.created"]
+    assert len(email.events_received) == 2
+    event = next(e for e in webhook.events_received if e["collection"] == "enrollments")
+    assert event["id"] == stored["id"]
+    assert "outbox" not in event["data"] and "dedup_key" not in event["data"]
+    assert stored["outbox"]["state"] == "delivered"
+    assert stored["outbox"]["pending"] == []
+
+
+def test_sinks_only_receive_their_events():
+    async def scenario():
+        db = new_db()
+        contacts_only = MemorySink("sheets", events=("contact.created",))
+        dispatcher = make_dispatcher(db, [contacts_only])
+        enrollment = await submit(db, dispatcher)
+        await submit(db, dispatcher, "contacts", "contact.created")
+        await dispatcher.dispatch_once()
+        return contacts_only, await db.enrollments.find_one({"id": enrollment})
+
+    sink, enrollment = asyncio.run(scenario())
+    assert [event["type"] for event in sink.events_received] == ["contact.created"]
+    assert "outbox" not in enrollment
+
+
+def test_failed_sink_is_retried_without_resending_to_the_others():
+    async def scenario():
+        db = new_db()
+        healthy, flaky = MemorySink("webhook"), MemorySink("email", fail_times=2)
+        dispatcher = make_dispatcher(db, [healthy, flaky])
+        enrollment_id = await submit(db, dispatcher)
+
+        await dispatcher.dispatch_once()
+        retrying = (await db.enrollments.find_one({"id": enrollment_id}))["outbox"]
+        await dispatcher.dispatch_once()
+        await dispatcher.dispatch_once()
+        return healthy, flaky, retrying, (await db.enrollments.find_one({"id": enrollment_id}))["outbox"]
+
+    healthy, flaky, retrying, final = asyncio.run(scenario())
+    assert retrying["state"] == "pending"
+    assert retrying["pending"] == ["email"]
+    assert retrying["attempts"] == 1
+    assert "unavailable" in retrying["errors"]["email"]
+    assert healthy.calls == 1
+    assert flaky.calls == 3
+    assert final["state"] == "delivered"
+
+
+def test_backoff_delays_the_next_attempt():
+    async def scenario():
+        db = new_db()
+        dispatcher = make_dispatcher(db, [MemorySink(fail_times=1)], retry_backoff=60)
+        await submit(db, dispatcher)
+        await dispatcher.dispatch_once()
+        return await dispatcher.dispatch_once(), (await db.enrollments.find_one({}))["outbox"]
+
+    handled, outbox = asyncio.run(scenario())
+    assert handled == 0
+    assert (outbox["next_attempt_at"] - datetime.utcnow()).total_seconds() >= 25
+
+
+def test_dead_letters_after_max_attempts():
+    async def scenario():
+        db = new_db()
+        sink = MemorySink(fail_times=10)
+        dispatcher = make_dispatcher(db, [sink], max_attempts=3)
+        enrollment_id = await submit(db, dispatcher)
+        for _ in range(5):
+            await dispatcher.dispatch_once()
+        return sink, dispatcher, await db.enrollments.find_one({"id": enrollment_id}), \
+            await db[DEAD_LETTER_COLLECTION].find({}, {"_id": 0}).to_list(None)
+
+    sink, dispatcher, enrollment, dead_letters = asyncio.run(scenario())
+    assert sink.calls == 3
+    assert enrollment["outbox"]["state"] == "dead"
+    assert [letter["id"] for letter in dead_letters] == [enrollment["id"]]
+    assert dead_letters[0]["sinks"] == ["memory"]
+    assert dead_letters[0]["event"]["type"] == "enrollment.created"
+    assert dispatcher.status()["dead_lettered"] == 1
+
+
+def test_claimed_records_are_not_dispatched_twice():
+    async def scenario():
+        db = new_db()
+        first, second = make_dispatcher(db, [MemorySink()]), make_dispatcher(db, [MemorySink()])
+        for _ in range(4):
+            await submit(db, first)
+        claimed = await first.claim("enrollments")
+        return claimed, await second.claim("enrollments")
+
+    claimed, overlap = asyncio.run(scenario())
+    assert len(claimed) == 4
+    assert overlap == []
+
+
+def test_expired_claims_are_picked_up_again():
+    async def scenario():
+        db = new_db()
+        crashed = make_dispatcher(db, [MemorySink()], lease_seconds=0)
+        await submit(db, crashed)
+        await crashed.claim("enrollments")  # never delivers, as if the process died
+        sink = MemorySink()
+        await make_dispatcher(db, [sink]).dispatch_once()
+        return sink
+
+    assert len(asyncio.run(scenario()).events_received) == 1
+
+
+def test_concurrent_deliveries_are_bounded():
+    async def scenario():
+        db = new_db()
+        sink = MemorySink(delay=0.01)
+        dispatcher = make_dispatcher(db, [sink], concurrency=3, batch_size=20)
+        for _ in range(12):
+            await submit(db, dispatcher)
+        await dispatcher.dispatch_once()
+        return sink
+
+    sink = asyncio.run(scenario())
+    assert len(sink.events_received) == 12
+    assert sink.max_in_flight == 3
+
+
+def test_slow_sink_times_out_and_is_retried():
+    async def scenario():
+        db = new_db()
+        dispatcher = make_dispatcher(db, [MemorySink(delay=1)], send_timeout=0.01)
+        await submit(db, dispatcher)
+        await dispatcher.dispatch_once()
+        return (await db.enrollments.find_one({}))["outbox"]
+
+    outbox = asyncio.run(scenario())
+    assert outbox["state"] == "pending"
+    assert outbox["errors"]["memory"] == "TimeoutError"
+
+
+def test_without_sinks_nothing_is_attached():
+    dispatcher = OutboxDispatcher(None, [])
+    assert dispatcher.attach({"id": "1"}, "enrollment.created") == {"id": "1"}
+    assert dispatcher.status()["state"] == "disabled"
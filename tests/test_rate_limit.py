@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from rate_limit import MemoryBackend, RateLimited, RateLimiter
+
+INGRESS = SimpleNamespace(host="10.0.0.7")  # the peer address every proxied request arrives from
+
+
+def submit(limiter, forwarded_for):
+    """Run one check as a request through the ingress would; returns True when it was allowed"""
+    headers = {"x-forwarded-for": forwarded_for} if forwarded_for else {}
+    try:
+        asyncio.run(limiter.check(limiter.client_ip(headers, INGRESS)))
+    except RateLimited:
+        return False
+    return True
+
+
+@pytest.fixture
+def limiter_from_env(monkeypatch):
+    def make(**env):
+        monkeypatch.setenv("RATE_LIMIT_ENABLED", "true")
+        monkeypatch.setenv("RATE_LIMIT_IP", "20/minute")
+        monkeypatch.delenv("RATE_LIMIT_PROXY_HOPS", raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return RateLimiter.from_env("enroll", MemoryBackend())
+
+    return make
+
+
+def test_distinct_clients_behind_the_ingress_get_their_own_buckets(limiter_from_env):
+    limiter = limiter_from_env(RATE_LIMIT_PROXY_HOPS="1")
+    assert all(submit(limiter, f"203.0.113.{i}") for i in range(25))
+
+
+def test_one_client_behind_the_ingress_is_limited(limiter_from_env):
+    limiter = limiter_from_env(RATE_LIMIT_PROXY_HOPS="1")
+    results = [submit(limiter, "203.0.113.9") for _ in range(21)]
+    assert results == [True] * 20 + [False]
+
+
+def test_spoofed_forwarded_for_entries_are_ignored(limiter_from_env):
+    # The ingress appends the real peer; anything left of it came from the client
+    limiter = limiter_from_env(RATE_LIMIT_PROXY_HOPS="1")
+    results = [submit(limiter, f"198.51.100.{i}, 203.0.113.9") for i in range(21)]
+    assert results[-1] is False
+
+
+def test_ip_limit_is_off_until_proxy_hops_are_configured(limiter_from_env):
+    limiter = limiter_from_env()
+    assert limiter.ip_rate is None
+    assert limiter.email_rate is not None
+    assert all(submit(limiter, f"203.0.113.{i}") for i in range(25))
+
+
+def test_direct_connections_use_the_peer_address(limiter_from_env):
+    limiter = limiter_from_env(RATE_LIMIT_PROXY_HOPS="0")
+    assert limiter.ip_rate is not None
+    assert limiter.client_ip({"x-forwarded-for": "203.0.113.9"}, INGRESS) == "10.0.0.7"
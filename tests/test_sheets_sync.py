@@ -0,0 +1,197 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+from sheets_sync import PENDING_FIELD, SheetsSyncWorker, enrollment_to_row
+
+
+class FakeWorksheet:
+    """In-memory stand-in for a gspread worksheet.
+
+    ``fail_times`` makes the next N ``append_rows`` calls raise, which is
+    handy for exercising the retry path.
+    """
+
+    def __init__(self, fail_times=0):
+        self.rows = []
+        self.calls = 0
+        self.fail_times = fail_times
+
+    def append_rows(self, values, value_input_option="RAW"):
+        self.calls += 1
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise RuntimeError("Quota exceeded for quota metric 'Write requests'")
+        self.rows.extend(values)
+        return {"updates": {"updatedRows": len(values)}}
+
+
+def make_enrollment(i, submitted):
+    return {
+        "id": f"id-{i:04d}",
+        "name": f"Student {i}",
+        "email": f"student{i}@example.com",
+        "country": "India",
+        "phone_number": "+911234567890",
+        "experience_level": "Beginner",
+        "course_interest": "Selenium",
+        "submission_time": submitted,
+        PENDING_FIELD: True,
+    }
+
+
+def make_worker(db, worksheet, **kwargs):
+    return SheetsSyncWorker(db, lambda: worksheet, **kwargs)
+
+
+def test_syncs_in_batches_and_resumes_where_the_last_worker_stopped():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["sheets_sync"]
+        start = datetime.utcnow() - timedelta(minutes=5)
+        await db.enrollments.insert_many([make_enrollment(i, start + timedelta(seconds=i)) for i in range(5)])
+
+        worksheet = FakeWorksheet()
+        worker = make_worker(db, worksheet, batch_size=2, requests_per_minute=6000)
+        assert await worker.sync_once() == 2
+        assert worker.queue_depth == 3
+        assert worker.lag_seconds > 0
+
+        # A fresh worker picks up what is still flagged instead of starting over
+        await worker.release_lease()  # as stop() does
+        restarted = make_worker(db, worksheet, batch_size=10, requests_per_minute=6000)
+        assert await restarted.sync_once() == 3
+        assert await restarted.sync_once() == 0
+        assert restarted.status()["queue_depth"] == 0
+        return worksheet
+
+    worksheet = asyncio.run(scenario())
+    assert [row[1] for row in worksheet.rows] == [f"student{i}@example.com" for i in range(5)]
+    assert worksheet.calls == 2
+
+
+def test_failed_append_leaves_the_batch_pending():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["sheets_sync"]
+        await db.enrollments.insert_one(make_enrollment(1, datetime.utcnow() - timedelta(minutes=1)))
+        worksheet = FakeWorksheet(fail_times=1)
+        worker = make_worker(db, worksheet, requests_per_minute=6000)
+        with pytest.raises(RuntimeError):
+            await worker.sync_once()
+        assert worker.queue_depth == 1
+        assert await worker.sync_once() == 1
+        return worksheet
+
+    worksheet = asyncio.run(scenario())
+    assert len(worksheet.rows) == 1
+
+
+def test_attach_flags_documents_only_when_enabled():
+    assert SheetsSyncWorker(None, lambda: None).attach({"id": "1"}) == {"id": "1", PENDING_FIELD: True}
+    assert SheetsSyncWorker(None, lambda: None, enabled=False).attach({"id": "1"}) == {"id": "1"}
+
+
+def test_demo_mode_returns_before_touching_the_database():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["sheets_sync"]
+        await db.enrollments.insert_one(make_enrollment(1, datetime.utcnow() - timedelta(minutes=1)))
+        worker = SheetsSyncWorker(db, lambda: None, enabled=False)
+        assert await worker.sync_once() == 0
+        return worker.status(), await db.sync_state.count_documents({}), \
+            await db.enrollments.count_documents({PENDING_FIELD: True})
+
+    status, leases, pending = asyncio.run(scenario())
+    assert status["state"] == "demo_mode"
+    # No lease taken and no backlog query; the flagged document is left alone
+    assert leases == 0
+    assert status["queue_depth"] == 0
+    assert pending == 1
+
+
+def test_late_insert_with_an_older_timestamp_is_synced():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["sheets_sync"]
+        now = datetime.utcnow()
+        await db.enrollments.insert_one(make_enrollment(2, now - timedelta(seconds=10)))
+        worksheet = FakeWorksheet()
+        worker = make_worker(db, worksheet, requests_per_minute=6000)
+        assert await worker.sync_once() == 1
+        # Timestamped before the synced row, but inserted after it was synced
+        # (a write-buffer retry or a bulk-import chunk)
+        await db.enrollments.insert_one(make_enrollment(1, now - timedelta(minutes=5)))
+        assert await worker.sync_once() == 1
+        assert worker.queue_depth == 0
+        return worksheet, await db.enrollments.count_documents({"sheets_pending": True})
+
+    worksheet, pending = asyncio.run(scenario())
+    assert [row[1] for row in worksheet.rows] == ["student2@example.com", "student1@example.com"]
+    assert pending == 0
+
+
+def test_enrollment_to_row_formats_timestamp():
+    submitted = datetime(2025, 1, 2, 3, 4, 5)
+    row = enrollment_to_row(make_enrollment(7, submitted))
+    assert row[0] == "Student 7"
+    assert row[-1] == "2025-01-02T03:04:05"
+
+
+def test_only_the_lease_holder_appends():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["sheets_sync"]
+        start = datetime.utcnow() - timedelta(minutes=1)
+        await db.enrollments.insert_many([make_enrollment(i, start + timedelta(seconds=i)) for i in range(3)])
+        worksheet = FakeWorksheet()
+        # One worker per app process, all sharing the database
+        workers = [make_worker(db, worksheet, requests_per_minute=6000) for _ in range(2)]
+        written = [await worker.sync_once() for worker in workers]
+        return worksheet, written, [worker.status()["state"] for worker in workers]
+
+    worksheet, written, states = asyncio.run(scenario())
+    assert written == [3, 0]
+    assert states[1] == "standby"
+    assert len(worksheet.rows) == 3
+
+
+def test_expired_or_released_lease_is_taken_over():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["sheets_sync"]
+        await db.enrollments.insert_one(make_enrollment(1, datetime.utcnow() - timedelta(minutes=1)))
+        worksheet = FakeWorksheet()
+        crashed = make_worker(db, worksheet, lease_seconds=0)
+        assert await crashed.acquire_lease()
+        successor = make_worker(db, worksheet, requests_per_minute=6000)
+        taken_over = await successor.sync_once()
+
+        standby = make_worker(db, worksheet)
+        assert not await standby.acquire_lease()
+        await successor.release_lease()
+        return taken_over, await standby.acquire_lease()
+
+    taken_over, acquired = asyncio.run(scenario())
+    assert taken_over == 1
+    assert acquired
+
+
+def test_worker_can_be_started_again_after_stop():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["sheets_sync"]
+        worksheet = FakeWorksheet()
+        worker = make_worker(db, worksheet, poll_interval=0.01, requests_per_minute=6000)
+        for i in range(2):
+            # One lifespan cycle each, as when the app is restarted in-process
+            worker.start()
+            await db.enrollments.insert_one(make_enrollment(i, datetime.utcnow()))
+            worker.notify()
+            for _ in range(100):
+                if len(worksheet.rows) > i:
+                    break
+                await asyncio.sleep(0.01)
+            await worker.stop()
+        return worksheet, worker.status()
+
+    worksheet, status = asyncio.run(scenario())
+    assert len(worksheet.rows) == 2
+    assert status["state"] == "stopped"
+    assert status["last_error"] is None
@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Budget for ``import server`` in a fresh interpreter; override on slow CI machines
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "1500"))
+
+PROBE = """
+import json, sys, threading, time
+start = time.perf_counter()
+import server
+elapsed = (time.perf_counter() - start) * 1000
+lazy = sorted(m for m in sys.modules if m.split(".")[0] in ("gspread", "google", "google_auth_oauthlib", "numpy", "pyarrow"))
+print(json.dumps({"import_ms": elapsed, "lazy_loaded": lazy, "mongo_client": server.mongo.client is not None,
+                  "threads": [t.name for t in threading.enumerate() if t is not threading.main_thread()]}))
+"""
+
+
+def probe():
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=dict(os.environ),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_optional_integrations_are_not_imported_at_startup():
+    report = probe()
+    assert report["lazy_loaded"] == []
+    assert report["mongo_client"] is False
+
+
+def test_no_threads_are_started_at_import():
+    # gunicorn forks the preloaded app; a thread started here (the log writer) would not survive it
+    assert probe()["threads"] == []
+
+
+def test_import_time_within_budget():
+    best = min(probe()["import_ms"] for _ in range(3))
+    assert best < IMPORT_BUDGET_MS, f"import server took {best:.0f} ms, budget is {IMPORT_BUDGET_MS:.0f} ms"
@@ -0,0 +1,203 @@
+"""Conformance checks shared by every storage backend (storage.py)
+
+The mongo backend runs on mongomock-motor, or on a real server when
+STORAGE_TEST_MONGO_URL is set (a throwaway database is created and dropped).
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from indexes import ensure_indexes
+from storage import MemoryStorage, MongoStorage, SQLiteStorage
+
+try:
+    import mongomock_motor
+except ImportError:
+    mongomock_motor = None
+
+MONGO_URL = os.environ.get("STORAGE_TEST_MONGO_URL")
+BACKENDS = [
+    pytest.param("mongo", marks=pytest.mark.skipif(mongomock_motor is None and not MONGO_URL,
+                                                   reason="needs mongomock-motor or STORAGE_TEST_MONGO_URL")),
+    "sqlite",
+    "memory",
+]
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture(params=BACKENDS)
+def run(request, tmp_path):
+    """Run ``scenario(storage)`` against a fresh, open storage of the backend under test"""
+    backend = request.param
+
+    def runner(scenario):
+        async def main():
+            if backend == "mongo":
+                if MONGO_URL:
+                    from motor.motor_asyncio import AsyncIOMotorClient
+
+                    client = AsyncIOMotorClient(MONGO_URL)
+                else:
+                    client = mongomock_motor.AsyncMongoMockClient()
+                name = f"storage_test_{uuid.uuid4().hex[:12]}"
+                await ensure_indexes(client[name])
+                try:
+                    return await scenario(MongoStorage(None, client[name]))
+                finally:
+                    await client.drop_database(name)
+                    client.close()
+            storage = SQLiteStorage(tmp_path / "storage.sqlite3") if backend == "sqlite" else MemoryStorage()
+            await storage.open()
+            try:
+                return await scenario(storage)
+            finally:
+                await storage.close()
+
+        return asyncio.run(main())
+
+    runner.backend = backend
+    return runner
+
+
+def status_check(i):
+    # MongoDB keeps milliseconds, so the tests do too
+    return {"id": f"status-{i:05d}", "client_name": f"client {i}",
+            "timestamp": START + timedelta(seconds=i, milliseconds=i % 1000)}
+
+
+def enrollment(i, **fields):
+    return {"id": f"enrollment-{i:05d}", "name": f"Student {i}", "email": f"student{i}@example.com",
+            "submission_time": START + timedelta(seconds=i), **fields}
+
+
+def test_lists_in_keyset_order_across_pages(run):
+    # Shared timestamps make the id the tie-breaker
+    documents = [{**status_check(i), "timestamp": START + timedelta(seconds=i // 3)} for i in range(25)]
+
+    async def scenario(storage):
+        await storage.status_checks.insert_many(documents[::-1])
+        pages, after = [], None
+        while True:
+            page = await storage.status_checks.list(after, 7)
+            if not page:
+                break
+            pages.append([doc["id"] for doc in page])
+            after = (page[-1]["timestamp"], page[-1]["id"])
+        return pages, await storage.status_checks.count(), await storage.status_checks.count(
+            (documents[9]["timestamp"], documents[9]["id"]))
+
+    pages, total, remaining = run(scenario)
+    assert [len(page) for page in pages] == [7, 7, 7, 4]
+    assert sum(pages, []) == [doc["id"] for doc in documents]
+    assert total == 25
+    assert remaining == 15
+
+
+def test_insert_many_writes_all_but_duplicates(run):
+    async def scenario(storage):
+        await storage.enrollments.insert_one(enrollment(1))
+        failed = await storage.enrollments.insert_many([enrollment(2), enrollment(1), enrollment(3), enrollment(2)])
+        return failed, [doc["id"] for doc in await storage.enrollments.list()]
+
+    failed, ids = run(scenario)
+    assert sorted(failed) == [1, 3]
+    assert all(isinstance(error, DuplicateKeyError) for error in failed.values())
+    assert ids == ["enrollment-00001", "enrollment-00002", "enrollment-00003"]
+
+
+def test_optional_unique_fields_only_apply_when_set(run):
+    async def scenario(storage):
+        failed = await storage.enrollments.insert_many([
+            enrollment(1), enrollment(2),  # neither has a dedup key
+            enrollment(3, dedup_key="k1", idempotency_key="i1"),
+            enrollment(4, dedup_key="k1"),
+            enrollment(5, idempotency_key="i1"),
+            enrollment(6, dedup_key=None),
+        ])
+        return failed, await storage.enrollments.count()
+
+    failed, count = run(scenario)
+    assert sorted(failed) == [3, 4]
+    assert count == 4
+
+
+def test_insert_one_raises_duplicate_key_error(run):
+    async def scenario(storage):
+        await storage.contacts.insert_one(enrollment(1))
+        with pytest.raises(DuplicateKeyError):
+            await storage.contacts.insert_one(enrollment(1))
+        return await storage.contacts.count()
+
+    assert run(scenario) == 1
+
+
+def test_find_one_by_unique_field_with_projection(run):
+    async def scenario(storage):
+        await storage.enrollments.insert_many([enrollment(1, idempotency_key="abc"), enrollment(2, dedup_key="xyz")])
+        return (
+            await storage.enrollments.find_one("idempotency_key", "abc", fields=("id",)),
+            await storage.enrollments.find_one("dedup_key", "xyz"),
+            await storage.enrollments.find_one("id", "missing"),
+            await storage.enrollments.find_one("email", "student2@example.com", fields=("id", "name")),
+        )
+
+    by_key, full, missing, by_field = run(scenario)
+    assert by_key == {"id": "enrollment-00001"}
+    assert full == enrollment(2, dedup_key="xyz")
+    assert missing is None
+    assert by_field == {"id": "enrollment-00002", "name": "Student 2"}
+
+
+def test_documents_round_trip_unchanged(run):
+    document = enrollment(1, features=["Selenium", "Playwright"], country="Côte d'Ivoire", phone_number=None,
+                          outbox={"state": "pending", "next_attempt_at": START, "errors": {}})
+    original = {**document, "features": list(document["features"])}
+
+    async def scenario(storage):
+        await storage.enrollments.insert_one(document)
+        return await storage.enrollments.list()
+
+    assert run(scenario) == [original]
+    assert document == original  # "_id" was not added to the caller's dict
+
+
+def test_iterate_streams_after_cursor_up_to_limit(run):
+    documents = [status_check(i) for i in range(20)]
+
+    async def scenario(storage):
+        await storage.status_checks.insert_many(documents)
+        after = (documents[4]["timestamp"], documents[4]["id"])
+        limited = [doc async for doc in storage.status_checks.iterate(after, 8, fields=("id",), batch_size=3)]
+        everything = [doc async for doc in storage.status_checks.iterate(batch_size=6)]
+        return limited, everything
+
+    limited, everything = run(scenario)
+    assert limited == [{"id": doc["id"]} for doc in documents[5:13]]
+    assert everything == documents
+
+
+def test_sqlite_uses_wal_and_persists(tmp_path):
+    path = tmp_path / "persist.sqlite3"
+
+    async def write():
+        storage = SQLiteStorage(path)
+        await storage.open()
+        await storage.contacts.insert_many([enrollment(i) for i in range(3)])
+        mode = await storage.run(lambda connection: connection.execute("PRAGMA journal_mode").fetchone()[0])
+        await storage.close()
+        return mode
+
+    async def read():
+        storage = SQLiteStorage(path)
+        try:
+            return await storage.contacts.count(), (await storage.ping())["status"]
+        finally:
+            await storage.close()
+
+    assert asyncio.run(write()) == "wal"
+    assert asyncio.run(read()) == (3, "connected")
+
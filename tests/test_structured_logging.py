@@ -0,0 +1,71 @@
+import io
+import json
+import logging
+
+import pytest
+
+from structured_logging import LogPipeline
+
+
+@pytest.fixture
+def uvicorn_loggers():
+    """uvicorn's logging setup: its own handlers on uvicorn and uvicorn.access, which do not propagate"""
+    saved = {}
+    for name in ("uvicorn", "uvicorn.access"):
+        logger = logging.getLogger(name)
+        saved[name] = (logger.handlers[:], logger.propagate, logger.level)
+        logger.handlers = [logging.StreamHandler(io.StringIO())]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+    yield {name: logging.getLogger(name) for name in saved}
+    for name, (handlers, propagate, level) in saved.items():
+        logger = logging.getLogger(name)
+        logger.handlers, logger.propagate = handlers, propagate
+        logger.setLevel(level)
+
+
+def test_server_logs_go_through_the_queue(uvicorn_loggers):
+    stream = io.StringIO()
+    own_handler = uvicorn_loggers["uvicorn.access"].handlers[0]
+    pipeline = LogPipeline(stream=stream).install()
+    try:
+        uvicorn_loggers["uvicorn.access"].info('%s - "%s %s HTTP/%s" %d', "10.0.0.7:5000", "GET", "/api/", "1.1", 200)
+        logging.getLogger("uvicorn.error").info("Application startup complete.", extra={"color_message": "\x1b[32m"})
+    finally:
+        pipeline.stop()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(r["logger"], r["message"]) for r in records] == [
+        ("uvicorn.access", '10.0.0.7:5000 - "GET /api/ HTTP/1.1" 200'),
+        ("uvicorn.error", "Application startup complete."),
+    ]
+    assert "color_message" not in records[1]
+    assert own_handler.stream.getvalue() == ""
+
+
+def test_stop_restores_the_previous_handlers(uvicorn_loggers):
+    root = logging.getLogger()
+    before = root.handlers[:]
+    access = uvicorn_loggers["uvicorn.access"]
+    access_handlers = access.handlers[:]
+
+    pipeline = LogPipeline(stream=io.StringIO()).install()
+    assert root.handlers == [pipeline.handler]
+    assert access.handlers == [] and access.propagate
+    pipeline.stop()
+
+    assert root.handlers == before
+    assert access.handlers == access_handlers and not access.propagate
+    assert pipeline.listener is None
+
+
+def test_disabled_access_log_stays_disabled(uvicorn_loggers):
+    access = uvicorn_loggers["uvicorn.access"]
+    access.handlers = []  # uvicorn --no-access-log
+    stream = io.StringIO()
+    pipeline = LogPipeline(stream=stream).install()
+    try:
+        access.info("GET /api/ 200")
+    finally:
+        pipeline.stop()
+    assert stream.getvalue() == ""
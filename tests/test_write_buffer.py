@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from storage import MemoryStorage
+from write_buffer import ACK_ENQUEUE, WriteBuffer
+
+
+class BrokenRepository:
+    """Fails with an error that is not a StorageError, then recovers"""
+
+    def __init__(self, repository, failures=1):
+        self.repository = repository
+        self.failures = failures
+        self.batches = []
+
+    async def insert_many(self, documents):
+        self.batches.append(len(documents))
+        if self.failures:
+            self.failures -= 1
+            raise TypeError("documents must be a non-empty list")
+        return await self.repository.insert_many(documents)
+
+
+class SlowRepository:
+    def __init__(self, repository, delay):
+        self.repository = repository
+        self.delay = delay
+        self.batches = []
+
+    async def insert_many(self, documents):
+        self.batches.append(len(documents))
+        await asyncio.sleep(self.delay)
+        return await self.repository.insert_many(documents)
+
+
+def run_with_buffer(scenario, wrap=None, **kwargs):
+    async def main():
+        storage = MemoryStorage()
+        await storage.open()
+        if wrap is not None:
+            storage.contacts = storage.repositories["contacts"] = wrap(storage.contacts)
+        buffer = WriteBuffer(storage, **kwargs)
+        buffer.start()
+        try:
+            return await scenario(buffer, storage)
+        finally:
+            await buffer.close()
+
+    return asyncio.run(main())
+
+
+def contact(i):
+    return {"id": f"contact-{i}", "name": "Student", "email": f"s{i}@example.com", "submission_time": None}
+
+
+def test_lone_submission_is_written_without_waiting_for_a_batch():
+    async def scenario(buffer, storage):
+        turns = []
+        for i in range(20):
+            submission = asyncio.create_task(buffer.submit("contacts", contact(i)))
+            # Count event loop turns instead of wall-clock time: a flusher
+            # that lingered for more submissions would need a timer to fire
+            for turn in range(1, 21):
+                await asyncio.sleep(0)
+                if submission.done():
+                    break
+            await submission
+            turns.append(turn)
+        return turns, storage.contacts.batches, await storage.contacts.repository.count()
+
+    turns, batches, count = run_with_buffer(scenario, wrap=lambda repository: SlowRepository(repository, 0))
+    assert count == 20
+    assert max(turns) < 20
+    assert batches == [1] * 20
+
+
+def test_submissions_arriving_during_a_write_form_the_next_batch():
+    async def scenario(buffer, storage):
+        first = asyncio.ensure_future(buffer.submit("contacts", contact(0)))
+        await asyncio.sleep(0.005)  # the first write is now in flight
+        await asyncio.gather(first, *(buffer.submit("contacts", contact(i)) for i in range(1, 30)))
+        return storage.contacts.batches, await storage.contacts.repository.count()
+
+    batches, count = run_with_buffer(scenario, lambda repository: SlowRepository(repository, 0.02))
+    assert count == 30
+    assert batches == [1, 29]
+
+
+def test_unexpected_error_fails_the_batch_and_keeps_the_flusher_running():
+    async def scenario(buffer, storage):
+        with pytest.raises(TypeError):
+            await asyncio.wait_for(buffer.submit("contacts", contact(1)), 1)
+        await asyncio.wait_for(buffer.submit("contacts", contact(2)), 1)
+        return buffer.running, await storage.contacts.repository.count()
+
+    running, count = run_with_buffer(scenario, BrokenRepository)
+    assert running
+    assert count == 1
+
+
+def test_durable_submissions_report_duplicates_in_enqueue_mode():
+    async def scenario(buffer, storage):
+        await buffer.submit("contacts", contact(1))  # enqueue mode: returns once queued
+        with pytest.raises(DuplicateKeyError):
+            await buffer.submit("contacts", contact(1), durable=True)
+        return await storage.contacts.count()
+
+    assert run_with_buffer(scenario, ack_mode=ACK_ENQUEUE) == 1